@@ -0,0 +1,113 @@
+# =============================
+# File: Batching_Final.py
+# Desc: 동시에 들어온 요청을 짧게 모아 한 번에 처리하는 배치 실행기.
+#       Logic_Final(프로세스 내 NER 마이크로 배치)과 InferenceDaemon_Final(데몬의 NER/OCR/얼굴 배치)이 함께 사용합니다.
+# =============================
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class BatchWorker:
+    """submit() 으로 들어온 요청을 최대 max_wait 초 또는 max_batch 개(또는 cost 합 max_cost)까지 모아
+    fn(요청 목록) -> 결과 목록 으로 한 번에 처리하는 배치 실행기.
+
+    workers 개의 스레드가 차례로 배치를 모아 가므로, 한 배치가 추론 중일 때 다음 배치가 기다리지 않고
+    동시에 실행됩니다 (torch 는 추론 중 GIL 을 놓음). 쉬는 스레드가 있으면 기다리지 않고 이미 쌓인 요청을
+    쉬는 스레드 수로 나눈 만큼만 가져가 병렬성을 유지하고, 모든 스레드가 바쁘고 요청이 쌓여 있을 때만
+    max_wait 동안 모아 크게 묶습니다.
+    """
+
+    def __init__(self, fn, max_wait: float = 0.005, max_batch: int = 16, cost=None, max_cost: float = None,
+                 name: str = "batch", workers: int = 1):
+        self.fn = fn
+        self.max_wait = max(0.0, max_wait)
+        self.max_batch = max(1, max_batch)
+        self.cost = cost
+        self.max_cost = max_cost
+        self.name = name
+        self.workers = max(1, workers)
+        self.batches = 0
+        self.items = 0
+        self._alive = 0
+        self._busy = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._collecting = threading.Lock()
+
+    def resize(self, workers: int):
+        """배치 스레드 수 변경. 늘린 만큼은 다음 submit() 때 시작하고, 줄인 만큼은 배치를 마친 스레드가 종료"""
+        with self._lock:
+            self.workers = max(1, workers)
+
+    def submit(self, item) -> Future:
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items) -> list:
+        """여러 요청을 한 묶음으로 넣음 (같은 배치에 함께 들어가고 다른 스레드로 쪼개지지 않음)"""
+        group = [(item, Future()) for item in items]
+        if not group:
+            return []
+        self._queue.put(group)
+        if self._alive < self.workers:
+            with self._lock:
+                while self._alive < self.workers:
+                    self._alive += 1
+                    threading.Thread(target=self._loop, name=f"pii-{self.name}-{self._alive}", daemon=True).start()
+        return [fut for _, fut in group]
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        batch = list(self._queue.get())
+        total = sum(self.cost(item) for item, _ in batch) if self.cost else 0
+        with self._lock:
+            free = self._alive - self._busy
+        if free > 1:
+            # 쉬는 스레드가 있으면 기다리지 않고 쌓인 묶음 중 내 몫만
+            limit, wait = -(-(1 + self._queue.qsize()) // free), 0.0
+        else:
+            # 뒤에 쌓인 요청이 있을 때(동시 요청이 몰릴 때)만 max_wait 동안 더 모음. 혼자 온 요청은 바로 실행
+            limit, wait = self.max_batch, (self.max_wait if self._queue.qsize() else 0.0)
+        groups = 1
+        deadline = time.monotonic() + wait
+        while groups < limit and len(batch) < self.max_batch and (self.max_cost is None or total < self.max_cost):
+            remaining = deadline - time.monotonic()
+            try:
+                group = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            groups += 1
+            batch.extend(group)
+            if self.cost:
+                total += sum(self.cost(item) for item, _ in group)
+        return batch
+
+    def _loop(self):
+        while True:
+            # 배치는 한 스레드씩 모으고(요청이 여러 스레드로 흩어져 작은 배치가 되지 않게) 실행은 동시에
+            with self._collecting:
+                batch = self._collect()
+                with self._lock:
+                    self._busy += 1
+            live = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+            if live:
+                try:
+                    results = self.fn([item for item, _ in live])
+                except BaseException as e:
+                    for _, fut in live:
+                        fut.set_exception(e)
+                else:
+                    with self._lock:
+                        self.batches += 1
+                        self.items += len(live)
+                    for (_, fut), res in zip(live, results):
+                        fut.set_result(res)
+            with self._lock:
+                self._busy -= 1
+                if self._alive > self.workers:
+                    self._alive -= 1
+                    return
@@ -0,0 +1,322 @@
+# =============================
+# File: InferenceDaemon_Final.py
+# Desc: NER / EasyOCR / MTCNN 모델을 한 프로세스에서만 로드하고
+#       로컬 소켓(Unix 도메인 소켓, Windows 는 named pipe)으로 여러 서버 워커에 제공하는 추론 데몬.
+#
+#       실행: python InferenceDaemon_Final.py
+#       서버: PII_INFERENCE_ADDRESS=<주소> 로 LocalServer_Final.py 를 실행하면
+#             Logic_Final 이 모델을 로드하지 않고 이 데몬에 요청하는 얇은 클라이언트로 동작합니다.
+# =============================
+
+import os
+import sys
+import time
+import logging
+import socket
+import stat
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client
+from ModelStore_Final import user_state_dir
+from Batching_Final import BatchWorker
+
+# 데몬 배치 설정: 요청을 최대 MAX_WAIT_MS 동안 모아 최대 MAX_BATCH 개씩 한 번에 추론
+INFERENCE_MAX_WAIT_MS = float(os.getenv("PII_INFERENCE_MAX_WAIT_MS", "5"))
+INFERENCE_MAX_BATCH = int(os.getenv("PII_INFERENCE_MAX_BATCH", "16"))
+INFERENCE_CONNECT_TIMEOUT = float(os.getenv("PII_INFERENCE_CONNECT_TIMEOUT", "60"))
+# 데몬 인증키 파일 (PII_INFERENCE_AUTHKEY 를 지정하지 않았을 때 사용, 사용자만 읽을 수 있는 위치)
+INFERENCE_KEY_FILE = os.getenv("PII_INFERENCE_KEY_FILE") or os.path.join(user_state_dir(), "inference.key")
+
+
+def default_address() -> str:
+    """기본 데몬 주소. Unix 소켓은 공용 임시 디렉토리가 아닌 사용자 전용 디렉토리에 둠
+    ($XDG_RUNTIME_DIR/shadowai, 없으면 사용자 상태 디렉토리)"""
+    if sys.platform == "win32":
+        return r"\\.\pipe\pii_inference"
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        path = os.path.join(runtime_dir, "shadowai")
+        os.makedirs(path, mode=0o700, exist_ok=True)
+    else:
+        path = user_state_dir()
+    return os.path.join(path, "pii_inference.sock")
+
+
+def _remove_stale_socket(address: str):
+    """이전 데몬이 남긴 소켓 파일 정리. 현재 사용자 소유의 소켓이고 아무도 듣고 있지 않을 때만 지움"""
+    try:
+        st = os.lstat(address)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise ValueError(f"[ERROR] 추론 데몬 주소에 소켓이 아닌 파일이 있습니다: {address}")
+    if st.st_uid != os.getuid():
+        raise ValueError(f"[ERROR] 추론 데몬 소켓을 다른 사용자(uid {st.st_uid})가 소유하고 있습니다: {address}")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(address)
+    except OSError:
+        os.unlink(address)
+    else:
+        raise ValueError(f"[ERROR] 이미 다른 추론 데몬이 실행 중입니다: {address}")
+    finally:
+        probe.close()
+
+
+def _family(address: str) -> str:
+    return "AF_PIPE" if address.startswith("\\\\.\\pipe\\") else "AF_UNIX"
+
+
+def _authkey(create: bool = False) -> bytes:
+    """데몬 인증키.
+
+    multiprocessing.connection 은 인증을 통과한 연결의 메시지를 unpickle 하므로, 키를 아는 프로세스만
+    데몬에 접속할 수 있어야 합니다 (Windows named pipe 에는 별도 ACL 이 없음). PII_INFERENCE_AUTHKEY 가
+    없으면 데몬이 처음 시작할 때 무작위 키를 사용자 전용 파일(0600)로 만들고, 클라이언트는 그 파일을 읽습니다.
+    """
+    key = os.getenv("PII_INFERENCE_AUTHKEY", "")
+    if key:
+        return key.encode()
+    try:
+        with open(INFERENCE_KEY_FILE, "rb") as f:
+            key = f.read()
+    except FileNotFoundError:
+        if not create:
+            raise FileNotFoundError(f"추론 데몬 인증키 파일 없음: {INFERENCE_KEY_FILE} "
+                                    "(데몬을 먼저 실행하거나 PII_INFERENCE_AUTHKEY 를 설정하세요)")
+        try:
+            fd = os.open(INFERENCE_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+        except FileExistsError:
+            # 동시에 시작한 다른 데몬이 먼저 만든 경우
+            return _authkey(create=False)
+        key = secrets.token_bytes(32)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        print(f"[INFO] 추론 데몬 인증키 생성: {INFERENCE_KEY_FILE}")
+    if sys.platform != "win32" and os.stat(INFERENCE_KEY_FILE).st_mode & 0o077:
+        raise ValueError(f"[ERROR] 추론 데몬 인증키 파일을 다른 사용자가 읽을 수 있습니다 (chmod 600 필요): {INFERENCE_KEY_FILE}")
+    if len(key) < 16:
+        raise ValueError(f"[ERROR] 추론 데몬 인증키 파일이 올바르지 않습니다: {INFERENCE_KEY_FILE}")
+    return key
+
+
+# ==========================
+# 클라이언트 (서버 워커 측)
+# ==========================
+
+class InferenceClient:
+    """추론 데몬 연결. 스레드마다 연결을 하나씩 두어 동시 요청이 데몬에서 한 배치로 묶일 수 있게 합니다."""
+
+    def __init__(self, address: str, connect_timeout: float = INFERENCE_CONNECT_TIMEOUT):
+        self.address = address
+        self._local = threading.local()
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            try:
+                self.capabilities = self.call("hello")
+                break
+            except (OSError, EOFError) as e:
+                if time.monotonic() >= deadline:
+                    raise ValueError(f"[ERROR] 추론 데몬({address})에 연결할 수 없습니다: {e}")
+                time.sleep(0.5)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family=_family(self.address), authkey=_authkey())
+            self._local.conn = conn
+        return conn
+
+    def call(self, op: str, *args):
+        for attempt in range(2):
+            try:
+                conn = self._conn()
+                conn.send((op, args))
+                status, payload = conn.recv()
+                break
+            except (OSError, EOFError):
+                # 데몬 재시작 등으로 끊긴 연결은 한 번 다시 연결해 재시도
+                self._local.conn = None
+                if attempt:
+                    raise
+        if status != "ok":
+            raise RuntimeError(f"[ERROR] 추론 데몬 오류 ({op}): {payload}")
+        return payload
+
+    def ner_pipeline(self):
+        return _RemoteNer(self) if self.capabilities.get("ner") else None
+
+    def ocr_reader(self):
+        return _RemoteReader(self) if self.capabilities.get("ocr") else None
+
+    def face_detector(self):
+        return _RemoteFaceDetector(self) if self.capabilities.get("faces") else None
+
+
+class _RemoteNer:
+    """transformers ner pipeline 과 같은 호출 형태: ner(text) -> 엔티티 목록"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __call__(self, text):
+        return self._client.call("ner", text)
+
+    def many(self, texts):
+        """여러 청크를 한 번에 보내 데몬 배처에서 다른 워커 요청과 함께 묶이게 함"""
+        return self._client.call("ner_many", list(texts))
+
+
+class _RemoteReader:
+    """easyocr.Reader 의 readtext / readtext_batched 와 같은 호출 형태"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def readtext(self, image, **kwargs):
+        return self._client.call("ocr", [image], kwargs)[0]
+
+    def readtext_batched(self, images, **kwargs):
+        return self._client.call("ocr", list(images), kwargs)
+
+
+class _RemoteFaceDetector:
+    """mtcnn.MTCNN.detect_faces 와 같은 호출 형태"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def detect_faces(self, image):
+        return self._client.call("faces", image)
+
+
+# ==========================
+# 데몬 (모델 소유 프로세스)
+# ==========================
+
+def _ocr_batch(reader):
+    """같은 크기 이미지와 같은 옵션의 요청끼리 합쳐 readtext_batched 한 번으로 처리"""
+    def run(requests):
+        results = [None] * len(requests)
+        groups = {}
+        for i, (images, kwargs) in enumerate(requests):
+            shapes = {getattr(img, "shape", None) for img in images}
+            key = (shapes.pop() if len(shapes) == 1 else ("mixed", i), tuple(sorted(kwargs.items())))
+            groups.setdefault(key, []).append(i)
+        for (_, kw), idxs in groups.items():
+            flat = [img for i in idxs for img in requests[i][0]]
+            kwargs = dict(kw)
+            try:
+                out = [reader.readtext(flat[0], **kwargs)] if len(flat) == 1 else reader.readtext_batched(flat, **kwargs)
+            except Exception as e:
+                out = e
+            pos = 0
+            for i in idxs:
+                n = len(requests[i][0])
+                results[i] = out if isinstance(out, Exception) else out[pos:pos + n]
+                pos += n
+        return results
+    return run
+
+
+def _faces_batch(detector):
+    def run(requests):
+        results = []
+        for (image,) in requests:
+            try:
+                results.append(detector.detect_faces(image))
+            except Exception as e:
+                results.append(e)
+        return results
+    return run
+
+
+class InferenceDaemon:
+    """연결마다 스레드 하나로 요청을 받아 op 별 BatchWorker 에 넘기는 로컬 소켓 서버"""
+
+    def __init__(self, address: str, workers: dict):
+        self.address = address
+        self.workers = workers
+        self.capabilities = {op: True for op in workers}
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if op == "hello":
+                        conn.send(("ok", self.capabilities))
+                        continue
+                    worker = self.workers.get("ner" if op == "ner_many" else op)
+                    if worker is None:
+                        conn.send(("err", f"지원하지 않는 요청: {op}"))
+                        continue
+                    if op == "ner":
+                        result = worker.submit(args[0]).result()
+                    elif op == "ner_many":
+                        # 한 묶음으로 넣어 다른 연결의 요청과 같은 배치로 묶이되, 워커의 청크들은 흩어지지 않게 함
+                        result = [f.result() for f in worker.submit_many(args[0])]
+                    else:
+                        result = worker.submit(args).result()
+                    if isinstance(result, Exception):
+                        raise result
+                    conn.send(("ok", result))
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    try:
+                        conn.send(("err", str(e)))
+                    except (EOFError, OSError):
+                        return
+
+    def serve_forever(self):
+        family = _family(self.address)
+        authkey = _authkey(create=True)
+        if family == "AF_UNIX":
+            _remove_stale_socket(self.address)
+            # 소켓 파일이 만들어지는 순간부터 0600 (생성 후 chmod 하기 전의 틈이 없도록)
+            old_umask = os.umask(0o177)
+            try:
+                listener = Listener(self.address, family=family, authkey=authkey)
+            finally:
+                os.umask(old_umask)
+        else:
+            listener = Listener(self.address, family=family, authkey=authkey)
+        print(f"[INFO] 추론 데몬 대기 중: {self.address} (제공: {', '.join(self.workers)})")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logging.warning(f"추론 데몬 연결 수락 실패: {e}")
+                    continue
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+
+def main():
+    address = os.getenv("PII_INFERENCE_ADDRESS") or default_address()
+    # 이 프로세스가 모델을 직접 로드하도록 표시한 뒤 Logic_Final import
+    os.environ["PII_INFERENCE_ROLE"] = "daemon"
+    os.environ["PII_INFERENCE_ADDRESS"] = address
+    import Logic_Final as logic
+    # 요청을 받기 전에 스레드/배치 크기 보정 (PII_CALIBRATE)
+    logic.calibrate_from_env()
+
+    # NER 은 Logic_Final 의 마이크로 배처(PII_NER_* 설정)를 그대로 사용
+    workers = {"ner": logic.ner_batcher}
+    if logic.reader is not None:
+        workers["ocr"] = BatchWorker(_ocr_batch(logic.reader), max_wait=INFERENCE_MAX_WAIT_MS / 1000.0,
+                                     max_batch=INFERENCE_MAX_BATCH, name="ocr")
+    if logic.detector is not None:
+        workers["faces"] = BatchWorker(_faces_batch(logic.detector), max_wait=INFERENCE_MAX_WAIT_MS / 1000.0,
+                                       max_batch=INFERENCE_MAX_BATCH, name="faces")
+    InferenceDaemon(address, workers).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
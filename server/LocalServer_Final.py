@@ -4,7 +4,7 @@
 #       이제 NER 모델의 신뢰도 점수(score)가 포함된 탐지 결과도 정상적으로 처리됩니다.
 # =============================
 import uvicorn
-import base64
+import asyncio
 import secrets
 import hmac
 import hashlib
@@ -24,11 +24,28 @@ from fastapi.middleware.cors import CORSMiddleware
 # 동일 디렉토리의 Logic_Final 에서 import
 from Logic_Final import (
     handle_input_raw,
-    detect_by_ner,
-    detect_by_regex,
-    detect_quasi_identifiers,
+    detection_pipeline,
+    block_scanner,
+    calibration_stats,
+    calibrate_from_env,
     analyze_combination_risk,
     mask_pii_in_filename,
+    resolve_file_format,
+    ScanBudget,
+    FileBuffer,
+    scheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BULK,
+    IncrementalTextScanner,
+    reload_rules,
+    rule_stats,
+    Detection,
+    detection_json_default,
+    summarize_detections,
+    summarize_combination_risk,
+    log_detections,
+    inflight,
+    content_key,
 )
 
 # 로거 및 포맷터 기본 설정(정의되지 않은 fmt/logger 참조 문제 해결)
@@ -60,6 +77,9 @@ class NumpyEncoder(json.JSONEncoder):
             return float(obj)
         if isinstance(obj, np.ndarray):
             return obj.tolist()
+        # 탐지 항목(Detection)은 JSON 으로 나갈 때만 dict 로 변환
+        if isinstance(obj, Detection):
+            return obj.to_dict()
         return super(NumpyEncoder, self).default(obj)
 
 # 보안: Extension ID 화이트리스트
@@ -81,6 +101,12 @@ HARD_LIMIT = 100 * 1024 * 1024  # 100MB
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def run_calibration():
+    # 스레드/배치 크기 자동 보정 (PII_CALIBRATE). 저장된 결과가 있으면 바로 적용되고, 없으면 요청을 받기 전에 측정
+    calibrate_from_env()
+
 # 최근 로그 저장 (메모리)
 detection_history = deque(maxlen=1000)
 
@@ -100,7 +126,8 @@ def send_to_dashboard(payload: dict, timeout: int = 5) -> dict:
                 headers['X-Auth-Token'] = token
                 headers['X-Timestamp'] = ts
 
-            resp = requests.post(DASHBOARD_URL, json=payload, headers=headers, timeout=timeout)
+            body_json = json.dumps(payload, cls=NumpyEncoder, ensure_ascii=False).encode('utf-8')
+            resp = requests.post(DASHBOARD_URL, data=body_json, headers=headers, timeout=timeout)
             # Try to parse JSON body if possible
             body = None
             try:
@@ -145,23 +172,33 @@ def send_to_dashboard(payload: dict, timeout: int = 5) -> dict:
             return {'status': 'error', 'error': str(e)}
 
 
-def _forward_payload_for_items(pii_items, file_type_name=None, filename=None, network_info=None, url=None, status='success', llm_type_name=None, validation_statuses=None, tab=None, reason=None, comb=None):
+def _forward_payload_for_items(pii_items, file_type_name=None, filename=None, network_info=None, url=None, status='success', llm_type_name=None, validation_statuses=None, tab=None, reason=None, comb=None, detected_file_type=None, truncated=None, summary=None):
     """Build a payload compatible with the dashboard Flask API (PiiLog schema).
 
     - filters out items of type 'LC' (address-only)
     - returns None if nothing should be forwarded
+    - when `summary` is given (pii_items is only a sample), counts come from summary['counts']
     """
     # 필터: 주소(LC)만 있는 경우는 전송하지 않음
     forwarded = [i for i in pii_items if i.get('type') != 'LC']
     if not forwarded:
         return None
 
-    types = [i.get('type') for i in forwarded if i.get('type')]
-    # Normalize types to strings and preserve order while making unique
-    # normalize to lowercase to match backend canonical names
-    norm_types = [str(t).lower() for t in types]
-    unique_types = list(dict.fromkeys(norm_types))
-    counts = {str(k).lower(): int(v) for k, v in Counter(norm_types).items()}
+    if summary:
+        # 요약 모드: 표본이 아니라 전체 개수로 집계
+        norm_counts = Counter()
+        for t, c in summary['counts'].items():
+            if t and t != 'LC':
+                norm_counts[str(t).lower()] += int(c)
+        unique_types = list(norm_counts)
+        counts = dict(norm_counts)
+    else:
+        types = [i.get('type') for i in forwarded if i.get('type')]
+        # Normalize types to strings and preserve order while making unique
+        # normalize to lowercase to match backend canonical names
+        norm_types = [str(t).lower() for t in types]
+        unique_types = list(dict.fromkeys(norm_types))
+        counts = {str(k).lower(): int(v) for k, v in Counter(norm_types).items()}
 
     ip = None
     user_agent = None
@@ -196,6 +233,18 @@ def _forward_payload_for_items(pii_items, file_type_name=None, filename=None, ne
         'pii_types': unique_types,
         'pii_type_counts': counts,
     }
+    # 확장자와 실제 내용 형식이 다른 경우(위장/오기 파일) 판별된 형식을 함께 전달
+    if detected_file_type and detected_file_type != file_type_name:
+        payload['detected_file_type'] = detected_file_type
+    # 처리 예산 초과로 일부만 검사한 경우 표시 (대시보드는 reason 으로 확인 가능)
+    if truncated:
+        payload['truncated'] = truncated
+        if not payload['reason']:
+            stages = ', '.join(f"{k}:{v}" for k, v in truncated.get('stages', {}).items())
+            payload['reason'] = f"부분 결과: 처리 예산 초과 ({stages})"
+    # 대량 탐지로 표본만 보관한 경우 요약 정보 (전체 개수, 유형별 개수)
+    if summary:
+        payload['summary'] = summary
     # Include combination risk metadata separately (do not treat as a detection item)
     if comb:
         try:
@@ -203,7 +252,7 @@ def _forward_payload_for_items(pii_items, file_type_name=None, filename=None, ne
         except Exception:
             payload['combination_risk'] = str(comb)
     # Log as warning to increase chance of visibility in case file handler was not created
-    logging.warning(f"[PAYLOAD] {json.dumps(payload, default=str, ensure_ascii=False)}")
+    logging.warning(f"[PAYLOAD] {json.dumps(payload, default=detection_json_default, ensure_ascii=False)}")
     return payload
 
 
@@ -342,6 +391,46 @@ def build_merged_metadata(data: dict, request: Request):
 
     return merged_net, llm_type, tab
 
+async def run_cpu(fn, *args, priority=PRIORITY_BULK):
+    """CPU 작업을 전역 스케줄러에서 실행하고 이벤트 루프를 막지 않고 결과를 기다립니다."""
+    return await asyncio.wrap_future(scheduler.submit(fn, *args, priority=priority))
+
+
+async def run_cpu_shared(key, fn, *args, priority=PRIORITY_BULK, owns=()):
+    """같은 key 의 작업이 이미 실행 중이면 새로 실행하지 않고 그 결과를 함께 기다립니다 (single-flight).
+    이 요청이 취소돼도 공유 작업은 계속되며, owns 의 버퍼는 공유 작업이 끝날 때까지 유지됩니다."""
+    return await asyncio.wrap_future(inflight.submit(key, fn, *args, priority=priority, owns=owns))
+
+
+def _scan_file(file_bytes, extension, file_name, file_format, budget):
+    """handle_input_raw + 예산 보고. 병합된 요청도 같은 truncated 정보를 받도록 함께 반환"""
+    result = handle_input_raw(file_bytes, extension, file_name, file_format, budget)
+    return result, budget.report()
+
+
+# 탭/세션별 직전 스캔 상태. 같은 탭에서 문장만 덧붙여 다시 전송되면 바뀐 구간만 재검사
+text_sessions = IncrementalTextScanner(detection_pipeline.run)
+
+
+def _scan_text_event(session_key: str, text: str) -> tuple:
+    """텍스트 이벤트 공통 처리: 탐지 파이프라인(증분) → 조합위험 → 전달용 필터. (detected, comb) 반환"""
+    all_detected = text_sessions.scan(session_key, text)
+    comb = analyze_combination_risk(all_detected, text)
+    # comb (combination risk) is kept as separate metadata and NOT appended
+    # into the detection items list. Keep all_detected for internal audit,
+    # but filter out noisy types for forwarding when no comb is present.
+    if comb:
+        return list(all_detected), comb
+    return [i for i in all_detected if i.get('type') not in ['ORG','OG','student_id','birth','LC']], comb
+
+
+def _text_session_key(tab: dict, url: str, merged_net: dict) -> str:
+    """build_merged_metadata 가 만든 tab 메타데이터(+URL, 클라이언트 IP)로 세션 키 생성."""
+    if not url and not tab:
+        return ""
+    tab_key = json.dumps(tab or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{(merged_net or {}).get('ip') or ''}|{url or ''}|{tab_key}"
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -421,6 +510,8 @@ async def dashboard():
                   return `<div class="log-entry"><div class="log-time">${new Date(d.timestamp).toLocaleString('ko-KR')} - ${d.items.length}개 탐지</div>`+
                     d.items.map(it=>`<div style="margin:4px 0"><span class="type">${escapeHtml(it.type)}</span><strong>${escapeHtml(it.value||'')}</strong>${it.status? (it.status==='valid'?'<span class="status-valid">(valid)</span>':`<span class="status-invalid">(${escapeHtml(it.status)})</span>`):''}</div>`).join('')+
                     `${d.file_name?`<div class="netinfo">파일명: ${escapeHtml(d.file_name)}</div>`:''}`+
+                    `${d.truncated?`<div class="netinfo">⚠ 부분 결과 (처리 예산 초과)</div>`:''}`+
+                    `${d.summary?`<div class="netinfo">전체 ${d.summary.total}건 중 유형별 표본만 표시: ${escapeHtml(Object.entries(d.summary.counts).map(([k,v])=>`${k} ${v}`).join(', '))}</div>`:''}`+
                     `${d.url?`<div class="netinfo">출처: ${d.url}</div>`:''}`+
                     `${d.network_info&&d.network_info.ip?`<div class="netinfo">IPs: ${d.network_info.ip}</div>`:''}`+
                     `${d.network_info&&d.network_info.hostname?`<div class="netinfo">컴퓨터: ${d.network_info.hostname}</div>`:''}`+
@@ -464,7 +555,8 @@ async def handle_file_collect(request: Request):
     try:
         data = await request.json()
         file_name = data.get("name", "unknown")
-        file_b64 = data.get("data_b64", "")
+        # 요청 dict 에서 꺼내 두어 디코딩 후 base64 문자열이 바로 해제되도록 함
+        file_b64 = data.pop("data_b64", "")
         network_info = data.get("network_info", {})
         origin_url = data.get("origin_url", "")
         processed_at = data.get("processed_at", "")
@@ -488,32 +580,47 @@ async def handle_file_collect(request: Request):
         extension = file_name.split('.')[-1].lower() if '.' in file_name else ""
         logging.info(f"파일 수신: '{file_name}' ({est/1024:.1f}KB), 출처: {origin_url}, 추출된 확장자: '{extension}'")
 
-        masked_name, pii_type = mask_pii_in_filename(file_name)
+        masked_name, pii_type = await run_cpu(mask_pii_in_filename, file_name)
         display_name = masked_name if masked_name != file_name else file_name
         if pii_type:
             logging.info(f"✓ 파일명 탐지: {pii_type} in '{display_name}'")
 
-            file_bytes = base64.b64decode(file_b64)
-            detected, masked_filename, backend_status, image_detections, comb = handle_input_raw(file_bytes, extension, file_name)
+        # 본문은 파일명 탐지 여부와 관계없이 항상 검사 (파일명 항목은 handle_input_raw 결과에 함께 포함됨)
+        file_bytes = await run_cpu(FileBuffer.from_base64, file_b64)
+        del file_b64
+        try:
+            file_format = await run_cpu(resolve_file_format, file_bytes, extension)
+            # 같은 파일이 동시에 두 번 들어오면(더블 클릭 등) 한 번만 검사하고 결과 공유
+            scan_key = await run_cpu(content_key, file_bytes, "file", extension, file_name)
+            (detected, masked_filename, backend_status, image_detections, comb), truncated = await run_cpu_shared(
+                scan_key, _scan_file, file_bytes, extension, file_name, file_format, ScanBudget(), owns=(file_bytes,))
+        finally:
+            file_bytes.close()
 
         if detected:
             # build merged metadata consistently
             merged_net, llm_type, tab = build_merged_metadata(data, request)
+            # 항목이 많으면 유형별 개수 + 표본만 저장/전송
+            stored, summary = summarize_detections(detected)
+            if summary:
+                comb = summarize_combination_risk(comb)
 
             detection_history.append({
                 "timestamp": processed_at,
                 "type": "group",
-                "items": detected,
+                "items": stored,
+                "summary": summary,
                 "url": origin_url,
                 "network_info": merged_net,
                 "file_name": display_name,
                 "original_file_name": file_name if display_name!=file_name else None,
+                "declared_type": file_format["declared"],
+                "detected_type": file_format["detected"],
+                "truncated": truncated,
                 "tab": tab,
                 "combination_risk": comb
             })
-            for it in detected:
-                st = f" [{it.get('status')}]" if 'status' in it else ""
-                logging.info(f"✓ 파일 탐지: {it.get('type')} = {it.get('value')}{st}")
+            log_detections(stored, "파일 탐지", summary)
 
             # Determine status and optional reason when parse failed
             forward_status = 'success'
@@ -529,12 +636,12 @@ async def handle_file_collect(request: Request):
 
             # Forward summary to dashboard (skip LC addresses)
             # Forward masked/display name instead of original filename to avoid leaking PII in dashboard
-            payload = _forward_payload_for_items(detected, file_type_name=extension or 'unknown', filename=display_name, network_info=merged_net, url=origin_url or None, llm_type_name=llm_type, tab=tab, status=forward_status, reason=forward_reason, comb=comb)
+            payload = _forward_payload_for_items(stored, file_type_name=extension or 'unknown', filename=display_name, network_info=merged_net, url=origin_url or None, llm_type_name=llm_type, tab=tab, status=forward_status, reason=forward_reason, comb=comb, detected_file_type=file_format["detected"], truncated=truncated, summary=summary)
             if payload:
                 res = send_to_dashboard(payload)
                 logging.info(f"대시보드 전송 결과: {res}")
 
-        return JSONResponse(content={"result":{"status":"처리 완료"}}, status_code=200)
+        return JSONResponse(content={"result":{"status":"처리 완료", "truncated": bool(truncated)}}, status_code=200)
     except Exception as e:
         logging.error(f"파일 처리 실패: {e}", exc_info=True)
         return JSONResponse(content={"status":"에러","message":str(e)}, status_code=500)
@@ -559,40 +666,32 @@ async def handle_text_event(request: Request):
         if not text.strip():
             return JSONResponse(content={"result":{"status":"텍스트 없음"}}, status_code=200)
 
-        ner_results   = detect_by_ner(text)
-        regex_results = detect_by_regex(text)
-        quasi_results = detect_quasi_identifiers(text)
-        all_detected = regex_results + ner_results + quasi_results
-        comb = analyze_combination_risk(all_detected, text)
-        # comb (combination risk) is kept as separate metadata and NOT appended
-        # into the detection items list. Keep all_detected for internal audit,
-        # but filter out noisy types for forwarding when no comb is present.
-        if comb:
-            detected = list(all_detected)
-        else:
-            detected = [i for i in all_detected if i.get('type') not in ['ORG','OG','student_id','birth','LC']]
+        merged_net, llm_type, tab = build_merged_metadata(data, request)
+        session_key = _text_session_key(tab, url, merged_net)
+        detected, comb = await run_cpu_shared(content_key(text, "text", session_key), _scan_text_event, session_key, text, priority=PRIORITY_INTERACTIVE)
 
         if detected:
             # Normalize & filter detections for storage/forwarding
             cleaned = _normalize_and_filter_detections(detected)
-            merged_net, llm_type, tab = build_merged_metadata(data, request)
+            cleaned, summary = summarize_detections(cleaned)
+            if summary:
+                comb = summarize_combination_risk(comb)
 
             detection_history.append({
                 "timestamp": processed_at,
                 "type": "group",
                 "items": cleaned,
+                "summary": summary,
                 "url": url,
                 "network_info": merged_net,
                 "tab": tab,
                 "combination_risk": comb
             })
-            for it in cleaned:
-                st = f" [{it.get('status')}]" if 'status' in it else ""
-                logging.info(f"✓ 탐지: {it.get('type')} = {it.get('value')}{st}")
+            log_detections(cleaned, "탐지", summary)
 
             # Forward text summary to dashboard (skip LC addresses)
             try:
-                payload = _forward_payload_for_items(cleaned, file_type_name='text', filename=None, network_info=merged_net, url=url or None, llm_type_name=llm_type, tab=tab, comb=comb)
+                payload = _forward_payload_for_items(cleaned, file_type_name='text', filename=None, network_info=merged_net, url=url or None, llm_type_name=llm_type, tab=tab, comb=comb, summary=summary)
                 if payload:
                     res = send_to_dashboard(payload)
                     logging.info(f"대시보드 전송 결과(텍스트): {res}")
@@ -623,39 +722,35 @@ async def handle_combined(request: Request):
         logging.info(f"텍스트: {len(text)}글자, 파일: {len(files_data)}개")
 
         if text.strip():
-            ner_results   = detect_by_ner(text)
-            regex_results = detect_by_regex(text)
-            quasi_results = detect_quasi_identifiers(text)
-            all_detected = regex_results + ner_results + quasi_results
-            comb = analyze_combination_risk(all_detected, text)
-            # Keep comb as metadata; do not append as detection item
-            if comb:
-                detected_text = list(all_detected)
-            else:
-                detected_text = [i for i in all_detected if i.get('type') not in ['ORG','OG','student_id','birth','LC']]
+            merged_net, llm_type, tab = build_merged_metadata(data, request)
+            session_key = _text_session_key(tab, url, merged_net)
+            detected_text, comb = await run_cpu_shared(content_key(text, "text", session_key), _scan_text_event, session_key, text, priority=PRIORITY_INTERACTIVE)
             if detected_text:
                 # Normalize & filter for storage/forwarding
                 cleaned_text = _normalize_and_filter_detections(detected_text)
-                merged_net, llm_type, tab = build_merged_metadata(data, request)
+                cleaned_text, summary = summarize_detections(cleaned_text)
+                if summary:
+                    comb = summarize_combination_risk(comb)
 
                 detection_history.append({
                     "timestamp": processed_at,
                     "type": "group",
                     "items": cleaned_text,
+                    "summary": summary,
                     "url": url,
                     "network_info": merged_net,
                     "tab": tab,
                     "combination_risk": comb
                 })
                 # Forward text summary
-                payload = _forward_payload_for_items(cleaned_text, file_type_name='text', filename=None, network_info=merged_net, url=url or None, llm_type_name=llm_type, tab=tab, comb=comb)
+                payload = _forward_payload_for_items(cleaned_text, file_type_name='text', filename=None, network_info=merged_net, url=url or None, llm_type_name=llm_type, tab=tab, comb=comb, summary=summary)
                 if payload:
                     res = send_to_dashboard(payload)
                     logging.info(f"대시보드 전송 결과(텍스트): {res}")
 
         for f in files_data:
             fname = f.get("name", "unknown")
-            b64 = f.get("data_b64", "")
+            b64 = f.pop("data_b64", "")
             if not b64:
                 continue
 
@@ -667,35 +762,47 @@ async def handle_combined(request: Request):
             ext = fname.split('.')[-1].lower() if '.' in fname else ""
             logging.info(f"통합 이벤트 - 파일 처리: '{fname}', 추출된 확장자: '{ext}'")
             
-            masked_name, pii_type = mask_pii_in_filename(fname)
+            masked_name, pii_type = await run_cpu(mask_pii_in_filename, fname)
             display = masked_name if masked_name != fname else fname
             if pii_type:
                 logging.info(f"✓ 파일명 탐지: {pii_type} in '{display}'")
-            fbytes = base64.b64decode(b64)
-            detected_file, _, _, _, comb_file = handle_input_raw(fbytes, ext, fname)
+            fbytes = await run_cpu(FileBuffer.from_base64, b64)
+            del b64
+            try:
+                file_format = await run_cpu(resolve_file_format, fbytes, ext)
+                scan_key = await run_cpu(content_key, fbytes, "file", ext, fname)
+                (detected_file, _, _, _, comb_file), truncated = await run_cpu_shared(
+                    scan_key, _scan_file, fbytes, ext, fname, file_format, ScanBudget(), owns=(fbytes,))
+            finally:
+                fbytes.close()
             if detected_file:
                 # Normalize & filter file detections
                 cleaned_file = _normalize_and_filter_detections(detected_file)
+                cleaned_file, summary_file = summarize_detections(cleaned_file)
+                if summary_file:
+                    comb_file = summarize_combination_risk(comb_file)
                 merged_net_file, llm_type_file, tab = build_merged_metadata(data, request)
 
                 detection_history.append({
                     "timestamp": processed_at,
                     "type": "group",
                     "items": cleaned_file,
+                    "summary": summary_file,
                     "url": url,
                     "network_info": merged_net_file,
                     "file_name": display,
                     "original_file_name": fname if display!=fname else None,
+                    "declared_type": file_format["declared"],
+                    "detected_type": file_format["detected"],
+                    "truncated": truncated,
                     "tab": tab,
                     "combination_risk": comb_file
                 })
                 # 파일 탐지 결과 로그 출력
-                for it in cleaned_file:
-                    st = f" [{it.get('status')}]" if 'status' in it else ""
-                    logging.info(f"✓ 탐지: {it.get('type')} = {it.get('value')}{st}")
+                log_detections(cleaned_file, "탐지", summary_file)
 
                 # Forward masked/display name instead of original filename to avoid leaking PII in dashboard
-                payload = _forward_payload_for_items(cleaned_file, file_type_name=ext or 'unknown', filename=display, network_info=merged_net_file, url=url or None, llm_type_name=llm_type_file, tab=tab, comb=comb_file)
+                payload = _forward_payload_for_items(cleaned_file, file_type_name=ext or 'unknown', filename=display, network_info=merged_net_file, url=url or None, llm_type_name=llm_type_file, tab=tab, comb=comb_file, detected_file_type=file_format["detected"], truncated=truncated, summary=summary_file)
                 if payload:
                     res = send_to_dashboard(payload)
                     logging.info(f"대시보드 전송 결과(파일): {res}")
@@ -717,6 +824,36 @@ async def get_detections():
     return HTMLResponse(content=json_str, media_type="application/json")
 
 
-if __name__ == "__main__":
+@app.get("/api/rules")
+async def get_rules(request: Request):
+    """정규식 탐지 규칙 세트 버전과 규칙별 누적 후보/탐지 수, 소요 시간, 블록 캐시 적중률"""
+    if not verify_auth(request):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return JSONResponse(content={"status": "success", **rule_stats(), "detectors": detection_pipeline.stats(),
+                                 "block_cache": block_scanner.stats()}, status_code=200)
+
+
+@app.get("/api/calibration")
+async def get_calibration(request: Request):
+    """시작 시 자동 보정으로 선택된 torch 스레드 / 워커 수 / NER·OCR 배치 크기와 측정값"""
+    if not verify_auth(request):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return JSONResponse(content={"status": "success", **calibration_stats()}, status_code=200)
+
+
+@app.post("/api/rules/reload")
+async def post_rules_reload(request: Request):
+    """규칙 파일을 즉시 다시 컴파일 (파일 변경은 PII_RULES_CHECK_INTERVAL 마다 자동 반영됨)"""
+    if not verify_auth(request):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    rule_set = reload_rules(force=True)
+    return JSONResponse(content={"status": "success", "version": rule_set.version, "rules": len(rule_set.rules)}, status_code=200)
 
-    uvicorn.run("LocalServer_Final:app", host="127.0.0.1", port=9000, reload=False)
+
+if __name__ == "__main__":
+    # 워커를 여러 개 쓸 때는 InferenceDaemon_Final.py 를 먼저 띄우고 PII_INFERENCE_ADDRESS 를 설정해야
+    # 워커마다 모델이 중복 로드되지 않습니다.
+    server_workers = max(1, int(os.getenv("PII_SERVER_WORKERS", "1")))
+    if server_workers > 1 and not os.getenv("PII_INFERENCE_ADDRESS"):
+        logging.warning("[WARN] PII_SERVER_WORKERS > 1 이지만 PII_INFERENCE_ADDRESS 가 없어 워커마다 모델을 로드합니다.")
+    uvicorn.run("LocalServer_Final:app", host="127.0.0.1", port=9000, reload=False, workers=server_workers)
@@ -8,41 +8,73 @@
 # =============================
 
 import io
+import sys
 import re
 import os
+import mmap
+import atexit
+import base64
+import hashlib
 import logging
+import threading
 import zipfile
+import zlib
+import json
 import tempfile
-import datetime
+import time
+import bisect
+import random
+import heapq
+import itertools
+import contextvars
+import contextlib
+import types
 import numpy as np
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree as ET
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from Batching_Final import BatchWorker
+
+# --- CPU 스레드 예산 ---
+# torch/OpenMP 스레드 수는 torch import 이전에 환경변수로 고정해야 적용되므로 가장 먼저 계산합니다.
+# 전체 스레드 수(스케줄러 워커 × torch intra-op 스레드)가 가용 코어 수를 넘지 않도록 맞춥니다.
+try:
+    CPU_CORES = len(os.sched_getaffinity(0))
+except AttributeError:
+    CPU_CORES = os.cpu_count() or 4
+CPU_WORKERS = max(1, int(os.getenv("PII_CPU_WORKERS", str(max(2, CPU_CORES // 2)))))
+TORCH_THREADS = max(1, int(os.getenv("PII_TORCH_THREADS", str(max(1, CPU_CORES // CPU_WORKERS)))))
+for _env in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_env, str(TORCH_THREADS))
+
+# --- 추론 데몬 (다중 워커 배포) ---
+# PII_INFERENCE_ADDRESS 가 설정되면 모델을 직접 로드하지 않고 InferenceDaemon_Final.py 데몬에 요청하는
+# 얇은 클라이언트로 동작합니다 (데몬 프로세스 자신은 PII_INFERENCE_ROLE=daemon 으로 모델을 로드).
+INFERENCE_ADDRESS = os.getenv("PII_INFERENCE_ADDRESS", "")
+INFERENCE_CLIENT = bool(INFERENCE_ADDRESS) and os.getenv("PII_INFERENCE_ROLE", "") != "daemon"
+# PII_LOAD_MODELS=false 이면 모델(NER/OCR/얼굴)을 로드하지 않고 정규식/주소/검증 로직만 사용 (테스트, 규칙 점검용)
+LOAD_MODELS = os.getenv("PII_LOAD_MODELS", "true").lower() != "false"
+
+# --- 로컬 모델 저장소 / 오프라인 모드 ---
+# PII_OFFLINE=true 이면 허브 접속을 막는 환경변수를 transformers import 이전에 설정합니다.
+import ModelStore_Final as model_store
+if model_store.OFFLINE and not INFERENCE_CLIENT:
+    model_store.enable_offline()
 
 # --- 필수 라이브러리 ---
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+if LOAD_MODELS and not INFERENCE_CLIENT:
+    from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
 
 # --- 선택 라이브러리 (설치되지 않아도 기본 기능 동작) ---
 try:
     import fitz  # PyMuPDF
 except ImportError:
     fitz = None
-try:
-    import easyocr
-except ImportError:
-    easyocr = None
 try:
     from PIL import Image, ImageSequence
 except ImportError:
     Image = None
     ImageSequence = None
-try:
-    from docx import Document
-except ImportError:
-    Document = None
-try:
-    from mtcnn import MTCNN
-except ImportError:
-    MTCNN = None
 try:
     import olefile
 except ImportError:
@@ -51,10 +83,6 @@ try:
     from openpyxl import load_workbook
 except ImportError:
     load_workbook = None
-try:
-    from pptx import Presentation
-except ImportError:
-    Presentation = None
 try:
     import win32com.client
 except ImportError:
@@ -64,6 +92,22 @@ try:
 except ImportError:
     xlrd = None
 
+# --- 모델 라이브러리 (추론 데몬 클라이언트는 import 하지 않아 메모리를 쓰지 않음) ---
+easyocr = MTCNN = torch = None
+if LOAD_MODELS and not INFERENCE_CLIENT:
+    try:
+        import easyocr
+    except ImportError:
+        easyocr = None
+    try:
+        from mtcnn import MTCNN
+    except ImportError:
+        MTCNN = None
+    try:
+        import torch
+    except ImportError:
+        torch = None
+
 # 로깅
 DEBUG_MODE = os.getenv("PII_DEBUG", "false").lower() == "true"
 logging.basicConfig(
@@ -74,105 +118,821 @@ logging.basicConfig(
 # ==========================
 # NER 모델 로딩
 # ==========================
-HF_TOKEN = os.getenv("HF_TOKEN", None)
-NER_MODEL_NAME = "soddokayo/klue-roberta-base-ner"
-print(f"[INFO] NER 모델 로딩 중: {NER_MODEL_NAME}")
-if HF_TOKEN:
-    ner_tokenizer = AutoTokenizer.from_pretrained(NER_MODEL_NAME, token=HF_TOKEN)
-    ner_model = AutoModelForTokenClassification.from_pretrained(NER_MODEL_NAME, token=HF_TOKEN)
-    print("[INFO] [OK] 허깅페이스 토큰 인증 완료")
+ner_pipeline = reader = detector = local_models = None
+if not LOAD_MODELS:
+    print("[INFO] 모델 로딩 생략 (PII_LOAD_MODELS=false): NER/OCR/얼굴 탐지 비활성화")
+elif INFERENCE_CLIENT:
+    from InferenceDaemon_Final import InferenceClient
+    print(f"[INFO] 추론 데몬 클라이언트 모드: {INFERENCE_ADDRESS} (모델은 데몬이 로드)")
+    _inference_client = InferenceClient(INFERENCE_ADDRESS)
+    ner_pipeline = _inference_client.ner_pipeline()
+    reader = _inference_client.ocr_reader()
+    detector = _inference_client.face_detector()
+    print(f"[INFO] [OK] 추론 데몬 연결 완료 (제공: {', '.join(_inference_client.capabilities)})")
 else:
-    print("[WARN] HF_TOKEN 환경 변수 없음 - 공개 모델로 시도")
-    ner_tokenizer = AutoTokenizer.from_pretrained(NER_MODEL_NAME)
-    ner_model = AutoModelForTokenClassification.from_pretrained(NER_MODEL_NAME)
+    HF_TOKEN = os.getenv("HF_TOKEN", None)
+    NER_MODEL_NAME = model_store.NER_MODEL_NAME
+    local_models = model_store.ModelStore.open()
+    if local_models is None and model_store.OFFLINE:
+        raise ValueError(f"[ERROR] 오프라인 모드(PII_OFFLINE=true)에는 로컬 모델 저장소가 필요합니다: {model_store.MODEL_DIR} "
+                         "(인터넷 되는 PC에서 python ModelStore_Final.py --version <버전> 으로 생성)")
+    ner_local = local_models.path("ner") if local_models else None
+    if ner_local is None and model_store.OFFLINE:
+        raise ValueError(f"[ERROR] 로컬 모델 저장소({local_models.version})에 NER 모델이 없습니다.")
+
+    if ner_local:
+        # safetensors 는 mmap 으로 열려 가중치를 통째로 읽어 복사하지 않으므로 콜드 스타트가 빠름
+        print(f"[INFO] NER 모델 로딩 중: 로컬 저장소 {local_models.version} ({ner_local})")
+        ner_tokenizer = AutoTokenizer.from_pretrained(ner_local, local_files_only=True)
+        ner_model = AutoModelForTokenClassification.from_pretrained(ner_local, local_files_only=True, use_safetensors=True)
+    elif HF_TOKEN:
+        print(f"[INFO] NER 모델 로딩 중: {NER_MODEL_NAME}")
+        ner_tokenizer = AutoTokenizer.from_pretrained(NER_MODEL_NAME, token=HF_TOKEN)
+        ner_model = AutoModelForTokenClassification.from_pretrained(NER_MODEL_NAME, token=HF_TOKEN)
+        print("[INFO] [OK] 허깅페이스 토큰 인증 완료")
+    else:
+        print(f"[INFO] NER 모델 로딩 중: {NER_MODEL_NAME}")
+        print("[WARN] HF_TOKEN 환경 변수 없음 - 공개 모델로 시도")
+        ner_tokenizer = AutoTokenizer.from_pretrained(NER_MODEL_NAME)
+        ner_model = AutoModelForTokenClassification.from_pretrained(NER_MODEL_NAME)
 
-ner_pipeline = pipeline("ner", model=ner_model, tokenizer=ner_tokenizer, grouped_entities=True)
-print("[INFO] [OK] NER 모델 로딩 완료")
+    ner_pipeline = pipeline("ner", model=ner_model, tokenizer=ner_tokenizer, grouped_entities=True)
+    print("[INFO] [OK] NER 모델 로딩 완료")
 
-# EasyOCR 초기화
-reader = None
-if easyocr and Image is not None:
-    try:
-        reader = easyocr.Reader(['ko', 'en'], gpu=False)
-        print("[INFO] EasyOCR 초기화 완료")
-    except Exception as e:
-        print(f"[WARN] EasyOCR 초기화 실패: {e}")
-else:
-    print("[WARN] EasyOCR 또는 PIL 미설치")
+    # EasyOCR 초기화
+    reader = None
+    if easyocr and Image is not None:
+        try:
+            ocr_local = local_models.path("easyocr") if local_models else None
+            if ocr_local:
+                reader = easyocr.Reader(model_store.OCR_LANGS, gpu=False, model_storage_directory=ocr_local,
+                                        user_network_directory=ocr_local, download_enabled=False)
+            else:
+                reader = easyocr.Reader(model_store.OCR_LANGS, gpu=False, download_enabled=not model_store.OFFLINE)
+            print("[INFO] EasyOCR 초기화 완료")
+        except Exception as e:
+            print(f"[WARN] EasyOCR 초기화 실패: {e}")
+    else:
+        print("[WARN] EasyOCR 또는 PIL 미설치")
+
+    # MTCNN 초기화
+    detector = None
+    if MTCNN:
+        try:
+            mtcnn_weights = local_models.mtcnn_weights() if local_models else None
+            try:
+                detector = MTCNN(weights_file=mtcnn_weights) if mtcnn_weights else MTCNN()
+            except TypeError:
+                # weights_file 인자가 없는 mtcnn 버전은 패키지에 포함된 가중치를 사용 (네트워크 불필요)
+                detector = MTCNN()
+            print("[INFO] MTCNN 초기화 완료")
+        except Exception as e:
+            print(f"[WARN] MTCNN 초기화 실패: {e}")
+    else:
+        print("[WARN] mtcnn 라이브러리가 설치되지 않았습니다.")
 
-# MTCNN 초기화
-detector = None
-if MTCNN:
+# torch intra-op 스레드 수를 스케줄러 워커 수에 맞춰 고정
+if torch is not None:
     try:
-        detector = MTCNN()
-        print("[INFO] MTCNN 초기화 완료")
-    except Exception as e:
-        print(f"[WARN] MTCNN 초기화 실패: {e}")
-else:
-    print("[WARN] mtcnn 라이브러리가 설치되지 않았습니다.")
+        torch.set_num_threads(TORCH_THREADS)
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 이미 병렬 작업이 시작된 뒤에는 interop 스레드 수를 바꿀 수 없음
+        pass
+print(f"[INFO] CPU 예산: 코어 {CPU_CORES}개, 워커 {CPU_WORKERS}개 × torch 스레드 {TORCH_THREADS}개")
 
 # ==========================
-# 검증 함수 (Luhn/주민등록)
+# 작업 스케줄러
 # ==========================
 
-def validate_luhn(card_number: str) -> bool:
-    digits = [int(d) for d in re.sub(r"\D", "", card_number)]
-    if len(digits) < 13:
-        return False
-    checksum = 0
-    for i, d in enumerate(reversed(digits)):
-        if i % 2 == 1:
-            t = d * 2
-            checksum += t - 9 if t > 9 else t
-        else:
-            checksum += d
-    return checksum % 10 == 0
+PRIORITY_INTERACTIVE = 0  # 텍스트 이벤트 (사용자가 응답을 기다림)
+PRIORITY_BULK = 10        # 파일 스캔 및 그 하위 작업
 
-def validate_ssn(ssn: str) -> bool:
-    ssn = re.sub(r"\D", "", ssn)
-    if len(ssn) != 13:
-            return False  # 주민등록번호는 13자리여야 합니다.
-    yy, mm, dd, g = int(ssn[0:2]), int(ssn[2:4]), int(ssn[4:6]), int(ssn[6])
-    if g not in [1,2,3,4,5,6,7,8]:
-        return False
-    century = 1900 if g in [1,2,5,6] else 2000
+_sched_local = threading.local()
+
+
+class _Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "priority", "context", "_claim")
+
+    def __init__(self, fn, args, kwargs, priority):
+        self.future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        # 제출한 쪽의 contextvars(처리 예산 등)를 작업 스레드로 전달
+        self.context = contextvars.copy_context()
+        self._claim = threading.Lock()
+
+    def claim(self) -> bool:
+        return self._claim.acquire(blocking=False)
+
+    def run(self):
+        prev = getattr(_sched_local, "priority", None)
+        _sched_local.priority = self.priority
+        # 실행 전에 취소된 작업(기다리던 요청이 끊김)은 건너뛰고, 시작한 뒤에는 취소되지 않게 함
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.future.set_result(self.context.run(self.fn, *self.args, **self.kwargs))
+        except BaseException as e:
+            self.future.set_exception(e)
+        finally:
+            _sched_local.priority = prev
+
+
+class CpuScheduler:
+    """프로세스 전역 CPU 작업 스케줄러.
+
+    - 고정된 수의 워커 스레드가 우선순위 큐에서 작업을 꺼내 실행합니다 (값이 작을수록 먼저).
+    - 하위 작업의 우선순위를 지정하지 않으면 호출한 작업의 우선순위를 물려받습니다.
+    - result()/map() 으로 기다리는 쪽은 아직 시작되지 않은 작업을 직접 실행하므로,
+      작업 안에서 다시 작업을 제출해도 워커 고갈로 인한 교착이 생기지 않습니다.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = 0
+        self._alive = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._names = itertools.count()
+        self._cond = threading.Condition()
+        self._tasks = {}
+        self.resize(workers)
+
+    def resize(self, workers: int):
+        """워커 스레드 수 변경 (자동 보정용). 줄이면 남는 스레드는 하던 작업을 마친 뒤 종료"""
+        workers = max(1, workers)
+        with self._cond:
+            self.workers = workers
+            start = max(0, workers - self._alive)
+            self._alive += start
+            self._cond.notify_all()
+        for _ in range(start):
+            threading.Thread(target=self._worker, name=f"pii-cpu-{next(self._names)}", daemon=True).start()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap and self._alive <= self.workers:
+                    self._cond.wait()
+                if self._alive > self.workers:
+                    self._alive -= 1
+                    return
+                _, _, task = heapq.heappop(self._heap)
+            if task.claim():
+                task.run()
+
+    def submit(self, fn, *args, priority=None, **kwargs) -> Future:
+        if priority is None:
+            priority = getattr(_sched_local, "priority", None)
+            if priority is None:
+                priority = PRIORITY_BULK
+        task = _Task(fn, args, kwargs, priority)
+        task.future._pii_task = task
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), task))
+            self._cond.notify()
+        return task.future
+
+    def result(self, future: Future):
+        task = getattr(future, "_pii_task", None)
+        if task is not None and task.claim():
+            task.run()
+        return future.result()
+
+    def map(self, fn, iterable, priority=None) -> list:
+        futures = [self.submit(fn, item, priority=priority) for item in iterable]
+        return [self.result(f) for f in futures]
+
+
+scheduler = CpuScheduler(CPU_WORKERS)
+
+# ==========================
+# 동일 요청 병합 (single-flight)
+# ==========================
+
+class SingleFlight:
+    """같은 key 의 작업이 이미 실행 중이면 새로 돌리지 않고 그 Future 를 함께 기다리게 하는 병합 계층.
+
+    더블 클릭, Enter + 버튼 동시 전송처럼 몇 ms 간격으로 들어온 동일 텍스트/파일은 한 번만 검사합니다.
+    완료된 결과는 보관하지 않으므로(캐시가 아님) 이후 요청은 다시 검사합니다.
+
+    호출자마다 공유 작업의 결과를 전달받는 별도 Future 를 받으므로, 한 호출자가 취소해도 공유 작업과
+    다른 호출자는 영향을 받지 않습니다. owns 로 넘긴 자원(FileBuffer 등)은 공유 작업을 새로 만들 때
+    retain() 하고 작업이 끝나면 close() 하므로, 먼저 만든 호출자가 끊겨도 작업이 끝날 때까지 유지됩니다.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def _join(self, key, fn, args, kwargs, priority, owns) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            for res in owns:
+                res.retain()
+            future = scheduler.submit(_call_owning, fn, owns, *args, priority=priority, **kwargs)
+            self._inflight[key] = future
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def submit(self, key, fn, *args, priority=None, owns=(), **kwargs) -> Future:
+        shared = self._join(key, fn, args, kwargs, priority, owns)
+        waiter = Future()
+
+        def _relay(f):
+            if f.cancelled():
+                waiter.cancel()
+            elif waiter.set_running_or_notify_cancel():
+                if f.exception() is not None:
+                    waiter.set_exception(f.exception())
+                else:
+                    waiter.set_result(f.result())
+
+        shared.add_done_callback(_relay)
+        return waiter
+
+    def do(self, key, fn, *args, priority=None, owns=(), **kwargs):
+        return scheduler.result(self._join(key, fn, args, kwargs, priority, owns))
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+def _call_owning(fn, owns, *args, **kwargs):
     try:
-        datetime.date(century + yy, mm, dd)
-    except ValueError:
-        return False
-    # 2020년 이후 출생자 일부 예외 허용
-    if (century + yy) >= 2020:
-        return True
-    weights = [2,3,4,5,6,7,8,9,2,3,4,5]
-    s = sum(int(ssn[i]) * weights[i] for i in range(12))
-    check_digit = (11 - (s % 11)) % 10
-    return check_digit == int(ssn[-1])
+        return fn(*args, **kwargs)
+    finally:
+        for res in owns:
+            res.close()
+
+
+def content_key(data, *parts) -> str:
+    """요청 내용(bytes / FileBuffer / str)과 부가 정보로 만든 병합 키 (blake2b, 복사 없이 해시)"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    h.update(data.encode("utf-8") if isinstance(data, str) else _as_view(data))
+    return h.hexdigest()
+
+
+inflight = SingleFlight()
 
 # ==========================
-# 정규식 패턴
+# 처리 예산 (시간 / 작업량)
 # ==========================
 
-COMPILED_PATTERNS = {
-    "phone": re.compile(r'\b(?:010[\s-]?\d{3,4}[\s-]?\d{4}|0(?:2|3[1-3]|4[1-4]|5[1-5]|6[1-4]|70)[\s-]?\d{3,4}[\s-]?\d{4})\b'),
-    "email": re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'),
-    "birth": re.compile(r"(?<!\d)(19[0-9]{2}|20[0-2][0-9])[년./\-\s]+(0?[1-9]|1[0-2])[월./\-\s]+(0?[1-9]|[12][0-9]|3[01])[일]?(?!\d)"),
-    "ssn": re.compile(r"(?<!\d)\d{6}[\s\-]?[1-4]\d{6}(?!\d)"),
-    "alien_reg": re.compile(r"(?<!\d)\d{6}[\s\-]?[5-8]\d{6}(?!\d)"),
-    "driver_license": re.compile(r"(?<!\d)(1[1-9]|2[0-8])[\s\-]?\d{2}[\s\-]?\d{6}[\s\-]?\d{2}(?!\d)"),
-    "passport": re.compile(r"\b[A-Z]\d{2,3}[A-Z]?\d{4,5}\b"),
-    "account": re.compile(r"(?<!\d)\d{6}[\s\-]?\d{2}[\s\-]?\d{6}(?!\d)"),
-    "card": re.compile(r"(?<!\d)(?:\d{4}[\s\-]?){3}\d{4}(?!\d)"),
-    "ip": re.compile(r"(?<!\d)(?:\d{1,3}\.){3}\d{1,3}(?!\d)")
+def _env_float(name, default):
+    return float(os.getenv(name, str(default)))
+
+
+# 요청(파일 1개) 단위 예산: 0 이하이면 제한 없음
+BUDGET_SECONDS = _env_float("PII_BUDGET_SECONDS", 25)
+BUDGET_PAGES = int(_env_float("PII_BUDGET_PAGES", 300))
+BUDGET_IMAGES = int(_env_float("PII_BUDGET_IMAGES", 200))
+BUDGET_OCR_CHARS = int(_env_float("PII_BUDGET_OCR_CHARS", 200000))
+# 단계별 시간 예산: 단계가 처음 시작된 시점부터 계산하며 요청 전체 마감도 함께 적용
+BUDGET_STAGE_SECONDS = {
+    stage: _env_float(f"PII_BUDGET_{stage.upper()}_SECONDS", 0)
+    for stage in ("parse", "ocr", "face", "detect")
 }
-COMPILED_NORMALIZED_PATTERNS = {
-    "phone_normalized": re.compile(r"(?<!\d)(?:010\d{7,8}|02\d{7,8}|0(?:3[1-3]|4[1-4]|5[1-5]|6[1-4]|70)\d{7,8})(?!\d)"),
-    "ssn_normalized": re.compile(r"(?<!\d)\d{6}[1-4]\d{6}(?!\d)"),
-    "alien_reg_normalized": re.compile(r"(?<!\d)\d{6}[5-8]\d{6}(?!\d)"),
-    "driver_license_normalized": re.compile(r"(?<!\d)(1[1-9]|2[0-8])\d{10}(?!\d)"),
-    "account_normalized": re.compile(r"(?<!\d)\d{14}(?!\d)"),
-    "card_normalized": re.compile(r"(?<!\d)\d{16}(?!\d)")
+
+
+class ScanBudget:
+    """파일 하나를 처리하는 동안의 시간/작업량 예산.
+
+    각 단계는 ok()/limit()/take() 로 예산을 확인하고, 예산이 떨어지면 그때까지의 결과만 반환합니다.
+    예산 때문에 잘린 단계와 사유는 truncated 에 기록됩니다. 작업량(페이지/이미지/OCR 글자) 한도는
+    단계별로 따로 셉니다.
+    """
+
+    def __init__(self, seconds=BUDGET_SECONDS, pages=BUDGET_PAGES, images=BUDGET_IMAGES,
+                 ocr_chars=BUDGET_OCR_CHARS, stage_seconds=None):
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds if seconds and seconds > 0 else None
+        self.limits = {"pages": pages, "images": images, "ocr_chars": ocr_chars}
+        self.stage_seconds = dict(BUDGET_STAGE_SECONDS if stage_seconds is None else stage_seconds)
+        self.truncated = {}
+        self._used = Counter()
+        self._stage_deadline = {}
+        self._lock = threading.Lock()
+
+    def _mark(self, stage, reason):
+        with self._lock:
+            self.truncated.setdefault(stage, reason)
+
+    def ok(self, stage) -> bool:
+        """요청 마감과 해당 단계 마감이 모두 남아 있으면 True"""
+        now = time.monotonic()
+        with self._lock:
+            if stage not in self._stage_deadline:
+                limit = self.stage_seconds.get(stage) or 0
+                self._stage_deadline[stage] = now + limit if limit > 0 else None
+            stage_deadline = self._stage_deadline[stage]
+        if self.deadline is not None and now >= self.deadline:
+            self._mark(stage, "time")
+            return False
+        if stage_deadline is not None and now >= stage_deadline:
+            self._mark(stage, "stage_time")
+            return False
+        return True
+
+    def limit(self, kind, n, stage) -> int:
+        """n 개 중 예산 안에서 처리할 수 있는 개수를 예약하고 반환"""
+        cap = self.limits.get(kind) or 0
+        if cap <= 0:
+            return n
+        with self._lock:
+            allowed = max(0, min(n, cap - self._used[(stage, kind)]))
+            self._used[(stage, kind)] += allowed
+        if allowed < n:
+            self._mark(stage, kind)
+        return allowed
+
+    def take(self, kind, n, stage) -> bool:
+        """이미 처리한 작업량 n 을 기록하고, 한도를 넘었으면 False"""
+        cap = self.limits.get(kind) or 0
+        with self._lock:
+            self._used[(stage, kind)] += n
+            over = cap > 0 and self._used[(stage, kind)] >= cap
+        if over:
+            self._mark(stage, kind)
+        return not over
+
+    def report(self):
+        """잘린 단계가 없으면 None, 있으면 {단계: 사유} 와 경과 시간"""
+        if not self.truncated:
+            return None
+        return {"stages": dict(self.truncated), "elapsed": round(time.monotonic() - self.started, 2)}
+
+
+class _UnlimitedBudget(ScanBudget):
+    """예산이 설정되지 않은 호출(텍스트 이벤트, 직접 호출)용 제한 없는 예산.
+    모든 요청이 함께 쓰므로 사용량/잘림을 기록하지 않는 상태 없는 객체입니다."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.deadline = None
+        self.limits = {}
+        self.stage_seconds = {}
+        self.truncated = types.MappingProxyType({})
+
+    def _mark(self, stage, reason):
+        pass
+
+    def ok(self, stage) -> bool:
+        return True
+
+    def limit(self, kind, n, stage) -> int:
+        return n
+
+    def take(self, kind, n, stage) -> bool:
+        return True
+
+    def report(self):
+        return None
+
+
+_UNLIMITED = _UnlimitedBudget()
+_current_budget = contextvars.ContextVar("pii_scan_budget", default=_UNLIMITED)
+
+
+def current_budget() -> ScanBudget:
+    return _current_budget.get()
+
+# ==========================
+# 탐지 결과 레코드
+# ==========================
+
+class Detection:
+    """탐지 항목 1건. dict 대신 __slots__ 로 메모리와 GC 부담을 줄인 레코드.
+
+    기존 코드가 쓰던 dict 접근(it['type'], it.get('span'), 'status' in it, it['status'] = ...)을 그대로 지원하고,
+    JSON 으로 내보낼 때만 to_dict() 로 변환합니다. 값 문자열은 intern 해서 같은 값이 반복되는 대용량 표에서 공유합니다.
+    """
+
+    __slots__ = ("type", "value", "span", "status")
+    _FIELDS = __slots__
+
+    def __init__(self, type: str, value, span=None, status: str = None):
+        self.type = type
+        self.value = sys.intern(value) if isinstance(value, str) else value
+        self.span = span
+        self.status = status
+
+    def __getitem__(self, key):
+        if key in self._FIELDS:
+            val = getattr(self, key)
+            if val is not None or key != "status":
+                return val
+        raise KeyError(key)
+
+    def __setitem__(self, key, val):
+        if key not in self._FIELDS:
+            raise KeyError(f"Detection 에 없는 필드: {key}")
+        setattr(self, key, val)
+
+    def __contains__(self, key):
+        return key in self._FIELDS and (key != "status" or self.status is not None)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [k for k in self._FIELDS if k in self]
+
+    def copy(self):
+        return Detection(self.type, self.value, self.span, self.status)
+
+    def to_dict(self) -> dict:
+        d = {"type": self.type, "value": self.value, "span": self.span}
+        if self.status is not None:
+            d["status"] = self.status
+        return d
+
+    def __eq__(self, other):
+        if isinstance(other, (Detection, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Detection) else other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+def detection_json_default(obj):
+    """json.dumps(default=...) 용: Detection 은 dict 로, 그 밖의 알 수 없는 객체는 문자열로"""
+    if isinstance(obj, Detection):
+        return obj.to_dict()
+    return str(obj)
+
+# ==========================
+# 대량 탐지 결과 요약 (유형별 정확한 개수 + 저수지 표본)
+# ==========================
+
+# 탐지 항목이 이 개수를 넘으면 요약 모드로 저장/전송
+SUMMARY_THRESHOLD = int(os.getenv("PII_SUMMARY_THRESHOLD", "200"))
+# 요약 모드에서 유형별로 보관할 표본 수
+SUMMARY_SAMPLE_SIZE = int(os.getenv("PII_SUMMARY_SAMPLE_SIZE", "20"))
+# 항목 단위 로그 최대 줄 수 (나머지는 유형별 개수 한 줄로)
+LOG_ITEM_LIMIT = int(os.getenv("PII_LOG_ITEM_LIMIT", "50"))
+
+
+class DetectionSummary:
+    """유형별 개수는 정확히 세고 값은 유형마다 최대 sample_size 개만 균등 표집(Algorithm R)하는 요약.
+
+    항목 수와 무관하게 메모리가 유형 수 x sample_size 로 고정되고, 표본이 유형별이라
+    한 건뿐인 유형(예: file_parse_error)도 항상 남습니다.
+    """
+
+    def __init__(self, sample_size: int = SUMMARY_SAMPLE_SIZE, rng: random.Random = None):
+        self.sample_size = max(1, sample_size)
+        self.counts = Counter()
+        self._samples = {}
+        self._rng = rng or random.Random()
+
+    def add(self, item):
+        t = item.get('type')
+        self.counts[t] += 1
+        reservoir = self._samples.setdefault(t, [])
+        if len(reservoir) < self.sample_size:
+            reservoir.append(item)
+        else:
+            j = self._rng.randrange(self.counts[t])
+            if j < self.sample_size:
+                reservoir[j] = item
+
+    def extend(self, items):
+        for it in items:
+            self.add(it)
+        return self
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def samples(self) -> list:
+        """유형별 표본을 원래 위치(span) 순으로 합친 목록"""
+        merged = [it for reservoir in self._samples.values() for it in reservoir]
+        merged.sort(key=lambda it: (it.get('span') or (float('inf'), 0))[0])
+        return merged
+
+    def to_dict(self) -> dict:
+        return {"summarized": True, "total": self.total, "counts": dict(self.counts), "sample_size": self.sample_size}
+
+
+def summarize_detections(items: list, threshold: int = None, sample_size: int = None) -> tuple:
+    """항목이 threshold 이하면 (items, None), 넘으면 (유형별 표본 목록, 요약 dict) 반환"""
+    threshold = SUMMARY_THRESHOLD if threshold is None else threshold
+    if threshold <= 0 or len(items) <= threshold:
+        return items, None
+    summary = DetectionSummary(SUMMARY_SAMPLE_SIZE if sample_size is None else sample_size).extend(items)
+    return summary.samples(), summary.to_dict()
+
+
+def summarize_combination_risk(comb: dict, sample_size: int = None) -> dict:
+    """조합위험 메타데이터의 항목/클러스터 목록을 표본 크기로 줄임 (개수 정보는 counts 에 유지)"""
+    if not comb:
+        return comb
+    k = SUMMARY_SAMPLE_SIZE if sample_size is None else sample_size
+    if len(comb.get('items', [])) <= k and len(comb.get('clusters', [])) <= k:
+        return comb
+    out = dict(comb)
+    out['items'] = DetectionSummary(k).extend(comb.get('items', [])).samples()
+    out['clusters'] = [dict(c, items=c['items'][:k]) for c in comb.get('clusters', [])[:k]]
+    return out
+
+
+def log_detections(items: list, prefix: str, summary: dict = None, limit: int = None):
+    """항목 단위 로그는 limit 줄까지만 남기고, 나머지는 유형별 개수로 한 줄 요약"""
+    limit = LOG_ITEM_LIMIT if limit is None else limit
+    for it in items[:limit]:
+        st = f" [{it.get('status')}]" if 'status' in it else ""
+        logging.info(f"✓ {prefix}: {it.get('type')} = {it.get('value')}{st}")
+    total = summary["total"] if summary else len(items)
+    if total > min(limit, len(items)):
+        counts = summary["counts"] if summary else dict(Counter(it.get('type') for it in items))
+        logging.info(f"✓ {prefix}: ... 외 {total - min(limit, len(items))}건 (전체 {total}건, 유형별 {counts})")
+
+# ==========================
+# 일괄 검증 (NumPy 벡터화)
+# ==========================
+# 스프레드시트처럼 후보가 수만 건일 때 건별 re.sub / datetime.date 대신 배열 연산으로 한 번에 검증
+
+_SSN_WEIGHTS = np.array([2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5], dtype=np.int64)
+_MONTH_DAYS = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+# 운전면허 지역코드 (11 서울 ~ 26 울산, 28 경기북부)
+_LICENSE_REGIONS = np.array(list(range(11, 27)) + [28], dtype=np.int64)
+
+
+def _digit_columns(values):
+    """문자열 목록의 숫자만 모아 (자릿값, 소속 행, 오른쪽부터의 위치, 행별 자릿수) 배열로 반환"""
+    n = len(values)
+    joined = "".join(values).encode("ascii", "replace")  # 비ASCII 문자는 '?' 한 글자로 치환되어 길이 유지
+    chars = np.frombuffer(joined, dtype=np.uint8)
+    lengths = np.fromiter((len(v) for v in values), dtype=np.int64, count=n)
+    owner = np.repeat(np.arange(n), lengths)
+    is_digit = (chars >= 48) & (chars <= 57)
+    digits = chars[is_digit].astype(np.int64) - 48
+    owner = owner[is_digit]
+    counts = np.bincount(owner, minlength=n)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    pos = np.arange(len(digits)) - starts[owner]
+    return digits, owner, counts[owner] - 1 - pos, counts
+
+
+def _digit_matrix(values, width):
+    """정확히 width 자리 숫자인 행만 채운 (n, width) 행렬과 해당 행 마스크"""
+    digits, owner, rpos, counts = _digit_columns(values)
+    ok = counts == width
+    mat = np.zeros((len(values), width), dtype=np.int64)
+    sel = ok[owner]
+    mat[owner[sel], width - 1 - rpos[sel]] = digits[sel]
+    return mat, ok
+
+
+def batch_validate_luhn(values) -> np.ndarray:
+    """카드번호 후보 목록 → Luhn 체크섬 통과 여부 bool 배열 (13자리 이상)"""
+    if not len(values):
+        return np.zeros(0, dtype=bool)
+    digits, owner, rpos, counts = _digit_columns(values)
+    doubled = np.where(rpos % 2 == 1, digits * 2, digits)
+    doubled = np.where(doubled > 9, doubled - 9, doubled)
+    checksum = np.bincount(owner, weights=doubled, minlength=len(values)).astype(np.int64)
+    return (counts >= 13) & (checksum % 10 == 0)
+
+
+def _batch_birth_ok(mat):
+    """주민/외국인등록번호 앞 7자리(생년월일 + 성별)의 날짜 유효성과 출생연도 배열"""
+    yy = mat[:, 0] * 10 + mat[:, 1]
+    mm = mat[:, 2] * 10 + mat[:, 3]
+    dd = mat[:, 4] * 10 + mat[:, 5]
+    g = mat[:, 6]
+    year = np.where(np.isin(g, (1, 2, 5, 6)), 1900, 2000) + yy
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_ok = (mm >= 1) & (mm <= 12)
+    max_day = _MONTH_DAYS[np.clip(mm, 0, 12)] + ((mm == 2) & leap)
+    return month_ok & (dd >= 1) & (dd <= max_day), year
+
+
+def _batch_rrn(values, genders, base):
+    if not len(values):
+        return np.zeros(0, dtype=bool)
+    mat, ok = _digit_matrix(values, 13)
+    date_ok, year = _batch_birth_ok(mat)
+    check = (base - (mat[:, :12] @ _SSN_WEIGHTS) % 11) % 10
+    # 2020년 이후 출생자는 임의번호 체계라 체크섬 검사 생략
+    checksum_ok = (year >= 2020) | (check == mat[:, 12])
+    return ok & np.isin(mat[:, 6], genders) & date_ok & checksum_ok
+
+
+def batch_validate_ssn(values) -> np.ndarray:
+    """주민등록번호 후보 목록 → 날짜 + 가중치 체크섬 통과 여부 (2020년 이후 출생자는 체크섬 생략)"""
+    return _batch_rrn(values, (1, 2, 3, 4, 5, 6, 7, 8), 11)
+
+
+def batch_validate_alien_reg(values) -> np.ndarray:
+    """외국인등록번호 후보 목록 → 날짜 + 외국인번호 체크섬((13 - 합 % 11) % 10) 통과 여부"""
+    return _batch_rrn(values, (5, 6, 7, 8), 13)
+
+
+def batch_validate_driver_license(values) -> np.ndarray:
+    """운전면허번호 후보 목록 → 12자리, 유효한 지역코드, 일련번호가 0이 아닌지 여부"""
+    if not len(values):
+        return np.zeros(0, dtype=bool)
+    mat, ok = _digit_matrix(values, 12)
+    region = mat[:, 0] * 10 + mat[:, 1]
+    serial_nonzero = mat[:, 4:10].any(axis=1)
+    return ok & np.isin(region, _LICENSE_REGIONS) & serial_nonzero
+
+
+# 유형별 일괄 검증기와 실패 시 status 문자열
+BATCH_VALIDATORS = {
+    "card": (batch_validate_luhn, "invalid (Luhn)"),
+    "ssn": (batch_validate_ssn, "invalid (SSN)"),
+    "alien_reg": (batch_validate_alien_reg, "invalid (ARN)"),
+    "driver_license": (batch_validate_driver_license, "invalid (License)"),
 }
 
+
+def validate_luhn(card_number: str) -> bool:
+    """카드번호 한 건의 Luhn 검증 (batch_validate_luhn 의 단건 버전)"""
+    return bool(batch_validate_luhn([card_number])[0])
+
+
+def validate_ssn(ssn: str) -> bool:
+    """주민등록번호 한 건의 검증 (batch_validate_ssn 의 단건 버전)"""
+    return bool(batch_validate_ssn([ssn])[0])
+
+
+def apply_batch_validation(items: list) -> list:
+    """탐지 항목 목록에서 유형별 후보를 모아 한 번씩 검증하고 status 를 채움"""
+    by_type = {}
+    for it in items:
+        if it.get("type") in BATCH_VALIDATORS:
+            by_type.setdefault(it["type"], []).append(it)
+    for label, group in by_type.items():
+        validator, invalid_status = BATCH_VALIDATORS[label]
+        results = validator([it["value"] for it in group])
+        for it, valid in zip(group, results.tolist()):
+            it["status"] = "valid" if valid else invalid_status
+    return items
+
+# ==========================
+# 정규식 탐지 규칙 (선언형 규칙 파일 + 핫 리로드)
+# ==========================
+# 규칙은 pii_rules.json 에 정의하고 한 번만 컴파일합니다. 파일이 바뀌면 다음 탐지 때 새 규칙 세트로
+# 원자적으로 교체되며(모델 재로딩 없음), 잘못된 파일이면 경고만 남기고 기존 규칙을 유지합니다.
+
+RULES_FILE = os.getenv("PII_RULES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pii_rules.json"))
+RULES_CHECK_INTERVAL = float(os.getenv("PII_RULES_CHECK_INTERVAL", "2"))
+_SEQUENTIAL_DIGITS = "0123456789" * 3
+
+
+class DetectionRule:
+    """규칙 하나의 컴파일 결과와 누적 통계 (후보 수, 탐지 수, 소요 시간)"""
+
+    def __init__(self, spec: dict):
+        self.name = spec["name"]
+        self.pattern = re.compile(spec["pattern"]) if spec.get("pattern") else None
+        self.normalized = re.compile(spec["normalized_pattern"]) if spec.get("normalized_pattern") else None
+
+        checks = spec.get("checks") or {}
+        self.digits = tuple(checks["digits"]) if checks.get("digits") else None
+        self.prefixes = tuple(checks.get("prefixes") or ()) or None
+        ctx = checks.get("reject_context")
+        self.reject_context = (re.compile(ctx["pattern"]), int(ctx.get("window", 10))) if ctx else None
+        self.reject_adjacent_alpha = bool(checks.get("reject_adjacent_alpha"))
+        self.reject_sequential = bool(checks.get("reject_sequential_digits"))
+        self.require_keywords = self._keywords(checks.get("require_keywords"))
+        self.reject_keywords = self._keywords(checks.get("reject_keywords"))
+
+        nchecks = spec.get("normalized_checks") or {}
+        self.normalized_prefixes = tuple(nchecks.get("prefixes") or ()) or None
+        self.reject_value = re.compile(nchecks["reject_value"]) if nchecks.get("reject_value") else None
+
+        self.candidates = 0
+        self.hits = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keywords(spec):
+        if not spec:
+            return None
+        return tuple(w.lower() for w in spec.get("words", ())), int(spec.get("window", 50))
+
+    def accept(self, text: str, match) -> bool:
+        """finditer 후보 하나에 대해 규칙 파일의 검증 조건을 적용"""
+        start, end = match.span()
+        if self.digits or self.prefixes or self.reject_sequential:
+            digits = re.sub(r'\D', '', match.group())
+            if self.digits and not (self.digits[0] <= len(digits) <= self.digits[1]):
+                return False
+            if self.prefixes and not digits.startswith(self.prefixes):
+                return False
+        if self.reject_context:
+            pattern, window = self.reject_context
+            if pattern.search(text, max(0, start - window), min(len(text), end + window)):
+                return False
+        if self.reject_adjacent_alpha:
+            if (start > 0 and text[start - 1].isalpha()) or (end < len(text) and text[end].isalpha()):
+                return False
+        if self.reject_sequential and len(digits) > 1 and digits in _SEQUENTIAL_DIGITS:
+            return False
+        if self.require_keywords and not self._has_keyword(text, start, end, self.require_keywords):
+            return False
+        if self.reject_keywords and self._has_keyword(text, start, end, self.reject_keywords):
+            return False
+        return True
+
+    @staticmethod
+    def _has_keyword(text, start, end, keywords):
+        words, window = keywords
+        context = text[max(0, start - window):min(len(text), end + window)].lower()
+        return any(w in context for w in words)
+
+    def accept_normalized(self, value: str) -> bool:
+        return not self.normalized_prefixes or value.startswith(self.normalized_prefixes)
+
+    def record(self, candidates: int, hits: int, seconds: float):
+        with self._lock:
+            self.candidates += candidates
+            self.hits += hits
+            self.seconds += seconds
+
+    def stats(self) -> dict:
+        return {"candidates": self.candidates, "hits": self.hits, "seconds": round(self.seconds, 6)}
+
+
+class RuleSet:
+    """규칙 파일 하나를 컴파일한 불변 규칙 세트 (순서 = 탐지 우선순위)"""
+
+    def __init__(self, spec: dict, source: str = None, mtime: float = None):
+        self.version = spec.get("version")
+        self.source = source
+        self.mtime = mtime
+        self.rules = [DetectionRule(r) for r in spec.get("rules", [])]
+        if not self.rules:
+            raise ValueError("[ERROR] 규칙 파일에 rules 가 비어 있습니다.")
+
+    @classmethod
+    def load(cls, path: str):
+        mtime = os.path.getmtime(path)
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        return cls(spec, source=path, mtime=mtime)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.mtime,
+            "rules": {r.name: r.stats() for r in self.rules},
+        }
+
+
+_rule_set = RuleSet.load(RULES_FILE)
+_rule_check_at = time.monotonic()
+_rule_reload_lock = threading.Lock()
+
+
+def reload_rules(force: bool = False) -> RuleSet:
+    """규칙 파일이 바뀌었으면 다시 컴파일해 교체. 실패하면 기존 규칙 세트를 그대로 사용"""
+    global _rule_set, _rule_check_at
+    with _rule_reload_lock:
+        _rule_check_at = time.monotonic()
+        try:
+            mtime = os.path.getmtime(RULES_FILE)
+            if force or mtime != _rule_set.mtime:
+                _rule_set = RuleSet.load(RULES_FILE)
+                print(f"[INFO] 탐지 규칙 다시 로드: {RULES_FILE} (version={_rule_set.version}, {len(_rule_set.rules)}개)")
+        except Exception as e:
+            logging.warning(f"탐지 규칙 리로드 실패, 기존 규칙 유지: {e}")
+    return _rule_set
+
+
+def get_rule_set() -> RuleSet:
+    if RULES_CHECK_INTERVAL >= 0 and time.monotonic() - _rule_check_at >= RULES_CHECK_INTERVAL:
+        return reload_rules()
+    return _rule_set
+
+
+def rule_stats() -> dict:
+    return _rule_set.stats()
+
 KOREAN_SURNAMES = {'김','이','박','최','정','강','조','윤','장','임','한','오','서','신','권','황','안','송','류','전','홍','고','문','양','손','배','백','허','남','심','노','하','곽','성','차','주','우','구','라','진','유'}
 NAME_WHITELIST = {'홍길동', '유재석'}
 
@@ -183,15 +943,24 @@ ORG_WHITELIST = {'홈플러스', '협진축산', '홈플러스간석점'}
 # 파일명 마스킹
 # ==========================
 
-def mask_pii_in_filename(filename: str) -> tuple:
-    detected_items = detect_by_regex(filename)
-    detected_items.extend(detect_by_ner(filename))
+FILENAME_CACHE_SIZE = int(os.getenv("PII_FILENAME_CACHE_SIZE", "1024"))
+_filename_cache = OrderedDict()
+_filename_cache_lock = threading.Lock()
 
-    if not detected_items:
-        return (filename, None)
+
+def _filename_needs_ner(filename: str) -> bool:
+    """ASCII/숫자만으로 된 파일명(예: IMG_0001.jpg, report-2024.pdf)은 NER 모델을 돌릴 필요가 없음"""
+    return any(ord(ch) > 127 and ch.isalpha() for ch in filename)
+
+
+def _analyze_filename(filename: str) -> dict:
+    base = filename.rsplit('.', 1)[0]
+    results = detection_pipeline.run_each(filename, skip=() if _filename_needs_ner(filename) else ("ner",))
+    detected_items = results.get("regex", []) + results.get("address", []) + results.get("ner", [])
+    quasi_items = [it for name, items in results.items() if name not in ("regex", "address", "ner") for it in items]
 
     unique_items = []
-    detected_items.sort(key=lambda x: x.get('span', (9999, 9999))[0])
+    detected_items.sort(key=lambda x: (x.get('span') or (9999, 9999))[0])
     last_end = -1
     for item in detected_items:
         span = item.get('span')
@@ -202,9 +971,6 @@ def mask_pii_in_filename(filename: str) -> tuple:
             unique_items.append(item)
             last_end = e
 
-    if not unique_items:
-        return (filename, None)
-
     type_map = {
         'ssn': '주민등록번호','email':'이메일','phone':'전화번호','card':'카드번호',
         'driver_license':'운전면허','account':'계좌번호','passport':'여권번호','alien_reg':'외국인등록번호'
@@ -216,94 +982,146 @@ def mask_pii_in_filename(filename: str) -> tuple:
         detected_types.add(display_type)
 
     masked = filename
-    unique_items.sort(key=lambda x: x.get('span', (0,0))[1], reverse=True)
-    for it in unique_items:
-        s, e = it.get('span', (None,None))
-        if s is None:
-            continue
+    for it in sorted(unique_items, key=lambda x: x['span'][1], reverse=True):
+        s, e = it['span']
         val = it.get('value','')
         masked = masked[:s] + ('*' * len(val)) + masked[e:]
 
-    return (masked, ', '.join(sorted(detected_types)) if detected_types else None)
+    # 문서 본문 스캔과 공유할 항목: 확장자를 제외한 파일명(base) 범위 안의 탐지 결과
+    shared = [it for it in detected_items + quasi_items if not it.get('span') or it['span'][1] <= len(base)]
+    # 값 단위로 중복을 거르는 탐지기(정규식/주소/NER)의 (유형, 값): 본문에서 같은 값이 다시 나오면 한 번만 셈
+    dedupe_keys = frozenset((it.get('type'), it.get('value')) for it in detected_items if it in shared)
+    return {
+        "masked": masked,
+        "types": ', '.join(sorted(detected_types)) if detected_types else None,
+        "items": shared,
+        "dedupe_keys": dedupe_keys,
+    }
+
+
+def analyze_filename(filename: str) -> dict:
+    """파일명 PII 분석 (업로드당 1회, 파일명 기준 캐시).
+
+    반환: {"masked": 마스킹된 파일명, "types": 표시용 유형 문자열 또는 None,
+           "items": 확장자를 뺀 파일명 부분의 탐지 항목(정규식/NER/준식별자, 파일명 기준 span),
+           "dedupe_keys": items 중 값 단위로 중복을 거르는 탐지기 항목의 (유형, 값) - 본문 결과에서 제외}
+    서버의 파일명 마스킹, handle_input_raw 의 본문 스캔과 마스킹이 모두 같은 결과를 재사용합니다.
+    """
+    with _filename_cache_lock:
+        cached = _filename_cache.get(filename)
+        if cached is not None:
+            _filename_cache.move_to_end(filename)
+    if cached is None:
+        cached = _analyze_filename(filename)
+        with _filename_cache_lock:
+            _filename_cache[filename] = cached
+            while len(_filename_cache) > FILENAME_CACHE_SIZE:
+                _filename_cache.popitem(last=False)
+    return {"masked": cached["masked"], "types": cached["types"],
+            "items": [it.copy() for it in cached["items"]], "dedupe_keys": cached["dedupe_keys"]}
+
+
+def mask_pii_in_filename(filename: str) -> tuple:
+    analysis = analyze_filename(filename)
+    if analysis["types"] is None:
+        return (filename, None)
+    return (analysis["masked"], analysis["types"])
+
+# ==========================
+# NER 마이크로 배치
+# ==========================
+# 여러 탭/요청이 동시에 보낸 짧은 텍스트를 최대 NER_MAX_WAIT_MS 동안(또는 NER_MAX_BATCH 개,
+# 글자 수 합 NER_MAX_BATCH_CHARS 까지) 모아 한 번의 패딩 배치로 추론합니다.
+# 글자 수는 토큰 수의 근사치로 사용합니다 (klue 토크나이저 기준 한글은 대략 1글자 ≤ 1토큰).
+
+NER_MAX_WAIT_MS = float(os.getenv("PII_NER_MAX_WAIT_MS", "3"))
+NER_MAX_BATCH = int(os.getenv("PII_NER_MAX_BATCH", "16"))
+NER_MAX_BATCH_CHARS = int(os.getenv("PII_NER_MAX_BATCH_CHARS", "8000"))
+# 모델 512 토큰 제한에 맞춘 청크 길이 (안전 마진 포함)
+NER_CHUNK_CHARS = 500
+
+
+def _run_ner_batch(chunks: list) -> list:
+    if len(chunks) == 1:
+        return [ner_pipeline(chunks[0])]
+    return ner_pipeline(chunks, batch_size=len(chunks))
+
+
+# 데몬 클라이언트 모드에서는 데몬 쪽 배처가 모든 워커의 요청을 함께 묶음.
+# 배치 스레드는 스케줄러 워커 수만큼 두어 (배치 스레드 × torch 스레드 ≈ 코어) 동시 요청이 한 줄로 서지 않게 함
+ner_batcher = None if INFERENCE_CLIENT or ner_pipeline is None else BatchWorker(
+    _run_ner_batch, max_wait=NER_MAX_WAIT_MS / 1000.0, max_batch=NER_MAX_BATCH,
+    cost=len, max_cost=NER_MAX_BATCH_CHARS, name="ner", workers=CPU_WORKERS)
+
+
+def _ner_chunks(text: str) -> list:
+    """(시작 오프셋, 청크) 목록. 가능하면 청크 뒤쪽 절반 안의 공백/줄바꿈에서 끊어 단어가 잘리지 않게 함"""
+    chunks = []
+    i, n = 0, len(text)
+    while i < n:
+        end = min(n, i + NER_CHUNK_CHARS)
+        if end < n:
+            cut = max(text.rfind(' ', i + NER_CHUNK_CHARS // 2, end), text.rfind('\n', i + NER_CHUNK_CHARS // 2, end))
+            if cut > i:
+                end = cut + 1
+        chunks.append((i, text[i:end]))
+        i = end
+    return chunks
+
+
+def run_ner(text: str) -> list:
+    """text 전체에 대한 NER 엔티티 목록. 각 엔티티의 start/end 는 text 기준 오프셋으로 보정됨"""
+    chunks = _ner_chunks(text)
+    budget = current_budget()
+    entities = []
+    # 한 번에 NER_MAX_BATCH 개씩 보내고, 사이사이 예산을 확인해 초과 시 그때까지의 결과만 사용
+    for w in range(0, len(chunks), NER_MAX_BATCH):
+        if w and not budget.ok("detect"):
+            break
+        wave = chunks[w:w + NER_MAX_BATCH]
+        if ner_batcher is None:
+            results = ner_pipeline.many([c for _, c in wave])
+        else:
+            futures = ner_batcher.submit_many([c for _, c in wave])
+            results = [f.result() for f in futures]
+        for (offset, _), ents in zip(wave, results):
+            for ent in ents:
+                ent = dict(ent)
+                if ent.get('start') is not None and ent.get('end') is not None:
+                    ent['start'] += offset
+                    ent['end'] += offset
+                entities.append(ent)
+    return entities
 
 # ==========================
 # 정규식 / NER / 준식별자
 # ==========================
 
 def detect_by_regex(Text: str) -> list:
+    rule_set = get_rule_set()
     normalized_text = re.sub(r'[\s\-]', '', Text)
     detected = []
     seen_values = set()  # 중복 방지
-    for label, pattern in COMPILED_PATTERNS.items():
-        for match in pattern.finditer(Text):
-            # 전화번호 검증
-            if label == "phone":
-                start, end = match.span()
-                matched_text = match.group()
-                phone_digits = re.sub(r'\D', '', matched_text)
-                
-                # 전화번호 길이 검증 (9~11자리)
-                if len(phone_digits) < 9 or len(phone_digits) > 11:
-                    continue
-                
-                # 유효한 전화번호 형식인지 먼저 검증
-                valid_prefixes = ['010', '02', '031', '032', '033', '041', '042', '043', '044', 
-                                  '051', '052', '053', '054', '055', '061', '062', '063', '064', '070']
-                if not any(phone_digits.startswith(prefix) for prefix in valid_prefixes):
-                    continue
-                
-                # 앞뒤 좁은 컨텍스트 확인
-                context_start = max(0, start - 10)
-                context_end = min(len(Text), end + 10)
-                context = Text[context_start:context_end]
-                
-                # 날짜 패턴이 바로 인접해 있으면 제외
-                if re.search(r'(19|20)\d{2}[년월일\-/\.]', context):
-                    continue
-                
-                # 앞뒤에 영문자가 붙어있으면 제외
-                if (start > 0 and Text[start-1].isalpha()) or (end < len(Text) and Text[end].isalpha()):
-                    continue
-                
-                # 연속된 숫자 체크
-                if len(phone_digits) > 1:
-                    is_sequential = all(int(phone_digits[i]) == (int(phone_digits[i-1]) + 1) % 10 for i in range(1, len(phone_digits)))
-                    if is_sequential:
-                        continue
-            
-            # 생년월일 검증: 키워드 기반 필터링
-            if label == "birth":
-                start, end = match.span()
-                # 앞뒤 50글자 범위에서 키워드 찾기
-                context_start = max(0, start - 50)
-                context_end = min(len(Text), end + 50)
-                context = Text[context_start:context_end].lower()
-                
-                # 생년월일 관련 키워드
-                birth_keywords = ['생년월일', '생일', '출생', '생년', 'birth', 'dob', 'date of birth']
-                # 제외 키워드 (입사일 등)
-                exclude_keywords = ['입사', '퇴사', '계약', '신고', '등록', '수정', '발급', '승인', '승인일', '가입', '신청', 'join', 'hire', 'contract', 'register']
-                
-                has_birth_keyword = any(kw in context for kw in birth_keywords)
-                has_exclude_keyword = any(kw in context for kw in exclude_keywords)
-                
-                # 생년월일 키워드가 있고 제외 키워드가 없을 때만 탐지
-                if not has_birth_keyword or has_exclude_keyword:
-                    continue
-            
+    for rule in rule_set.rules:
+        if rule.pattern is None:
+            continue
+        t0 = time.perf_counter()
+        candidates = hits = 0
+        for match in rule.pattern.finditer(Text):
+            candidates += 1
+            # 전화번호 접두/길이/인접 날짜, 생년월일 키워드 등 규칙 파일의 검증 조건
+            if not rule.accept(Text, match):
+                continue
+
             matched_value = match.group()
             # 중복 체크
-            value_key = f"{label}:{matched_value}"
+            value_key = f"{rule.name}:{matched_value}"
             if value_key in seen_values:
                 continue
             seen_values.add(value_key)
-            
-            item = {"type": label, "value": matched_value, "span": match.span()}
-            if label == "card":
-                item["status"] = "valid" if validate_luhn(item["value"]) else "invalid (Luhn)"
-            if label == "ssn":
-                item["status"] = "valid" if validate_ssn(item["value"]) else "invalid (SSN)"
-            detected.append(item)
+            detected.append(Detection(rule.name, matched_value, match.span()))
+            hits += 1
+        rule.record(candidates, hits, time.perf_counter() - t0)
 
     existing = set()
     for d in detected:
@@ -312,51 +1130,49 @@ def detect_by_regex(Text: str) -> list:
         if d["type"] == "phone" and normalized_val.startswith('+'):
             existing.add(normalized_val[1:])
 
-    for label, pattern in COMPILED_NORMALIZED_PATTERNS.items():
-        original = label.replace("_normalized", "")
-        for m in pattern.finditer(normalized_text):
+    for rule in rule_set.rules:
+        if rule.normalized is None:
+            continue
+        original = rule.name
+        t0 = time.perf_counter()
+        candidates = hits = 0
+        for m in rule.normalized.finditer(normalized_text):
             nv = m.group()
             if nv in existing:
                 continue
             if original == "phone" and not nv.startswith('+') and f"+{nv}" in existing:
                 continue
-            
-            # 전화번호 normalized 패턴 추가 검증
-            if original == "phone":
-                # 유효한 전화번호 형식인지 검증
-                valid_prefixes = ['010', '02', '031', '032', '033', '041', '042', '043', '044', 
-                                  '051', '052', '053', '054', '055', '061', '062', '063', '064', '070']
-                if not any(nv.startswith(prefix) for prefix in valid_prefixes):
-                    continue
+            candidates += 1
+            if not rule.accept_normalized(nv):
+                continue
 
-            vp = re.compile(r'[\s-]*'.join(list(nv)))
-            rm = vp.search(Text)
+            rm = re.search(r'[\s-]*'.join(nv), Text)
             if rm:
                 original_value = rm.group()
-                if original == "card" and re.search(r'\d{4}[\s-]\d{2}[\s-]\d{2}', original_value):
+                if rule.reject_value and rule.reject_value.search(original_value):
                     continue
 
                 # 중복 체크
                 value_key = f"{original}:{original_value}"
                 if value_key not in seen_values:
                     seen_values.add(value_key)
-                    item = {"type": original, "value": original_value, "span": rm.span()}
-                    if original == "card":
-                        item["status"] = "valid" if validate_luhn(item["value"]) else "invalid (Luhn)"
-                    if original == "ssn":
-                        item["status"] = "valid" if validate_ssn(item["value"]) else "invalid (SSN)"
-                    detected.append(item)
+                    detected.append(Detection(original, original_value, rm.span()))
+                    hits += 1
                 existing.add(nv)
             else:
                 value_key = f"{original}:{nv}"
                 if value_key not in seen_values:
                     seen_values.add(value_key)
-                    detected.append({"type": original, "value": nv, "span": None})
+                    detected.append(Detection(original, nv, None))
+                    hits += 1
                 existing.add(nv)
-    return detected
+        rule.record(candidates, hits, time.perf_counter() - t0)
+
+    # 카드/주민/외국인/면허번호는 유형별로 모아 한 번에 검증
+    return apply_batch_validation(detected)
 
 def detect_by_ner(Text: str) -> list:
-    if not Text.strip():
+    if ner_pipeline is None or not Text.strip():
         return []
     
     Detected = []
@@ -378,37 +1194,21 @@ def detect_by_ner(Text: str) -> list:
         '오늘', '내일', '어제', '정보', '성격', '장점', '주요', '진료', '최적화', '이해할', '이야기를', '하였으며', '하안동', '홍콩'
     }
     
-    # 정규식으로 완전한 주소 패턴 탐지
-    address_pattern = re.compile(r'(서울특별시|부산광역시|대구광역시|인천광역시|광주광역시|대전광역시|울산광역시|세종특별자치시|경기도|강원도|충청북도|충청남도|전라북도|전라남도|경상북도|경상남도|제주특별자치도)\s*[가-힣]+(?:시|군|구)\s*[가-힣A-Za-z0-9]+(?:로|길)\s*[0-9]+(?:,\s*[A-Za-z가-힣]+)?(?:,\s*[A-Za-z0-9가-힣]+(?:층|호|동))?')
-    detected_addresses = set()
-    for match in address_pattern.finditer(Text):
-        addr = match.group().strip().rstrip(',')
-        if addr and addr not in detected_addresses:
-            Detected.append({"type": "LC", "value": addr, "span": match.span()})
-            detected_addresses.add(addr)
-    
     # 화이트리스트 조직명 탐지 (NER 보완)
     for org_name in ORG_WHITELIST:
         if org_name in Text and org_name not in detected_orgs:
             start_idx = Text.find(org_name)
-            Detected.append({"type": "ORG", "value": org_name, "span": (start_idx, start_idx + len(org_name))})
+            Detected.append(Detection("ORG", org_name, (start_idx, start_idx + len(org_name))))
             detected_orgs.add(org_name)
     
     try:
-        # NER 모델 512 토큰 제한 해결: 분할 처리
-        ner_results = []
-        max_length = 500  # 안전 마진
-        if len(Text) > max_length:
-            chunks = [Text[i:i+max_length] for i in range(0, len(Text), max_length)]
-            for chunk in chunks:
-                ner_results.extend(ner_pipeline(chunk))
-        else:
-            ner_results = ner_pipeline(Text)
+        # NER 모델 512 토큰 제한 해결: 분할 처리 (마이크로 배치, 오프셋은 Text 기준으로 보정됨)
+        ner_results = run_ner(Text)
         
         for whitelist_name in NAME_WHITELIST:
             if whitelist_name in Text:
                 start_idx = Text.find(whitelist_name)
-                Detected.append({"type": "PS", "value": whitelist_name, "span": (start_idx, start_idx + len(whitelist_name))})
+                Detected.append(Detection("PS", whitelist_name, (start_idx, start_idx + len(whitelist_name))))
                 # 화이트리스트로 추가한 이름은 중복 방지를 위해 detected_names 집합에 추가
                 detected_names.add(whitelist_name.replace(" ", ""))
 
@@ -424,7 +1224,7 @@ def detect_by_ner(Text: str) -> list:
             if Start is None or End is None:
                 continue
             
-            # LC(주소)는 정규식으로 이미 처리했으므로 스킵
+            # LC(주소)는 detect_addresses(행정구역 사전)가 처리하므로 스킵
             if Label == 'LC':
                 continue
 
@@ -449,7 +1249,7 @@ def detect_by_ner(Text: str) -> list:
                 org_keywords = ['회사', '전자', '그룹', '기업', '주식회사', '(주)', '㉼', '학교', '대학교', '대학', '고등학교', '중학교', '초등학교', '병원', '의원', '센터', '연구소', '재단', '협회', '은행', '부서', '팀', '본부', '지점', '영업소', '축산', '농장', '목장', '마트', '플러스', '점포', '상회']
                 if any(kw in clean_word for kw in org_keywords):
                     if clean_word not in detected_orgs:
-                        Detected.append({"type": "ORG", "value": Word, "span": (Start, End)})
+                        Detected.append(Detection("ORG", Word, (Start, End)))
                         detected_orgs.add(clean_word)
                     continue
                 
@@ -470,7 +1270,7 @@ def detect_by_ner(Text: str) -> list:
                     continue
                 
                 # 필터 통과한 이름만 추가
-                Detected.append({"type": Label, "value": Word, "span": (Start, End)})
+                Detected.append(Detection(Label, Word, (Start, End)))
                 detected_names.add(clean_word)
                 continue
             
@@ -516,15 +1316,15 @@ def detect_by_ner(Text: str) -> list:
                         for org in split_orgs:
                             clean_split = org.replace(" ", "").strip()
                             if len(clean_split) >= 2 and clean_split not in detected_orgs:
-                                Detected.append({"type": "ORG", "value": org, "span": (Start, End)})
+                                Detected.append(Detection("ORG", org, (Start, End)))
                                 detected_orgs.add(clean_split)
                     else:
-                        Detected.append({"type": Label, "value": Word, "span": (Start, End)})
+                        Detected.append(Detection(Label, Word, (Start, End)))
                         detected_orgs.add(clean_org)
                 continue
             
             if Label == 'LOC':
-                Detected.append({"type": Label, "value": Word, "span": (Start, End)})
+                Detected.append(Detection(Label, Word, (Start, End)))
 
     except Exception as e:
         logging.warning(f"NER 파이프라인 오류: {e}")
@@ -537,9 +1337,610 @@ def detect_quasi_identifiers(text: str) -> list:
     position_keywords = ['사원', '대리', '과장', '차장', '부장', '이사', '상무', '전무', '부사장', '사장', '주임', '선임', '책임', '수석', '부수석', '원장', '부원장', '국장', '부국장', '실장', '팀장', '본부장']
     position_pattern = re.compile(r'\b(' + '|'.join(position_keywords) + r')\b')
     for match in position_pattern.finditer(text):
-        detected.append({"type":"position","value":match.group(),"span":match.span()})
+        detected.append(Detection("position", match.group(), match.span()))
+    return detected
+
+# ==========================
+# 주소 탐지 (행정구역 사전 트라이)
+# ==========================
+
+# 시/도: 정식 명칭 → 약칭 (예: "서울 강남구", "경기 성남시")
+ADDRESS_SIDO = {
+    '서울특별시': ['서울', '서울시'], '부산광역시': ['부산', '부산시'], '대구광역시': ['대구', '대구시'],
+    '인천광역시': ['인천', '인천시'], '광주광역시': ['광주'], '대전광역시': ['대전', '대전시'],
+    '울산광역시': ['울산', '울산시'], '세종특별자치시': ['세종', '세종시'], '경기도': ['경기'],
+    '강원도': ['강원'], '강원특별자치도': [], '충청북도': ['충북'], '충청남도': ['충남'],
+    '전라북도': ['전북'], '전북특별자치도': [], '전라남도': ['전남'], '경상북도': ['경북'],
+    '경상남도': ['경남'], '제주특별자치도': ['제주', '제주도'],
+}
+
+# 시/군/구 (일반구 포함). "OO시"는 "OO" 약칭도 함께 등록합니다.
+ADDRESS_SIGUNGU = set('''
+종로구 중구 용산구 성동구 광진구 동대문구 중랑구 성북구 강북구 도봉구 노원구 은평구 서대문구 마포구 양천구 강서구 구로구
+금천구 영등포구 동작구 관악구 서초구 강남구 송파구 강동구
+서구 동구 영도구 부산진구 동래구 남구 북구 해운대구 사하구 금정구 연제구 수영구 사상구 기장군
+수성구 달서구 달성군 군위군 미추홀구 연수구 남동구 부평구 계양구 강화군 옹진군 광산구 유성구 대덕구 울주군
+수원시 성남시 의정부시 안양시 부천시 광명시 평택시 동두천시 안산시 고양시 과천시 구리시 남양주시 오산시 시흥시 군포시
+의왕시 하남시 용인시 파주시 이천시 안성시 김포시 화성시 광주시 양주시 포천시 여주시 연천군 가평군 양평군
+장안구 권선구 팔달구 영통구 수정구 중원구 분당구 만안구 동안구 원미구 소사구 오정구 상록구 단원구 덕양구 일산동구 일산서구
+처인구 기흥구 수지구
+춘천시 원주시 강릉시 동해시 태백시 속초시 삼척시 홍천군 횡성군 영월군 평창군 정선군 철원군 화천군 양구군 인제군 고성군 양양군
+청주시 충주시 제천시 보은군 옥천군 영동군 증평군 진천군 괴산군 음성군 단양군 상당구 서원구 흥덕구 청원구
+천안시 공주시 보령시 아산시 서산시 논산시 계룡시 당진시 금산군 부여군 서천군 청양군 홍성군 예산군 태안군 동남구 서북구
+전주시 군산시 익산시 정읍시 남원시 김제시 완주군 진안군 무주군 장수군 임실군 순창군 고창군 부안군 완산구 덕진구
+목포시 여수시 순천시 나주시 광양시 담양군 곡성군 구례군 고흥군 보성군 화순군 장흥군 강진군 해남군 영암군 무안군 함평군
+영광군 장성군 완도군 진도군 신안군
+포항시 경주시 김천시 안동시 구미시 영주시 영천시 상주시 문경시 경산시 의성군 청송군 영양군 영덕군 청도군 고령군 성주군
+칠곡군 예천군 봉화군 울진군 울릉군
+창원시 진주시 통영시 사천시 김해시 밀양시 거제시 양산시 의령군 함안군 창녕군 남해군 하동군 산청군 함양군 거창군 합천군
+의창구 성산구 마산합포구 마산회원구 진해구
+제주시 서귀포시
+'''.split())
+
+_ADDR_SIDO, _ADDR_SIGUNGU, _ADDR_DONG, _ADDR_ROAD, _ADDR_NUMBER, _ADDR_DETAIL = range(1, 7)
+# 행정구역 뒤에 오는 구성요소 (모두 모듈 로드 시 1회 컴파일)
+_ADDR_GAP_RE = re.compile(r'[ \t]{0,3}')
+_ADDR_DIVISION_RE = re.compile(r'[가-힣]{1,4}(?:시|군|구)')                        # 사전에 없는 시/군/구 (시/도 바로 뒤에서만)
+_ADDR_DONG_RE = re.compile(r'[가-힣]{1,6}(?:[0-9]{0,2}(?:동|읍|면|리)|[0-9]{1,2}가)')  # 학동, 역삼1동, 양평읍, 종로1가
+_ADDR_ROAD_RE = re.compile(r'[가-힣A-Za-z0-9]{1,12}(?:대로|로|길)')                 # 테헤란로, 도산대로45길, 중앙로123번길
+_ADDR_NUMBER_RE = re.compile(r'(?:산[ ]?)?[0-9]{1,5}(?:-[0-9]{1,5})?(?:번지)?')
+_ADDR_DETAIL_RE = re.compile(r'[ \t]*(?:,[ \t]*[A-Za-z0-9가-힣]{1,20}|[0-9A-Za-z][0-9A-Za-z가-힣-]{0,15}(?:층|호|동)|\([^()\n]{1,30}\))')
+_ADDR_PARTICLES = set('에의은는을를이가와과도로으')
+# 한 글자 + 동/읍/면/리 형태의 흔한 일반 명사 ("강남구 이동 중", "서울 관리를")
+_ADDR_DONG_WORDS = set('''
+이동 행동 활동 운동 감동 자동 공동 노동 변동 출동 연동 작동 가동 발동 충동 진동 소동 파동 난동 준동
+화면 장면 정면 측면 반면 전면 표면 단면 내면 외면 국면 방면 지면 대면 이면 안면 일면
+관리 처리 정리 거리 요리 소리 자리 우리 머리 무리 논리 진리 원리 수리 유리 의리 비리 심리 권리 경리 총리
+'''.split())
+
+
+class _AddressTrie:
+    """행정구역 이름 문자 트라이. longest(text, pos) 는 pos 에서 시작하는 가장 긴 이름의 (종류, 끝 위치)"""
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, name: str, kind: int):
+        node = self._root
+        for ch in name:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, kind)  # 시/도와 시/군/구에 모두 있는 이름은 먼저 등록한 시/도로 취급
+
+    @property
+    def first_chars(self):
+        return self._root.keys()
+
+    def longest(self, text: str, pos: int):
+        node, hit = self._root, None
+        for i in range(pos, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if None in node:
+                hit = (node[None], i + 1)
+        return hit
+
+
+def _build_address_trie() -> _AddressTrie:
+    trie = _AddressTrie()
+    for name, aliases in ADDRESS_SIDO.items():
+        for n in [name] + aliases:
+            trie.add(n, _ADDR_SIDO)
+    for name in ADDRESS_SIGUNGU:
+        trie.add(name, _ADDR_SIGUNGU)
+        if name.endswith('시') and len(name) >= 3:
+            trie.add(name[:-1], _ADDR_SIGUNGU)
+    return trie
+
+ADDRESS_TRIE = _build_address_trie()
+
+
+def _addr_word_char(ch: str) -> bool:
+    return '가' <= ch <= '힣' or ch.isalnum()
+
+
+def _addr_word_end(text: str, end: int) -> bool:
+    """구성요소가 단어 중간에서 끝나지 않는지 (뒤에 조사가 붙는 것은 허용)"""
+    return end >= len(text) or not ('가' <= text[end] <= '힣') or text[end] in _ADDR_PARTICLES
+
+
+def _addr_road(text: str, m) -> bool:
+    """도로명 후보가 실제 도로명인지. "부산으로", "본사로", "문화센터로" 처럼 조사 '(으)로'로 끝나는 말과 구별하려고
+    번호가 붙은 도로명(도산대로45길, 중앙로123번길)이거나 바로 뒤에 건물번호가 올 때만 인정"""
+    road, end = m.group(), m.end()
+    if road.endswith('으로') or not _addr_word_end(text, end):
+        return False
+    if any(ch.isdigit() for ch in road):
+        return True
+    n = _ADDR_NUMBER_RE.match(text, _ADDR_GAP_RE.match(text, end).end())
+    return bool(n and _addr_word_end(text, n.end()))
+
+
+def _addr_component(text: str, pos: int, level: int):
+    """pos 에서 시작하는 다음 주소 구성요소의 (단계, 끝 위치). 주소 순서상 앞 단계로 돌아가지는 않음"""
+    if level <= _ADDR_SIGUNGU:
+        hit = ADDRESS_TRIE.longest(text, pos)
+        if hit and (hit[0] > level or hit[0] == _ADDR_SIGUNGU):
+            return hit
+        if level == _ADDR_SIDO:
+            m = _ADDR_DIVISION_RE.match(text, pos)
+            if m:
+                return _ADDR_SIGUNGU, m.end()
+    if level <= _ADDR_DONG:
+        m = _ADDR_DONG_RE.match(text, pos)
+        if m and _addr_word_end(text, m.end()) and m.group() not in _ADDR_DONG_WORDS:
+            return _ADDR_DONG, m.end()
+    if level < _ADDR_ROAD:
+        m = _ADDR_ROAD_RE.match(text, pos)
+        if m and _addr_road(text, m):
+            return _ADDR_ROAD, m.end()
+    if level in (_ADDR_DONG, _ADDR_ROAD):
+        m = _ADDR_NUMBER_RE.match(text, pos)
+        if m and _addr_word_end(text, m.end()):
+            return _ADDR_NUMBER, m.end()
+    return None
+
+
+def _match_address(text: str, start: int) -> int:
+    """start 의 행정구역 이름부터 이어지는 주소의 끝 위치 (동/읍/면 또는 도로명 단계까지 가지 못하면 0)"""
+    level, end = 0, start
+    while True:
+        pos = _ADDR_GAP_RE.match(text, end).end()
+        comp = _addr_component(text, pos, level)
+        if comp is None or (level == 0 and comp[0] > _ADDR_SIGUNGU):
+            break
+        level, end = comp
+    if level < _ADDR_DONG:
+        return 0
+    if level == _ADDR_NUMBER:
+        for _ in range(3):
+            m = _ADDR_DETAIL_RE.match(text, end)
+            if not m or not _addr_word_end(text, m.end()):
+                break
+            end = m.end()
+    return end
+
+
+def detect_addresses(text: str) -> list:
+    """행정구역 사전(시/도·시/군/구 트라이)에서 시작해 동/읍/면·도로명·번지까지 이어지는 주소를 한 번의 선형 탐색으로 찾음.
+
+    "서울특별시 강남구 테헤란로 123" 같은 완전한 주소뿐 아니라 "서울 강남구 역삼동", "분당구 정자동 123-4",
+    "경기 양평군 양평읍 양근리" 같은 약칭/부분 주소도 LC 로 탐지합니다 (시/군/구까지만 있는 경우는 제외).
+    """
+    detected = []
+    seen = set()
+    first = ADDRESS_TRIE.first_chars
+    i, n = 0, len(text)
+    while i < n:
+        if text[i] in first and (i == 0 or not _addr_word_char(text[i - 1])):
+            end = _match_address(text, i)
+            if end:
+                addr = text[i:end].strip().rstrip(',')
+                if addr not in seen:
+                    detected.append(Detection("LC", addr, (i, i + len(addr))))
+                    seen.add(addr)
+                i = end
+                continue
+        i += 1
     return detected
 
+
+# ==========================
+# 탐지 파이프라인 (탐지기 등록 + 동시 실행)
+# ==========================
+
+class DetectionPipeline:
+    """탐지기를 플러그인처럼 등록해 두고 한 텍스트에 대해 함께 실행하는 파이프라인.
+
+    heavy=True 로 등록한 모델 기반 탐지기(NER)는 스케줄러 워커에서 돌리고(torch 는 GIL 을 놓음),
+    나머지 가벼운 탐지기는 그동안 호출한 스레드에서 바로 실행합니다.
+    결과는 완료 순서와 관계없이 등록 순서대로 이어 붙이며, 탐지기별 호출 수/소요 시간/탐지 수를 누적합니다.
+    """
+
+    def __init__(self):
+        self._detectors = []
+        self._dedupe = set()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, fn, heavy: bool = False, dedupe: bool = True):
+        """dedupe=True: 같은 (type, value) 를 텍스트당 한 번만 보고하는 탐지기 (블록 단위 병합 시 블록 간 중복 제거)"""
+        with self._lock:
+            self._detectors = [d for d in self._detectors if d[0] != name] + [(name, fn, heavy)]
+            if dedupe:
+                self._dedupe.add(name)
+            else:
+                self._dedupe.discard(name)
+            self._stats.setdefault(name, {"calls": 0, "seconds": 0.0, "items": 0})
+        return fn
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._detectors = [d for d in self._detectors if d[0] != name]
+
+    @property
+    def names(self) -> list:
+        return [d[0] for d in self._detectors]
+
+    def dedupes(self, name: str) -> bool:
+        return name in self._dedupe
+
+    def _timed(self, name, fn, text):
+        t0 = time.perf_counter()
+        items = fn(text)
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            st = self._stats[name]
+            st["calls"] += 1
+            st["seconds"] += elapsed
+            st["items"] += len(items)
+        return items
+
+    def run_each(self, text: str, skip=()) -> dict:
+        """탐지기 이름 → 결과 목록 (등록 순서)"""
+        detectors = [d for d in self._detectors if d[0] not in skip]
+        if not text or not text.strip():
+            return {name: [] for name, _, _ in detectors}
+        heavy = [d for d in detectors if d[2]]
+        futures = {}
+        # 무거운 탐지기는 워커로 먼저 보내고, 가벼운 탐지기는 그동안 현재 스레드에서 실행
+        for name, fn, _ in heavy:
+            futures[name] = scheduler.submit(self._timed, name, fn, text)
+        results = {}
+        for name, fn, is_heavy in detectors:
+            if not is_heavy:
+                results[name] = self._timed(name, fn, text)
+        for name, fut in futures.items():
+            results[name] = scheduler.result(fut)
+        return {name: results[name] for name, _, _ in detectors}
+
+    def run(self, text: str, skip=()) -> list:
+        """모든 탐지기 결과를 등록 순서대로 합친 목록"""
+        merged = []
+        for items in self.run_each(text, skip).values():
+            merged.extend(items)
+        return merged
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: {"calls": st["calls"], "seconds": round(st["seconds"], 6), "items": st["items"]}
+                    for name, st in self._stats.items()}
+
+
+# 등록 순서 = 결과 병합 순서 (정규식 → 주소 → NER → 준식별자)
+detection_pipeline = DetectionPipeline()
+detection_pipeline.register("regex", detect_by_regex)
+detection_pipeline.register("address", detect_addresses)
+detection_pipeline.register("ner", detect_by_ner, heavy=True)
+detection_pipeline.register("quasi", detect_quasi_identifiers, dedupe=False)
+
+# ==========================
+# 증분 텍스트 스캔 (탭/세션 단위)
+# ==========================
+
+SESSION_MARGIN = int(os.getenv("PII_SESSION_MARGIN", "200"))
+SESSION_TTL = float(os.getenv("PII_SESSION_TTL", "600"))
+SESSION_MAX = int(os.getenv("PII_SESSION_MAX", "1000"))
+
+
+_VALUE_RUN_CHARS = frozenset("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz@._%+")
+
+
+def _value_run_joined(text: str, i: int) -> bool:
+    """text[i-1] 과 text[i] 사이가 숫자/영문 값(카드·계좌·전화번호, 이메일 등)의 중간인지.
+    숫자 사이의 공백/하이픈 한 글자는 값의 일부로 봄 (4111 1111 ..., 010-1234-...)"""
+    if i <= 0 or i >= len(text):
+        return False
+    prev, cur = text[i - 1], text[i]
+    if prev in _VALUE_RUN_CHARS and cur in _VALUE_RUN_CHARS:
+        return True
+    if cur in " -" and prev.isdigit():
+        return i + 1 < len(text) and text[i + 1].isdigit()
+    if prev in " -" and cur.isdigit():
+        return i >= 2 and text[i - 2].isdigit()
+    return False
+
+
+class IncrementalTextScanner:
+    """같은 탭에서 이어서 입력된 텍스트는 바뀐 구간(+앞뒤 여유)만 다시 검사하는 세션 캐시.
+
+    직전 텍스트와의 공통 접두/접미를 찾아 변경 구간 [p, n-q) 을 구하고, 앞뒤로 margin 만큼 넓힌 창만
+    scan_fn 으로 다시 검사합니다. 결과는 시작 위치 기준으로 나눠 병합합니다:
+    창 앞쪽 경계(L) 이전에서 시작하는 기존 결과, [L, R) 에서 시작하는 새 결과, R 이후(오프셋 보정)의 기존 결과.
+    경계는 창 안쪽으로 margin/2 떨어져 있어 변경 지점 주변 문맥 규칙도 새로 평가됩니다.
+    경계가 값을 자르지 않도록 L/R 이 숫자/영문 값(카드·전화번호, 이메일 등) 중간이면 값 끝까지, 경계를 가로지르는
+    기존 결과나 R 을 넘어가는(또는 창 끝에서 잘린) 새 결과가 있으면 그 시작/끝까지 넓혀 다시 검사하고,
+    병합 결과는 (유형, 값, 위치) 기준으로 중복을 제거합니다. 위치가 없는 기존 결과
+    (정규화 텍스트에서만 찾은 값)는 새 텍스트의 정규화 형태에 값이 남아 있을 때만 유지합니다.
+    """
+
+    def __init__(self, scan_fn, margin=SESSION_MARGIN, ttl=SESSION_TTL, max_sessions=SESSION_MAX):
+        self.scan_fn = scan_fn
+        self.margin = max(2, margin)
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._sessions:
+            key, (_, _, last) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last < self.ttl:
+                break
+            del self._sessions[key]
+
+    @staticmethod
+    def _shift(item, delta):
+        moved = item.copy()
+        s, e = item["span"]
+        moved["span"] = (s + delta, e + delta)
+        return moved
+
+    def scan(self, key, text: str) -> list:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            prev = self._sessions.pop(key, None)
+
+        if prev is None or not key:
+            items = self.scan_fn(text)
+        else:
+            old_text, old_items, _ = prev
+            items = self._rescan(old_text, old_items, text)
+
+        if key:
+            with self._lock:
+                self._sessions[key] = (text, items, now)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+        return [it.copy() for it in items]
+
+    def _rescan(self, old: str, old_items: list, new: str) -> list:
+        if old == new:
+            return old_items
+        n_old, n_new = len(old), len(new)
+        limit = min(n_old, n_new)
+        p = 0
+        while p < limit and old[p] == new[p]:
+            p += 1
+        q = 0
+        while q < limit - p and old[n_old - 1 - q] == new[n_new - 1 - q]:
+            q += 1
+        delta = n_new - n_old
+        h = self.margin // 2
+
+        def moved(pos):
+            # 기존 텍스트 위치 → 새 텍스트 위치 (변경 지점 뒤는 길이 차만큼 이동)
+            return pos if pos <= p else pos + delta
+
+        spanned = [(it, it["span"][0], moved(it["span"][0])) for it in old_items if it.get("span") is not None]
+        spans = [(it["span"][0], it["span"][1], ns, moved(it["span"][1])) for it, _, ns in spanned]
+
+        # 결과를 새로 받는 구간 [left, right) 과 검사 창 [a, b) (= 구간 + 앞뒤 h 글자의 문맥)
+        left = max(0, p - h)
+        while True:
+            # 앞쪽 경계가 숫자/영문 값 중간이거나 기존 결과를 가로지르면 그 시작 위치로 당김
+            while left > 0 and _value_run_joined(new, left):
+                left -= 1
+            crossing = [s for s, e, _, _ in spans if s < left < e]
+            if not crossing:
+                break
+            left = min(crossing)
+        right = min(n_new, n_new - q + h)
+        while True:
+            # 뒤쪽 경계도 값 중간이거나 (새 위치 기준) 기존 결과를 가로지르면 그 끝 위치로 밂
+            while right < n_new and _value_run_joined(new, right):
+                right += 1
+            crossing = [ne for _, _, ns, ne in spans if left <= ns < right < ne]
+            if crossing:
+                right = max(crossing)
+                continue
+            a = max(0, left - h)
+            b = min(n_new, right + h)
+            # 변경 구간이 텍스트 대부분이면 전체 재검사가 더 단순하고 빠름
+            if b - a >= n_new * 0.8:
+                return self.scan_fn(new)
+            lo, hi = (0 if a == 0 else left), (n_new if b == n_new else right)
+            fresh, reach = [], hi
+            for it in self.scan_fn(new[a:b]):
+                span = it.get("span")
+                if span is None:
+                    fresh.append(it)
+                elif lo <= span[0] + a < hi:
+                    fresh.append(self._shift(it, a))
+                    # 창 끝에서 잘렸을 수 있는 결과, R 을 넘어가는 결과는 그 끝까지 넓혀 다시 검사
+                    reach = max(reach, span[1] + a + (1 if span[1] + a == b < n_new else 0))
+            if reach <= hi:
+                break
+            right = reach
+
+        # 앞쪽 구간의 기존 결과 + 새 결과 + 뒤쪽 구간의 기존 결과(오프셋 보정)
+        merged = [it for it, s, _ in spanned if s < lo]
+        merged += fresh
+        merged += [self._shift(it, delta) for it, s, ns in spanned if s >= lo and ns >= hi]
+        spanless = [it for it in old_items if it.get("span") is None]
+        if spanless:
+            flat = re.sub(r'[\s\-]', '', new)
+            known = {(it.get("type"), re.sub(r'[\s\-]', '', it.get("value") or "")) for it in merged}
+            for it in spanless:
+                value = re.sub(r'[\s\-]', '', it.get("value") or "")
+                if value and value in flat and (it.get("type"), value) not in known:
+                    merged.append(it)
+        # 경계 처리 뒤에도 같은 결과가 두 번 들어가지 않도록 (유형, 값, 위치) 기준으로 한 번만
+        unique, seen = [], set()
+        for it in merged:
+            key = (it.get("type"), it.get("value"), it.get("span"))
+            if key not in seen:
+                seen.add(key)
+                unique.append(it)
+        logging.debug(f"증분 스캔: {n_new}글자 중 {b - a}글자만 재검사")
+        return unique
+
+
+# ==========================
+# 블록 단위 차등 스캔 (문서 수정본 재업로드)
+# ==========================
+
+# 블록 목표 크기(글자), 블록 앞뒤로 함께 검사할 문맥 글자 수, 보관할 최대 블록 수 (0 이면 사용 안 함)
+BLOCK_TARGET_CHARS = max(64, int(os.getenv("PII_BLOCK_CHARS", "2000")))
+BLOCK_MARGIN = max(0, int(os.getenv("PII_BLOCK_MARGIN", "100")))
+BLOCK_CACHE_SIZE = int(os.getenv("PII_BLOCK_CACHE_SIZE", "4096"))
+_WORD_RE = re.compile(r'\S+')
+
+
+def split_blocks(text: str, target: int = BLOCK_TARGET_CHARS) -> list:
+    """텍스트를 내용 기반 경계의 블록 [(시작, 끝), ...] 으로 나눔 (빈 구간 없이 이어짐).
+
+    파서가 공백을 합쳐 문단/페이지/시트 구분이 남지 않는 형식이 많아, 단어 해시가 1/k 조건을 만족하는
+    단어 뒤에서 끊습니다. 경계가 위치가 아니라 주변 단어로 정해지므로 앞부분이 수정돼도 뒤쪽 경계는 그대로입니다.
+    """
+    n = len(text)
+    if n <= target:
+        return [(0, n)] if n else []
+    min_len, max_len = target // 4, target * 4
+    k = max(2, target // 8)
+    blocks, start = [], 0
+    for m in _WORD_RE.finditer(text):
+        end = m.end()
+        length = end - start
+        if length < min_len:
+            continue
+        if length >= max_len or zlib.crc32(m.group().encode("utf-8")) % k == 0:
+            blocks.append((start, end))
+            start = end
+    if start < n:
+        blocks.append((start, n))
+    return blocks
+
+
+class BlockScanCache:
+    """문서 본문을 블록으로 나눠 블록 해시 → 탐지 결과를 보관하고, 처음 보는 블록만 다시 검사하는 캐시.
+
+    키는 블록에 앞뒤 margin 글자를 붙인 창의 해시(+규칙 세트/탐지기 구성)이고, 창을 검사한 결과 중
+    시작 위치가 블록 안인 항목만 그 블록의 결과로 저장합니다 (IncrementalTextScanner 와 같은 소유 경계).
+    새 블록이 이어진 구간은 창 하나로 묶어 검사하고, 대부분이 새 블록이면 전체를 한 번에 검사해 블록별로 나눠 저장합니다.
+
+    위치가 없는 항목(정규화 텍스트에서만 찾은 값)은 어느 블록 것인지 알 수 없어 저장하지 않고, 그런 항목을 낸
+    탐지기만 블록에 표시해 두었다가 결과를 조립할 때 그 탐지기를 전체 텍스트로 다시 실행해 얻습니다.
+    처리 예산 때문에 탐지가 잘린 결과는 부분 결과이므로 저장하지 않습니다.
+    """
+
+    def __init__(self, pipeline, target=BLOCK_TARGET_CHARS, margin=BLOCK_MARGIN, max_blocks=BLOCK_CACHE_SIZE):
+        self.pipeline = pipeline
+        self.target = target
+        self.margin = margin
+        self.max_blocks = max_blocks
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is not None:
+                self._store.move_to_end(key)
+        return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._store[key] = entry
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_blocks:
+                self._store.popitem(last=False)
+
+    @staticmethod
+    def _partition(results: dict, blocks: list, offset: int, lo: int, hi: int) -> list:
+        """탐지기별 결과(offset 기준 span)를 blocks[lo:hi] 각각의 ({탐지기: [블록 시작 기준 항목]}, 위치 없는 항목을 낸 탐지기) 로 나눔"""
+        starts = [s for s, _ in blocks[lo:hi]]
+        first, last = blocks[lo][0], blocks[hi - 1][1]
+        parts = [{name: [] for name in results} for _ in starts]
+        spanless = frozenset(name for name, items in results.items() if any(it.get("span") is None for it in items))
+        for name, items in results.items():
+            for it in items:
+                span = it.get("span")
+                if span is None:
+                    continue
+                pos = span[0] + offset
+                if pos < first or pos >= last:
+                    continue
+                j = bisect.bisect_right(starts, pos) - 1
+                moved = it.copy()
+                moved["span"] = (pos - starts[j], span[1] + offset - starts[j])
+                parts[j][name].append(moved)
+        return [(part, spanless) for part in parts]
+
+    def _merge(self, blocks: list, entries: list, full: dict) -> list:
+        """블록 결과를 탐지기 등록 순서로 합침. 값 단위로 중복을 거르는 탐지기는 블록 사이 중복도 제거.
+        full 은 전체 텍스트로 다시 실행한 탐지기 결과이며, 그중 위치 없는 항목만 덧붙임"""
+        merged = []
+        for name in self.pipeline.names:
+            seen = set() if self.pipeline.dedupes(name) else None
+            rows = [(s, it) for (s, _), (items, _) in zip(blocks, entries) for it in items.get(name, ())]
+            rows.extend((0, it) for it in full.get(name, ()) if it.get("span") is None)
+            for s, it in rows:
+                if seen is not None:
+                    key = (it.get("type"), it.get("value"))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                moved = it.copy()
+                span = it.get("span")
+                if span is not None:
+                    moved["span"] = (span[0] + s, span[1] + s)
+                merged.append(moved)
+        return merged
+
+    def scan(self, text: str) -> list:
+        blocks = split_blocks(text, self.target)
+        if not blocks:
+            return []
+        if self.max_blocks <= 0:
+            return self.pipeline.run(text)
+        rule_set = get_rule_set()
+        salt = (rule_set.source, rule_set.mtime, tuple(self.pipeline.names))
+        m = self.margin
+        keys = [content_key(text[max(0, s - m):e + m], *salt) for s, e in blocks]
+        entries = [self._get(k) for k in keys]
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        with self._lock:
+            self.hits += len(blocks) - len(missing)
+            self.misses += len(missing)
+        budget = current_budget()
+
+        # 대부분 새 블록이면 전체를 한 번에 검사 (NER 배치 효율, 결과도 기존 전체 검사와 동일)
+        if len(missing) >= len(blocks) * 0.8:
+            results = self.pipeline.run_each(text)
+            if "detect" not in budget.truncated:
+                for key, entry in zip(keys, self._partition(results, blocks, 0, 0, len(blocks))):
+                    self._put(key, entry)
+            return [it for items in results.values() for it in items]
+
+        # 처음 보는 블록이 이어진 구간마다 앞뒤 문맥을 붙인 창 하나로 검사
+        for _, run in itertools.groupby(enumerate(missing), lambda x: x[1] - x[0]):
+            idxs = [i for _, i in run]
+            lo, hi = idxs[0], idxs[-1] + 1
+            a, b = max(0, blocks[lo][0] - m), min(len(text), blocks[hi - 1][1] + m)
+            results = self.pipeline.run_each(text[a:b])
+            for i, entry in zip(range(lo, hi), self._partition(results, blocks, a, lo, hi)):
+                entries[i] = entry
+            if "detect" not in budget.truncated:
+                for i in range(lo, hi):
+                    self._put(keys[i], entries[i])
+
+        # 위치 없는 항목을 낸 적 있는 탐지기만 전체 텍스트로 다시 실행
+        rescan = set().union(*(spanless for _, spanless in entries))
+        full = self.pipeline.run_each(text, skip=[n for n in self.pipeline.names if n not in rescan]) if rescan else {}
+        logging.debug(f"블록 차등 스캔: 블록 {len(blocks)}개 중 {len(missing)}개만 재검사 (전체 재실행: {sorted(rescan)})")
+        return self._merge(blocks, entries, full)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"blocks": len(self._store), "max_blocks": self.max_blocks, "hits": self.hits, "misses": self.misses}
+
+
+block_scanner = BlockScanCache(detection_pipeline)
+
 # ==========================
 # 조합 위험도 (상세 메시지 버전)
 # ==========================
@@ -568,12 +1969,90 @@ def _translate_type(item_type: str) -> str:
     }
     return type_map.get(item_type, item_type)
 
+# 근접 창: 서로 다른 종류의 준식별자가 이 거리 안에 함께 있어야 조합위험으로 판단
+COMB_WINDOW_CHARS = int(os.getenv("PII_COMB_WINDOW_CHARS", "500"))
+# 0보다 크면 글자 수 대신 문단(줄) 수로 창을 잡음
+COMB_WINDOW_PARAGRAPHS = int(os.getenv("PII_COMB_WINDOW_PARAGRAPHS", "0"))
+
+
+def _locate_quasis(quasis, text, line_starts):
+    """준식별자마다 (정렬 좌표, 시작, 끝, 항목) 을 만든다. 좌표는 글자 위치 또는 문단 번호."""
+    located = []
+    for it in quasis:
+        span = it.get('span')
+        if span and span[0] is not None:
+            s, e = span
+        else:
+            # 정규화 과정에서 span 을 잃은 항목은 값으로 위치를 복원
+            s = text.find(str(it.get('value', ''))) if text else -1
+            if s < 0:
+                if len(text or "") > COMB_WINDOW_CHARS:
+                    continue
+                s = 0
+            e = s + len(str(it.get('value', '')))
+        coord = bisect.bisect_right(line_starts, s) - 1 if COMB_WINDOW_PARAGRAPHS > 0 else s
+        located.append((coord, s, e, it))
+    located.sort(key=lambda x: (x[0], x[1]))
+    return located
+
+
+def find_quasi_clusters(quasis, text):
+    """스윕 라인으로 창 안에 서로 다른 준식별자가 2종 이상 모인 구간(클러스터)을 찾는다.
+
+    정렬 O(n log n) 뒤 두 포인터로 창을 밀면서 타입별 개수를 유지하고,
+    조건을 만족하는 창이 겹치면 하나의 클러스터로 합칩니다.
+    """
+    text = text or ""
+    line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+    located = _locate_quasis(quasis, text, line_starts)
+    window = COMB_WINDOW_PARAGRAPHS if COMB_WINDOW_PARAGRAPHS > 0 else COMB_WINDOW_CHARS
+
+    ranges = []
+    counts = Counter()
+    left = 0
+    for right, (coord, _, _, it) in enumerate(located):
+        counts[it.get('type')] += 1
+        while coord - located[left][0] > window:
+            t = located[left][3].get('type')
+            counts[t] -= 1
+            if not counts[t]:
+                del counts[t]
+            left += 1
+        if len(counts) >= 2:
+            if ranges and left <= ranges[-1][1]:
+                ranges[-1][1] = right
+            else:
+                ranges.append([left, right])
+
+    clusters = []
+    for lo, hi in ranges:
+        members = located[lo:hi + 1]
+        items = [m[3] for m in members]
+        start = min(m[1] for m in members)
+        end = max(m[2] for m in members)
+        types = list(dict.fromkeys(it.get('type') for it in items))
+        types_trans = sorted(set(_translate_type(t) for t in types))
+        line = bisect.bisect_right(line_starts, start)
+        clusters.append({
+            'level': 'high',
+            'start': start,
+            'end': end,
+            'line': line,
+            'types': types,
+            'items': items,
+            'message': f"{line}번째 줄 부근 준식별자({','.join(types_trans)}){len(items)}건 → 개인 특정 가능성",
+        })
+    return clusters
+
+
 def analyze_combination_risk(detected_items, text):
     # 변경된 정책:
     # - 개인 식별 의심(combination risk)은 오직 '준식별자'들의 조합에서만 판단합니다.
     # - 식별자(identifier) 항목은 조합 판단에서 제외합니다.
     # - 준식별자에는 'PS'(이름)와 'ip'를 포함하며, 'student_id'는 준식별자에서 제외합니다.
     # - 같은 종류의 준식별자만 여러개 존재하는 경우(예: 이름 2개)에는 조합위험으로 간주하지 않습니다.
+    # - 서로 다른 준식별자가 근접 창(PII_COMB_WINDOW_*) 안에 함께 있을 때만 조합으로 보고,
+    #   위험은 클러스터(위치 포함) 단위로 보고합니다. 1쪽의 이름과 90쪽의 직위는 조합이 아닙니다.
 
     if not detected_items or len(detected_items) < 2:
         return None
@@ -584,146 +2063,726 @@ def analyze_combination_risk(detected_items, text):
     if q_cnt < 2:
         return None
 
-    # 집계: 타입별 개수와 고유 타입 수
-    q_types = [q.get('type') for q in quasis]
-    unique_q_types = list(dict.fromkeys(q_types))
-    unique_count = len(unique_q_types)
-
     # 같은 종류의 준식별자만 탐지된 경우(예: 이름만 2개)는 조합위험으로 간주하지 않음
-    if unique_count <= 1:
+    if len(set(q.get('type') for q in quasis)) <= 1:
         return None
 
-    # 이제 준식별자 중 서로 다른 종류가 2종 이상 존재하면 조합위험으로 판단
-    # 등급은 단순화: 서로다른 준식별자 2종 이상이면 'high'
+    clusters = find_quasi_clusters(quasis, text)
+    if not clusters:
+        return None
+
+    # 등급은 단순화: 창 안에 서로다른 준식별자 2종 이상이면 'high'
     risk_level = 'high'
-    # 메시지 구성 (기존 스타일 유지)
-    q_types_trans = sorted(list(set([_translate_type(t) for t in unique_q_types])))
-    q_str = f"준식별자({','.join(q_types_trans)}){q_cnt}건"
-    risk_msg = f"{q_str} → 준식별자 조합으로 개인 특정 가능성" if q_cnt > 0 else None
-    risk_items = quasis
+    risk_items = [it for c in clusters for it in c['items']]
+    types = list(dict.fromkeys(it.get('type') for it in risk_items))
+    q_types_trans = sorted(set(_translate_type(t) for t in types))
+    q_str = f"준식별자({','.join(q_types_trans)}){len(risk_items)}건"
+    risk_msg = f"{q_str} → 준식별자 조합으로 개인 특정 가능성"
+    if len(clusters) > 1:
+        risk_msg += f" ({len(clusters)}개 구간)"
 
     return {
         'level': risk_level,
         'message': risk_msg,
         'items': risk_items,
-        'counts': {'quasi': q_cnt}
+        'clusters': clusters,
+        'counts': {'quasi': q_cnt, 'clustered': len(risk_items), 'clusters': len(clusters)}
     }
 
 
 # ==========================
-# OCR
+# 파일 버퍼 (업로드 1회 기록, 이후 복사 없이 공유)
 # ==========================
 
-def run_ocr_on_single_image(image_bytes: bytes) -> str:
-    if reader is None or Image is None:
+# 이 크기 이상인 업로드는 임시 파일에 한 번만 기록하고 mmap 으로 읽음
+SPOOL_THRESHOLD = int(os.getenv("PII_SPOOL_THRESHOLD", str(8 * 1024 * 1024)))
+_B64_CHUNK = 4 * 1024 * 1024  # 4의 배수 (base64 디코딩 단위)
+
+# 지우지 못한 임시 업로드 파일 (Windows 에서 아직 매핑/열림 상태 등) - 다음 close() 와 프로세스 종료 시 다시 삭제
+_pending_removals = set()
+_pending_lock = threading.Lock()
+
+
+def _remove_upload(path: str = None):
+    """임시 업로드 파일을 삭제하고, 이전에 실패한 파일도 다시 시도. 실패는 숨기지 않고 경고로 남김"""
+    with _pending_lock:
+        if path:
+            _pending_removals.add(path)
+        for p in list(_pending_removals):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                if p == path:
+                    logging.warning(f"임시 업로드 파일 삭제 실패 (나중에 다시 시도): {p} ({e})")
+                continue
+            _pending_removals.discard(p)
+
+
+def _remove_uploads_at_exit():
+    _remove_upload()
+    for p in _pending_removals:
+        logging.error(f"임시 업로드 파일을 삭제하지 못했습니다. 직접 삭제하세요: {p}")
+
+
+atexit.register(_remove_uploads_at_exit)
+
+
+class _BufferReader(io.RawIOBase):
+    """memoryview 위의 독립적인 읽기 위치를 가진 파일 객체 (읽은 구간만 복사)"""
+
+    def __init__(self, view):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        data = bytes(self._view[self._pos:end])
+        self._pos = max(self._pos, end)
+        return data
+
+    def readall(self):
+        return self.read(-1)
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+class FileBuffer:
+    """업로드 파일을 한 번만 기록해 두고 모든 파서가 복사 없이 읽도록 하는 버퍼.
+
+    작은 파일은 디코딩한 bytes 를 그대로 보관하고, 큰 파일은 임시 파일에 기록한 뒤 mmap 으로 엽니다.
+    open() 은 서로 독립적인 읽기 위치를 가진 파일 객체를 돌려주므로 여러 스레드에서 동시에 읽을 수 있고,
+    디스크에 기록된 경우 path 로 PyMuPDF/xlrd 가 파일을 직접 열 수 있습니다.
+    여러 소유자가 나눠 쓸 때는 각자 retain() 후 close() 하며, 마지막 close() 에서 실제로 해제됩니다.
+    buf[a:b] 는 복사 없는 memoryview 를 돌려주며 따로 추적하지 않습니다. 버린 슬라이스는 바로 해제되고,
+    오래 들고 있을 슬라이스는 `with buf[a:b] as part:` 로 써서 close() 전에 놓아 주어야 mmap 이 닫힙니다.
+    """
+
+    def __init__(self, data: bytes = None, path: str = None):
+        self.data = data
+        self.path = path
+        self._file = None
+        self._mmap = None
+        self._refs = 1
+        self._refs_lock = threading.Lock()
+        if path is not None:
+            self._file = open(path, "rb")
+            try:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except Exception:
+                self._file.close()
+                raise
+            self.view = memoryview(self._mmap)
+        else:
+            self.view = memoryview(data)
+
+    @classmethod
+    def from_base64(cls, b64: str) -> "FileBuffer":
+        if any(c in b64 for c in " \r\n"):
+            b64 = re.sub(r"\s+", "", b64)
+        if len(b64) * 3 // 4 < SPOOL_THRESHOLD:
+            return cls(base64.b64decode(b64))
+        # 청크 단위로 디코딩하면서 임시 파일에 바로 기록 (디코딩된 전체 bytes 를 만들지 않음)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".upload") as tmp:
+            for i in range(0, len(b64), _B64_CHUNK):
+                tmp.write(base64.b64decode(b64[i:i + _B64_CHUNK]))
+            path = tmp.name
+        try:
+            return cls(path=path)
+        except Exception:
+            _remove_upload(path)
+            raise
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, key):
+        return self.view[key]
+
+    def open(self) -> io.RawIOBase:
+        return _BufferReader(self.view)
+
+    def retain(self) -> "FileBuffer":
+        with self._refs_lock:
+            self._refs += 1
+        return self
+
+    def close(self):
+        """view 를 해제하고 mmap/파일을 닫은 뒤 임시 파일을 삭제 (삭제 실패 시 종료 시까지 재시도).
+        close() 이후 open() 으로 받은 읽기 객체를 쓰면 ValueError 가 납니다."""
+        with self._refs_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        if self.path is None:
+            return
+        path, self.path = self.path, None
+        try:
+            self.view.release()
+        except BufferError:
+            pass
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 아직 놓지 않은 슬라이스나 외부(numpy 등)가 버퍼를 잡고 있음 - Windows 에서는 이 경우 삭제가 미뤄짐
+            logging.warning(f"FileBuffer: 외부에서 참조 중인 버퍼가 있어 mmap 을 닫지 못했습니다: {path}")
+        self._file.close()
+        _remove_upload(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _open_stream(data):
+    """bytes 또는 FileBuffer 를 읽기 전용 파일 객체로 (FileBuffer 는 복사 없음)"""
+    if isinstance(data, FileBuffer):
+        return data.open()
+    return io.BytesIO(data)
+
+
+def _as_view(data):
+    return data.view if isinstance(data, FileBuffer) else data
+
+
+def _open_pdf(data):
+    """PyMuPDF 문서 열기. 파일 핸들을 잡으므로 반드시 with 로 사용"""
+    if isinstance(data, FileBuffer):
+        if data.path:
+            return fitz.open(data.path)
+        data = data.data
+    return fitz.open(stream=data, filetype="pdf")
+
+# ==========================
+# HWP 5.x 바이너리 파서
+# ==========================
+
+# FileHeader 속성 비트 (HWP 5.0 스펙 "파일 인식 정보")
+HWP_FLAG_COMPRESSED = 0x01
+HWP_FLAG_PASSWORD = 0x02
+HWP_FLAG_DISTRIBUTED = 0x04
+
+HWPTAG_BEGIN = 0x10
+HWPTAG_PARA_TEXT = HWPTAG_BEGIN + 51
+
+# PARA_TEXT 제어 문자: 인라인/확장 컨트롤은 코드 포함 8 WCHAR(16바이트)를 차지
+_HWP_EXTENDED_CTRL = {1, 2, 3, 11, 12, 14, 15, 16, 17, 18, 21, 22, 23}
+_HWP_INLINE_CTRL = {4, 5, 6, 7, 8, 9, 19, 20}
+_HWP_CHAR_MAP = {9: "\t", 10: "\n", 13: "\n", 24: "-", 30: " ", 31: " "}
+
+HWP_PICTURE_EXTS = (".bmp", ".jpg", ".jpeg", ".gif", ".png", ".tif", ".tiff", ".wmf", ".emf")
+_HWP_READ_CHUNK = 64 * 1024
+
+
+def hwp_file_flags(ole) -> int:
+    header = ole.openstream("FileHeader").read(40)
+    if not header.startswith(b"HWP Document File"):
+        raise ValueError("HWP 5.x 문서가 아닙니다 (FileHeader 서명 불일치)")
+    return int.from_bytes(header[36:40], "little")
+
+
+def iter_hwp_records(stream, compressed: bool):
+    """레코드 스트림을 청크 단위로 압축 해제하며 (tag_id, level, payload)를 순서대로 돌려줍니다."""
+    inflater = zlib.decompressobj(-15) if compressed else None
+    buf = bytearray()
+    pos = 0
+    eof = False
+    while True:
+        # 버퍼에 완성된 레코드가 있으면 모두 소비
+        while len(buf) - pos >= 4:
+            header = int.from_bytes(buf[pos:pos + 4], "little")
+            tag_id = header & 0x3FF
+            level = (header >> 10) & 0x3FF
+            size = (header >> 20) & 0xFFF
+            start = pos + 4
+            if size == 0xFFF:
+                if len(buf) - start < 4:
+                    break
+                size = int.from_bytes(buf[start:start + 4], "little")
+                start += 4
+            if len(buf) - start < size:
+                break
+            yield tag_id, level, bytes(buf[start:start + size])
+            pos = start + size
+        if eof:
+            return
+        del buf[:pos]
+        pos = 0
+        chunk = stream.read(_HWP_READ_CHUNK)
+        if not chunk:
+            eof = True
+            if inflater is not None:
+                buf += inflater.flush()
+            continue
+        buf += inflater.decompress(chunk) if inflater is not None else chunk
+
+
+def decode_hwp_para_text(payload: bytes) -> str:
+    """HWPTAG_PARA_TEXT 본문(UTF-16LE)에서 컨트롤 문자를 걷어내고 텍스트만 반환"""
+    out = []
+    n = len(payload) // 2
+    i = 0
+    while i < n:
+        code = payload[2 * i] | (payload[2 * i + 1] << 8)
+        if code >= 32:
+            # 일반 문자 구간은 한 번에 디코딩
+            j = i + 1
+            while j < n and (payload[2 * j] | (payload[2 * j + 1] << 8)) >= 32:
+                j += 1
+            out.append(payload[2 * i:2 * j].decode("utf-16-le", errors="ignore"))
+            i = j
+            continue
+        if code in _HWP_EXTENDED_CTRL or code in _HWP_INLINE_CTRL:
+            if code == 9:
+                out.append("\t")
+            i += 8
+            continue
+        out.append(_HWP_CHAR_MAP.get(code, ""))
+        i += 1
+    return "".join(out)
+
+
+def _hwp_section_key(entry):
+    num = re.sub(r"\D", "", entry[-1])
+    return int(num) if num else 0
+
+
+def extract_hwp_text(ole) -> str:
+    """BodyText/Section* 레코드 스트림에서 문단 텍스트(HWPTAG_PARA_TEXT)를 추출"""
+    flags = hwp_file_flags(ole)
+    if flags & HWP_FLAG_PASSWORD:
+        raise ValueError("[ERROR] 암호화된 HWP 문서")
+    if flags & HWP_FLAG_DISTRIBUTED:
+        # 배포용 문서는 본문이 ViewText 에 암호화되어 있어 미리보기 텍스트만 사용 가능
         return ""
+    compressed = bool(flags & HWP_FLAG_COMPRESSED)
+    sections = sorted((e for e in ole.listdir() if len(e) == 2 and e[0] == "BodyText"), key=_hwp_section_key)
+    paragraphs = []
+    budget = current_budget()
+    for entry in sections:
+        if not budget.ok("parse"):
+            break
+        stream = ole.openstream(entry)
+        for tag_id, _, payload in iter_hwp_records(stream, compressed):
+            if tag_id == HWPTAG_PARA_TEXT:
+                if len(paragraphs) % 1000 == 999 and not budget.ok("parse"):
+                    break
+                para = decode_hwp_para_text(payload).strip()
+                if para:
+                    paragraphs.append(para)
+    return "\n".join(paragraphs)
+
+
+def iter_hwp_pictures(ole):
+    """BinData 중 그림 파일만 (스트림 이름, 압축 해제된 바이트)로 돌려줌 (OLE 개체 등은 제외)"""
     try:
-        # BytesIO 객체 생성 및 위치 초기화
-        img_io = io.BytesIO(image_bytes)
-        img_io.seek(0)
-        
-        # 이미지 열기 시도
-        img = Image.open(img_io)
-        
-        # 이미지가 유효한지 확인
-        img.verify()
-        
-        # verify() 후에는 다시 열어야 함
-        img_io.seek(0)
-        img = Image.open(img_io)
-        
-        # RGB로 변환
+        compressed = bool(hwp_file_flags(ole) & HWP_FLAG_COMPRESSED)
+    except Exception:
+        compressed = False
+    for entry in ole.listdir():
+        if entry[0] != "BinData" or not entry[-1].lower().endswith(HWP_PICTURE_EXTS):
+            continue
+        data = ole.openstream(entry).read()
+        if compressed:
+            try:
+                data = zlib.decompressobj(-15).decompress(data)
+            except zlib.error:
+                # 문서 설정과 달리 개별 BinData 가 비압축으로 저장된 경우
+                pass
+        yield "/".join(entry), data
+
+# ==========================
+# 구버전 OLE2 바이너리 (DOC / PPT)
+# ==========================
+
+# Word 97-2003 FIB 오프셋
+_DOC_FIB_FLAGS = 0x000A
+_DOC_FIB_FCCLX = 0x01A2
+_DOC_FLAG_WHICH_TABLE = 0x0200
+_DOC_FLAG_ENCRYPTED = 0x0100
+# 필드 코드(\x13 ~ \x14)는 표시 텍스트가 아니므로 제거하고, 셀/행 표시(\x07)는 셀 경계로 치환
+_DOC_FIELD_CODE = re.compile(r"\x13[^\x13\x14\x15]*\x14?")
+_DOC_CTRL_MAP = str.maketrans({"\r": "\n", "\x0b": "\n", "\x0c": "\n", "\x07": "\t", "\x15": None, "\x01": None, "\x08": None})
+
+# PowerPoint 레코드 타입
+_PPT_TEXT_CHARS_ATOM = 0x0FA0
+_PPT_TEXT_BYTES_ATOM = 0x0FA8
+_PPT_MAIN_MASTER = 0x03F8
+_PPT_BLIP_TYPES = range(0xF01A, 0xF118)
+
+
+def extract_doc_text(ole) -> str:
+    """WordDocument 스트림의 조각 테이블(piece table)을 따라 본문 텍스트를 복원"""
+    word = ole.openstream("WordDocument").read()
+    flags = int.from_bytes(word[_DOC_FIB_FLAGS:_DOC_FIB_FLAGS + 2], "little")
+    if flags & _DOC_FLAG_ENCRYPTED:
+        raise ValueError("[ERROR] 암호화된 DOC 문서")
+    table_name = "1Table" if flags & _DOC_FLAG_WHICH_TABLE else "0Table"
+    fc_clx = int.from_bytes(word[_DOC_FIB_FCCLX:_DOC_FIB_FCCLX + 4], "little")
+    lcb_clx = int.from_bytes(word[_DOC_FIB_FCCLX + 4:_DOC_FIB_FCCLX + 8], "little")
+    clx = ole.openstream(table_name).read()[fc_clx:fc_clx + lcb_clx]
+
+    # Clx = Prc* (0x01) + Pcdt (0x02)
+    pos = 0
+    while pos < len(clx) and clx[pos] == 0x01:
+        pos += 3 + int.from_bytes(clx[pos + 1:pos + 3], "little")
+    if pos >= len(clx) or clx[pos] != 0x02:
+        raise ValueError("DOC 조각 테이블(Pcdt)을 찾을 수 없습니다")
+    lcb = int.from_bytes(clx[pos + 1:pos + 5], "little")
+    plc = clx[pos + 5:pos + 5 + lcb]
+    n = (lcb - 4) // 12
+    cps = [int.from_bytes(plc[i * 4:i * 4 + 4], "little") for i in range(n + 1)]
+    pieces = []
+    for i in range(n):
+        pcd = plc[(n + 1) * 4 + i * 8:(n + 1) * 4 + (i + 1) * 8]
+        fc = int.from_bytes(pcd[2:6], "little")
+        cch = cps[i + 1] - cps[i]
+        if fc & 0x40000000:
+            start = (fc & 0x3FFFFFFF) // 2
+            pieces.append(word[start:start + cch].decode("cp1252", errors="ignore"))
+        else:
+            start = fc & 0x3FFFFFFF
+            pieces.append(word[start:start + 2 * cch].decode("utf-16-le", errors="ignore"))
+    text = _DOC_FIELD_CODE.sub("", "".join(pieces))
+    return text.translate(_DOC_CTRL_MAP)
+
+
+def _iter_ppt_records(data: bytes, start: int = 0, end: int = None):
+    """PowerPoint 레코드를 선형으로 순회 (컨테이너는 헤더만 건너뛰고 내부로 진입, 마스터 슬라이드는 통째로 건너뜀)"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        ver_inst = int.from_bytes(data[pos:pos + 2], "little")
+        rec_type = int.from_bytes(data[pos + 2:pos + 4], "little")
+        rec_len = int.from_bytes(data[pos + 4:pos + 8], "little")
+        body = pos + 8
+        if (ver_inst & 0x0F) == 0x0F and rec_type != _PPT_MAIN_MASTER:
+            pos = body
+            continue
+        yield ver_inst >> 4, rec_type, body, rec_len
+        pos = body + rec_len
+
+
+def extract_ppt_text(ole) -> str:
+    """PowerPoint Document 스트림의 TextCharsAtom / TextBytesAtom 을 모아 슬라이드 텍스트를 추출"""
+    data = ole.openstream("PowerPoint Document").read()
+    texts = []
+    for _, rec_type, body, rec_len in _iter_ppt_records(data):
+        if rec_type == _PPT_TEXT_CHARS_ATOM:
+            texts.append(data[body:body + rec_len].decode("utf-16-le", errors="ignore"))
+        elif rec_type == _PPT_TEXT_BYTES_ATOM:
+            texts.append(data[body:body + rec_len].decode("latin-1"))
+    return "\n".join(t.replace("\r", "\n").replace("\x0b", "\n") for t in texts)
+
+
+def iter_ppt_pictures(ole):
+    """Pictures 스트림의 BLIP 레코드에서 PNG/JPEG 본문만 (이름, 바이트)로 돌려줌"""
+    if not ole.exists("Pictures"):
+        return
+    data = ole.openstream("Pictures").read()
+    for idx, (_, rec_type, body, rec_len) in enumerate(_iter_ppt_records(data)):
+        if rec_type not in _PPT_BLIP_TYPES:
+            continue
+        blip = data[body:body + rec_len]
+        # BLIP 헤더(UID 16~32바이트 + 태그) 뒤에서 이미지 서명을 찾음
+        for sig in (b"\x89PNG", b"\xff\xd8\xff"):
+            at = blip.find(sig, 0, 64)
+            if at >= 0:
+                yield f"Pictures/blip{idx + 1}", blip[at:]
+                break
+
+# ==========================
+# 스트리밍 XML 추출 (DOCX / PPTX / HWPX)
+# ==========================
+
+# OOXML(w:, a:)과 OWPML(hp:)은 문단/셀/텍스트 요소의 로컬 이름이 같아 하나의 추출기로 처리
+_XML_TEXT_TAGS = {"t"}
+_XML_PARA_TAGS = {"p"}
+_XML_CELL_TAGS = {"tc"}
+_XML_BREAK_TAGS = {"br", "cr", "lineBreak"}
+_XML_TAB_TAGS = {"tab"}
+
+
+def _xml_inline_text(elem) -> str:
+    """<hp:t>가<hp:tab/>나</hp:t> 처럼 텍스트 요소 안에 섞인 자식 요소와 tail 텍스트까지 이어 붙임"""
+    out = [elem.text or ""]
+    for child in elem:
+        name = child.tag.rsplit("}", 1)[-1]
+        if name in _XML_TAB_TAGS:
+            out.append("\t")
+        elif name in _XML_BREAK_TAGS:
+            out.append("\n")
+        out.append(_xml_inline_text(child))
+        out.append(child.tail or "")
+    return "".join(out)
+
+
+def iter_xml_text(fileobj):
+    """XML 파트를 iterparse 로 스트리밍하면서 텍스트 조각과 경계 문자(문단 \\n, 셀/탭 \\t)를 순서대로 돌려줍니다.
+
+    처리가 끝난 요소는 비우고 부모에서 떼어내므로(빈 요소가 루트 아래 쌓이지 않음) 메모리는 파트 전체가 아니라
+    현재 문단 크기(+ 파서가 미리 읽은 구간)에 비례합니다.
+    """
+    in_text = 0
+    parents = []
+    for event, elem in ET.iterparse(fileobj, events=("start", "end")):
+        name = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            parents.append(elem)
+            if name in _XML_TEXT_TAGS:
+                in_text += 1
+            continue
+        parents.pop()
+        if name in _XML_TEXT_TAGS:
+            in_text -= 1
+            if in_text == 0:
+                yield _xml_inline_text(elem)
+        elif in_text:
+            # 텍스트 요소 내부 자식은 부모의 itertext() 에서 처리
+            continue
+        elif name in _XML_PARA_TAGS or name in _XML_BREAK_TAGS:
+            yield "\n"
+        elif name in _XML_CELL_TAGS or name in _XML_TAB_TAGS:
+            yield "\t"
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
+def extract_zip_xml_text(z, names) -> str:
+    """ZIP 컨테이너의 XML 파트들을 순서대로 스트리밍 추출 (깨진 파트는 태그 제거 방식으로 대체)"""
+    parts = []
+    for name in names:
+        try:
+            with z.open(name) as f:
+                parts.append("".join(iter_xml_text(f)))
+        except ET.ParseError:
+            data = z.read(name).decode("utf-8", errors="ignore")
+            parts.append(re.sub('<[^>]+>', ' ', data))
+    return "\n".join(parts)
+
+
+def _xml_part_key(name):
+    num = re.search(r"(\d+)\.xml$", name)
+    return (int(num.group(1)) if num else 0, name)
+
+# ==========================
+# OCR
+# ==========================
+
+# 배치 OCR 설정
+# - OCR_BATCH_SIZE: 한 번에 EasyOCR에 넘기는 이미지 수 (인식 단계 batch_size에도 동일 적용)
+# - OCR_WORKERS: EasyOCR 내부 DataLoader 워커 수 (고정)
+# - OCR_CANVAS_SIZES: 이미지를 붙일 공용 캔버스의 변 길이(px). 가로/세로를 각각 이 중 가장 작은 값 이상으로 맞춰
+#   크기가 제각각인 이미지도 몇 가지 캔버스로 모여 같은 배치에 들어감 (가장 큰 값을 넘는 변은 256px 단위로 패딩)
+OCR_BATCH_SIZE = max(1, int(os.getenv("PII_OCR_BATCH_SIZE", "8")))
+OCR_WORKERS = max(0, int(os.getenv("PII_OCR_WORKERS", "0")))
+OCR_CANVAS_SIZES = sorted({max(32, int(s)) for s in os.getenv("PII_OCR_CANVAS_SIZES", "320,640,960,1280,1920,2560").split(",")
+                           if s.strip()})
+_OCR_OVERSIZE_STEP = 256
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+
+
+def _load_ocr_image(src, enhance_contrast=False):
+    """bytes / PIL.Image / ndarray 를 OCR 입력용 RGB ndarray로 변환 (실패 시 None)"""
+    try:
+        if isinstance(src, np.ndarray):
+            return src
+        if isinstance(src, (bytes, bytearray, memoryview, FileBuffer)):
+            img_io = _open_stream(src)
+            # 이미지가 유효한지 확인 (verify() 후에는 다시 열어야 함)
+            Image.open(img_io).verify()
+            img_io.seek(0)
+            img = Image.open(img_io)
+        else:
+            img = src
         if img.mode != 'RGB':
             img = img.convert('RGB')
-        
-        result = reader.readtext(np.array(img))
-        return "\n".join([b[1] for b in result]).strip()
+        if enhance_contrast:
+            from PIL import ImageEnhance
+            img = ImageEnhance.Contrast(img).enhance(2.0)
+        return np.array(img)
     except Exception:
-        return ""
+        return None
+
+
+def _canvas_side(n: int) -> int:
+    i = bisect.bisect_left(OCR_CANVAS_SIZES, n)
+    if i < len(OCR_CANVAS_SIZES):
+        return OCR_CANVAS_SIZES[i]
+    return -(-n // _OCR_OVERSIZE_STEP) * _OCR_OVERSIZE_STEP
+
+
+def _letterbox(arr):
+    """이미지를 공용 캔버스(OCR_CANVAS_SIZES) 크기의 흰 바탕 왼쪽 위에 붙임 (축소하지 않아 인식 해상도는 그대로)"""
+    h, w = arr.shape[:2]
+    ch, cw = _canvas_side(h), _canvas_side(w)
+    if (ch, cw) == (h, w):
+        return arr
+    canvas = np.full((ch, cw) + arr.shape[2:], 255, dtype=arr.dtype)
+    canvas[:h, :w] = arr
+    return canvas
+
+
+def _run_ocr_batch(requests: list) -> list:
+    """(이미지, batch_size) 요청들을 캔버스 크기별로 묶어 readtext_batched 로 처리. 실패한 묶음의 결과는 예외 객체"""
+    results = [None] * len(requests)
+    groups = {}
+    for i, (arr, batch_size) in enumerate(requests):
+        groups.setdefault((arr.shape, batch_size), []).append(i)
+    for (_, batch_size), idxs in groups.items():
+        arrs = [requests[i][0] for i in idxs]
+        try:
+            if len(arrs) == 1:
+                out = [reader.readtext(arrs[0], batch_size=batch_size, workers=OCR_WORKERS)]
+            else:
+                out = reader.readtext_batched(arrs, batch_size=batch_size, workers=OCR_WORKERS)
+        except Exception as e:
+            out = [e] * len(idxs)
+        for i, res in zip(idxs, out):
+            results[i] = res
+    return results
+
+
+# EasyOCR Reader 는 스레드 안전하지 않으므로 reader 는 배치 스레드 하나만 호출합니다 (잠금 없이 소유).
+# 동시에 스캔 중인 여러 문서의 같은 캔버스 크기 이미지는 이 스레드에서 한 배치로 합쳐집니다.
+# 추론 데몬 클라이언트의 reader 는 데몬 쪽에서 같은 방식으로 묶으므로 호출 스레드에서 바로 사용합니다.
+ocr_batcher = None if INFERENCE_CLIENT or reader is None else BatchWorker(
+    _run_ocr_batch, max_batch=OCR_BATCH_SIZE, name="ocr")
+
+
+def _readtext_many(arrays: list, batch_size: int = None) -> list:
+    """이미지(ndarray) 목록의 EasyOCR 결과를 입력 순서대로 (실패한 항목은 예외 객체)"""
+    requests = [(arr, batch_size or OCR_BATCH_SIZE) for arr in arrays]
+    if ocr_batcher is None:
+        return _run_ocr_batch(requests)
+    return [f.result() for f in ocr_batcher.submit_many(requests)]
+
+
+def run_ocr_on_images(images, enhance_contrast=False, min_confidence=0.0) -> list:
+    """문서 내 모든 이미지를 EasyOCR 배치 API로 한 번에 처리하는 단일 진입점.
+
+    images 의 각 항목(bytes / PIL.Image / ndarray)에 대한 OCR 텍스트를 입력 순서대로 반환합니다.
+    이미지는 공용 캔버스 크기로 맞춘 뒤 OCR 배치 스레드로 보내며, 같은 캔버스의 이미지(다른 문서의 것 포함)는
+    readtext_batched 로 묶어 검출/인식하고 혼자 남은 이미지는 같은 batch_size 의 readtext 로 처리합니다.
+    """
+    images = list(images)
+    texts = [""] * len(images)
+    if reader is None or Image is None or not images:
+        return texts
+
+    # 처리 예산을 넘는 이미지는 OCR 하지 않음 (빈 문자열로 남김)
+    budget = current_budget()
+    allowed = budget.limit("images", len(images), "ocr")
+    entries = []
+    for idx, src in enumerate(images[:allowed]):
+        arr = _load_ocr_image(src, enhance_contrast)
+        if arr is None or arr.ndim != 3:
+            continue
+        entries.append((idx, _letterbox(arr)))
+    # 같은 캔버스끼리 이어지도록 정렬해 OCR_BATCH_SIZE 개씩 보내고, 사이사이 예산 확인
+    entries.sort(key=lambda e: e[1].shape)
+
+    def _collect(result):
+        return "\n".join(b[1] for b in result if not min_confidence or b[2] > min_confidence).strip()
+
+    for w in range(0, len(entries), OCR_BATCH_SIZE):
+        if not budget.ok("ocr"):
+            break
+        wave = entries[w:w + OCR_BATCH_SIZE]
+        failed = None
+        for (idx, _), result in zip(wave, _readtext_many([arr for _, arr in wave])):
+            if isinstance(result, Exception):
+                failed = result
+                continue
+            texts[idx] = _collect(result)
+        if failed is not None:
+            logging.warning(f"OCR 배치 처리 실패: {failed}")
+        if not budget.take("ocr_chars", sum(len(texts[idx]) for idx, _ in wave), "ocr"):
+            break
+    return texts
 
 
-def _ocr_task(args):
-    return run_ocr_on_single_image(args[1])
+def run_ocr_on_single_image(image_bytes: bytes) -> str:
+    return run_ocr_on_images([image_bytes])[0]
 
 
 def run_ocr_on_docx_images(file_bytes):
     if reader is None or Image is None:
         return ""
     try:
-        from PIL import ImageEnhance
-        with zipfile.ZipFile(io.BytesIO(file_bytes)) as z:
-            image_files = [n for n in z.namelist() if n.startswith("word/media/")]
-            if not image_files:
-                return ""
-            ocr_text = ""
-            for image_name in image_files:
-                try:
-                    img = Image.open(io.BytesIO(z.read(image_name))).convert('RGB')
-                    # 이미지 전처리: 대비 증가
-                    enhancer = ImageEnhance.Contrast(img)
-                    img = enhancer.enhance(2.0)
-                    # OCR 실행 (신뢰도 임계값 낮춤)
-                    result = reader.readtext(np.array(img), detail=1, paragraph=False)
-                    for box in result:
-                        if box[2] > 0.1:  # 신뢰도 10% 이상
-                            ocr_text += box[1] + "\n"
-                except Exception:
-                    continue
-            return ocr_text.strip()
+        with zipfile.ZipFile(_open_stream(file_bytes)) as z:
+            images = [z.read(n) for n in z.namelist() if n.startswith("word/media/")]
+        # 이미지 전처리(대비 증가) 후 신뢰도 10% 이상만 사용
+        texts = run_ocr_on_images(images, enhance_contrast=True, min_confidence=0.1)
+        return "\n".join(t for t in texts if t).strip()
     except Exception as e:
         print(f"[ERROR] DOCX 이미지 OCR 실패: {e}")
         return ""
 
 
-def _process_pdf_image_ocr(args):
-    pno, img_bytes = args
-    return run_ocr_on_single_image(img_bytes)
-
 def run_ocr_on_pdf_images(pdf_bytes: bytes) -> str:
     if reader is None or fitz is None:
         return ""
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         # 중복 이미지 제거 (xref 기반)
         seen_xrefs = set()
-        image_tasks = []
-        
-        for pno, page in enumerate(doc):
-            for img in page.get_images(full=True):
-                xref = img[0]
-                if xref in seen_xrefs:
-                    continue
-                seen_xrefs.add(xref)
-                
-                base_image = doc.extract_image(xref)
-                img_bytes = base_image.get("image")
-                
-                # 작은 이미지 스킵 (5KB 이상만)
-                if img_bytes and len(img_bytes) > 5000:
-                    image_tasks.append((pno, img_bytes))
-        
-        # 병렬 처리
-        if image_tasks:
-            max_workers = min(8, os.cpu_count() or 4)
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                texts = list(executor.map(_process_pdf_image_ocr, image_tasks))
-            return "\n".join(texts)
-        return ""
+        images = []
+        budget = current_budget()
+        with _open_pdf(pdf_bytes) as doc:
+            for page in doc:
+                if not budget.ok("ocr"):
+                    break
+                for img in page.get_images(full=True):
+                    xref = img[0]
+                    if xref in seen_xrefs:
+                        continue
+                    seen_xrefs.add(xref)
+                    img_bytes = doc.extract_image(xref).get("image")
+                    # 작은 이미지 스킵 (5KB 이상만)
+                    if img_bytes and len(img_bytes) > 5000:
+                        images.append(img_bytes)
+        return "\n".join(t for t in run_ocr_on_images(images) if t)
     except Exception as e:
         print(f"[ERROR] PDF 이미지 OCR 실패: {e}")
         return ""
 
 
-def run_ocr_on_hwp_images(hwp_bytes: bytes) -> str:
-    if reader is None or olefile is None:
+def run_ocr_on_hwp_images(ole) -> str:
+    """이미 열린 HWP OLE 컨테이너의 그림 BinData OCR (그림이 없으면 OCR 을 실행하지 않음)"""
+    if reader is None:
         return ""
     try:
-        ole = olefile.OleFileIO(io.BytesIO(hwp_bytes))
-        tasks = [(e, ole.openstream(e).read()) for e in ole.listdir() if e[0] == "BinData"]
-        if not tasks:
+        images = [data for _, data in iter_hwp_pictures(ole)]
+        if not images:
             return ""
-        with ThreadPoolExecutor() as ex:
-            return "\n".join(ex.map(_ocr_task, tasks))
+        return "\n".join(t for t in run_ocr_on_images(images) if t)
     except Exception as e:
         print(f"[ERROR] HWP 이미지 OCR 실패: {e}")
         return ""
@@ -733,12 +2792,9 @@ def run_ocr_on_pptx_images(pptx_bytes: bytes) -> str:
     if reader is None:
         return ""
     try:
-        with zipfile.ZipFile(io.BytesIO(pptx_bytes)) as z:
-            tasks = [(n, z.read(n)) for n in z.namelist() if n.startswith("ppt/media/")]
-            if not tasks:
-                return ""
-            with ThreadPoolExecutor() as ex:
-                return "\n".join(ex.map(_ocr_task, tasks))
+        with zipfile.ZipFile(_open_stream(pptx_bytes)) as z:
+            images = [z.read(n) for n in z.namelist() if n.startswith("ppt/media/")]
+        return "\n".join(t for t in run_ocr_on_images(images) if t)
     except Exception as e:
         print(f"[ERROR] PPTX 이미지 OCR 실패: {e}")
         return ""
@@ -748,35 +2804,172 @@ def run_ocr_on_hwpx_images(hwpx_bytes: bytes) -> str:
     if reader is None:
         return ""
     try:
-        with zipfile.ZipFile(io.BytesIO(hwpx_bytes)) as z:
-            tasks = [(n, z.read(n)) for n in z.namelist() if n.startswith("Contents/") and n.lower().endswith((".jpg",".png",".bmp",".jpeg",".gif"))]
-            if not tasks:
-                return ""
-            with ThreadPoolExecutor() as ex:
-                return "\n".join(ex.map(_ocr_task, tasks))
+        with zipfile.ZipFile(_open_stream(hwpx_bytes)) as z:
+            images = [z.read(n) for n in z.namelist() if n.startswith("Contents/") and n.lower().endswith(IMAGE_EXTS)]
+        return "\n".join(t for t in run_ocr_on_images(images) if t)
     except Exception as e:
         print(f"[ERROR] HWPX 이미지 OCR 실패: {e}")
         return ""
 
+# ==========================
+# GIF 키프레임 샘플링
+# ==========================
+
+# 직전 키프레임과의 평균 밝기 차(0~255, 32x32 흑백 축소본 기준)가 임계값 이상일 때만 새 키프레임으로 채택
+GIF_DIFF_THRESHOLD = float(os.getenv("PII_GIF_DIFF_THRESHOLD", "6.0"))
+GIF_MAX_KEYFRAMES = max(1, int(os.getenv("PII_GIF_MAX_KEYFRAMES", "12")))
+
+
+def extract_gif_keyframes(gif_bytes: bytes) -> tuple:
+    """장면이 바뀌는 프레임만 골라 (키프레임 RGB 이미지 목록, 전체 프레임 수)를 반환합니다.
+
+    첫 프레임은 항상 포함하고, 이후 프레임은 직전 키프레임과 충분히 다를 때만 포함하며
+    최대 GIF_MAX_KEYFRAMES 개까지만 고릅니다. OCR 과 얼굴 탐지가 같은 키프레임을 사용합니다
+    (_handle_input_raw 가 한 번만 추출해 parse_file / scan_file_for_face_images 에 함께 넘김).
+    """
+    img = Image.open(_open_stream(gif_bytes))
+    # 프레임 수는 헤더만 훑어 셈 (남은 프레임을 디코딩하지 않음)
+    frame_count = getattr(img, "n_frames", 1)
+    keyframes = []
+    last_thumb = None
+    for frame in ImageSequence.Iterator(img):
+        if len(keyframes) >= GIF_MAX_KEYFRAMES:
+            break
+        rgb = frame.convert("RGB")
+        thumb = np.asarray(rgb.convert("L").resize((32, 32)), dtype=np.int16)
+        if last_thumb is not None and np.abs(thumb - last_thumb).mean() < GIF_DIFF_THRESHOLD:
+            continue
+        keyframes.append(rgb)
+        last_thumb = thumb
+    return keyframes, frame_count
+
+
+# ==========================
+# 파일 형식 판별 (매직 바이트)
+# ==========================
+
+SNIFF_BYTES = 4096
+OLE2_MAGIC = b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"BM", "bmp"),
+)
+# 같은 형식을 가리키는 확장자 표기
+_EXT_ALIASES = {"jpeg": "jpg", "tif": "tiff"}
+
+
+def _sniff_ole(data) -> str:
+    if olefile is None:
+        return None
+    ole = olefile.OleFileIO(_open_stream(data))
+    try:
+        if ole.exists("FileHeader") and ole.openstream("FileHeader").read(17) == b"HWP Document File":
+            return "hwp"
+        if ole.exists("WordDocument"):
+            return "doc"
+        if ole.exists("PowerPoint Document"):
+            return "ppt"
+        if ole.exists("Workbook") or ole.exists("Book"):
+            return "xls"
+        return None
+    finally:
+        ole.close()
+
+
+def _sniff_zip(data) -> str:
+    with zipfile.ZipFile(_open_stream(data)) as z:
+        names = set(z.namelist())
+        if "mimetype" in names and z.read("mimetype").strip() == b"application/hwp+zip":
+            return "hwpx"
+        if "word/document.xml" in names:
+            return "docx"
+        if "ppt/presentation.xml" in names:
+            return "pptx"
+        if "xl/workbook.xml" in names:
+            return "xlsx"
+        if any(n.startswith("Contents/section") for n in names):
+            return "hwpx"
+    return None
+
+
+def sniff_format(data) -> str:
+    """파일 앞부분의 서명으로 실제 형식을 판별 (판별 불가 시 None)
+
+    OLE2 / ZIP 컨테이너는 디렉터리(스트림 이름, 중앙 디렉터리)만 읽어 하위 형식을 구분합니다.
+    """
+    head = bytes(data[:SNIFF_BYTES])
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for sig, ext in _IMAGE_SIGNATURES:
+        if head.startswith(sig):
+            return ext
+    try:
+        if head.startswith(OLE2_MAGIC):
+            return _sniff_ole(data)
+        if head.startswith(b"PK\x03\x04"):
+            return _sniff_zip(data)
+    except Exception as e:
+        logging.warning(f"컨테이너 형식 판별 실패: {e}")
+        return None
+    return None
+
+
+def resolve_file_format(data, declared: str) -> dict:
+    """선언된 확장자와 내용으로 판별한 형식을 함께 기록하고, 실제 파싱에 쓸 형식을 결정"""
+    declared = (declared or "").lower()
+    detected = sniff_format(data)
+    if detected is None and declared not in SUPPORTED_FORMATS and b"\x00" not in bytes(data[:SNIFF_BYTES]):
+        # 알 수 없는 확장자지만 바이너리 흔적이 없으면 텍스트로 처리
+        detected = "txt"
+    effective = declared
+    if detected and _EXT_ALIASES.get(declared, declared) != detected:
+        print(f"[INFO] 파일 형식 불일치: 확장자 '{declared}' → 실제 '{detected}' 파서로 처리")
+        effective = detected
+    return {"declared": declared, "detected": detected, "format": effective}
+
 # ==========================
 # 파일 파싱
 # ==========================
 
-def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
+SUPPORTED_FORMATS = {"txt", "doc", "docx", "pdf", "hwp", "hwpx", "xlsx", "xls", "ppt", "pptx", "gif",
+                     "png", "jpg", "jpeg", "bmp", "webp", "tiff"}
+
+
+def parse_file(File_Bytes, File_Ext: str, sniff: bool = True, gif_keyframes: Future = None) -> tuple:
     File_Ext = (File_Ext or '').lower()
+    if sniff:
+        # 확장자를 그대로 믿지 않고 내용 서명으로 가장 알맞은 파서를 선택
+        File_Ext = resolve_file_format(File_Bytes, File_Ext)["format"]
 
     if File_Ext == "txt":
         try:
-            return File_Bytes.decode("utf-8"), False
+            return str(_as_view(File_Bytes), "utf-8"), False
         except UnicodeDecodeError:
-            return File_Bytes.decode("cp949", errors='ignore'), False
+            return str(_as_view(File_Bytes), "cp949", errors='ignore'), False
 
     elif File_Ext == "doc":
+        # 1순위: olefile 로 WordDocument 조각 테이블을 직접 읽음 (Office 불필요)
+        if olefile is not None:
+            try:
+                with olefile.OleFileIO(_open_stream(File_Bytes)) as ole:
+                    text = extract_doc_text(ole)
+                return re.sub(r'\s+', ' ', text).strip(), False
+            except Exception as e:
+                if win32com is None:
+                    raise ValueError(f"[ERROR] DOC 파싱 실패: {e}")
+                print(f"[WARN] DOC 직접 파싱 실패, win32com 변환으로 재시도: {e}")
         if win32com is None:
-            raise ValueError("[ERROR] .doc 파싱을 위해서는 Windows 환경에 MS Office 설치가 필요합니다.")
+            raise ValueError("[ERROR] .doc 파싱을 위해서는 olefile 라이브러리 또는 Windows 환경의 MS Office가 필요합니다.")
         try:
             with tempfile.NamedTemporaryFile(delete=False, suffix=".doc") as tmp:
-                tmp.write(File_Bytes)
+                tmp.write(_as_view(File_Bytes))
                 tmp_path = tmp.name
             
             tmp_docx_path = tmp_path + "x"
@@ -797,14 +2990,9 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
             raise ValueError(f"[ERROR] DOC -> DOCX 변환 실패: {e}")
 
     elif File_Ext == "docx":
-        if Document is None:
-            raise ValueError("[ERROR] python-docx 라이브러리 미설치")
         try:
-            doc = Document(io.BytesIO(File_Bytes))
-            text = "\n".join([p.text for p in doc.paragraphs if p.text])
-            for table in doc.tables:
-                for row in table.rows:
-                    text += "\n" + " ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
+            with zipfile.ZipFile(_open_stream(File_Bytes)) as z:
+                text = extract_zip_xml_text(z, ["word/document.xml"])
             if not text.strip():
                 text = run_ocr_on_docx_images(File_Bytes)
             return re.sub(r'\s+', ' ', text.strip()), False
@@ -815,23 +3003,26 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
         if fitz is None:
             raise ValueError("[ERROR] PyMuPDF(fitz) 라이브러리 미설치")
         try:
-            doc = fitz.open(stream=File_Bytes, filetype="pdf")
-            if doc.is_encrypted:
-                raise ValueError("[ERROR] 암호화된 PDF 문서")
-            
-            # 병렬 처리로 텍스트 추출
-            def extract_page_text(page_num):
-                return doc[page_num].get_text().replace("\n", " ")
-            
-            page_count = len(doc)
-            if page_count > 1:
-                max_workers = min(8, os.cpu_count() or 4)
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    texts = list(executor.map(extract_page_text, range(page_count)))
-                text = " ".join(texts)
-            else:
-                text = doc[0].get_text().replace("\n", " ")
-            
+            with _open_pdf(File_Bytes) as doc:
+                if doc.is_encrypted:
+                    raise ValueError("[ERROR] 암호화된 PDF 문서")
+
+                # 병렬 처리로 텍스트 추출 (예산을 넘는 페이지는 건너뜀)
+                budget = current_budget()
+
+                def extract_page_text(page_num):
+                    if not budget.ok("parse"):
+                        return ""
+                    return doc[page_num].get_text().replace("\n", " ")
+
+                page_count = budget.limit("pages", len(doc), "parse")
+                if page_count > 1:
+                    text = " ".join(scheduler.map(extract_page_text, range(page_count)))
+                elif page_count == 1:
+                    text = doc[0].get_text().replace("\n", " ")
+                else:
+                    text = ""
+
             if not any(ch.isalnum() for ch in text):
                 text = run_ocr_on_pdf_images(File_Bytes)
             return text.strip(), False
@@ -839,32 +3030,20 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
             raise ValueError(f"[ERROR] PDF 파싱 실패: {e}")
 
     elif File_Ext == "hwp":
-        if File_Bytes[:4] == b'PK\x03\x04':
-            print("[INFO] HWPX 파일로 감지됨, HWPX 파싱으로 전환")
-            return parse_file(File_Bytes, "hwpx")
-        
         if olefile is None:
             raise ValueError("[ERROR] olefile 라이브러리 미설치")
         try:
-            ole = olefile.OleFileIO(io.BytesIO(File_Bytes))
-            text = ""
-            if ole.exists("PrvText"):
-                text = ole.openstream("PrvText").read().decode("utf-16", errors="ignore").strip()
-            if not text.strip():
-                # BodyText, HeaderText, FooterText 모두 추출
-                for entry in ole.listdir():
-                    if entry[0] in ["BodyText", "HeaderText", "FooterText"]:
-                        try:
-                            raw = ole.openstream(entry).read()
-                            text += ''.join(c for c in raw.decode("utf-16", errors="ignore") if c.isprintable() or c in '\n\r\t ') + "\n"
-                        except Exception:
-                            continue
-            # 텍스트 유무와 관계없이 항상 OCR 실행 (이미지 내 텍스트 탐지)
-            ocr_text = run_ocr_on_hwp_images(File_Bytes)
+            with olefile.OleFileIO(_open_stream(File_Bytes)) as ole:
+                # 본문 레코드(BodyText)에서 문단 텍스트 추출
+                text = extract_hwp_text(ole)
+                if not text.strip() and ole.exists("PrvText"):
+                    # 배포용 문서 등 본문을 읽을 수 없으면 미리보기 텍스트로 대체
+                    text = ole.openstream("PrvText").read().decode("utf-16", errors="ignore").strip()
+                # 그림 BinData 가 있을 때만 OCR 실행 (같은 컨테이너를 다시 열지 않음)
+                ocr_text = run_ocr_on_hwp_images(ole)
             if ocr_text:
-                print(f"[INFO] HWP 이미지 OCR 추출: {len(ocr_text)}글자")
+                logging.info(f"HWP 이미지 OCR 추출: {len(ocr_text)}글자")
                 text = (text + "\n" + ocr_text).strip()
-            ole.close()
             text = re.sub(r'\s+', ' ', text).strip()
             return text, False
         except Exception as e:
@@ -872,19 +3051,11 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
 
     elif File_Ext == "hwpx":
         try:
-            with zipfile.ZipFile(io.BytesIO(File_Bytes)) as z:
-                sections = [n for n in z.namelist() if n.startswith('Contents/section')]
+            with zipfile.ZipFile(_open_stream(File_Bytes)) as z:
+                sections = sorted((n for n in z.namelist() if n.startswith('Contents/section')), key=_xml_part_key)
                 if not sections:
-                    xmls = [n for n in z.namelist() if n.endswith('.xml')]
-                    text = ''
-                    for name in xmls:
-                        data = z.read(name).decode('utf-8', errors='ignore')
-                        text += re.sub('<[^>]+>', ' ', data)
-                else:
-                    text = ''
-                    for name in sections:
-                        data = z.read(name).decode('utf-8', errors='ignore')
-                        text += re.sub('<[^>]+>', ' ', data)
+                    sections = [n for n in z.namelist() if n.endswith('.xml')]
+                text = extract_zip_xml_text(z, sections)
                 text = re.sub(r'\s+', ' ', text).strip()
                 if not text:
                     text = run_ocr_on_hwpx_images(File_Bytes)
@@ -897,10 +3068,16 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
             raise ValueError("[ERROR] openpyxl 라이브러리 미설치")
         try:
             # use read_only mode for robustness and memory
-            wb = load_workbook(io.BytesIO(File_Bytes), data_only=True, read_only=True)
+            wb = load_workbook(_open_stream(File_Bytes), data_only=True, read_only=True)
             lines = []
+            budget = current_budget()
             for sheet in wb.worksheets:
+                if not budget.ok("parse"):
+                    break
                 for ridx, row in enumerate(sheet.iter_rows(values_only=True)):
+                    # 예산 확인은 1000행마다 (남은 시트도 위의 확인에서 건너뜀)
+                    if ridx % 1000 == 999 and not budget.ok("parse"):
+                        break
                     try:
                         # safely convert each cell to string; handle unexpected cell types
                         cells = []
@@ -922,7 +3099,7 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
         except Exception as e:
             # attempt a low-level zip/xml fallback to salvage text from sharedStrings/sheets
             try:
-                with zipfile.ZipFile(io.BytesIO(File_Bytes)) as z:
+                with zipfile.ZipFile(_open_stream(File_Bytes)) as z:
                     s = []
                     # try sharedStrings
                     if 'xl/sharedStrings.xml' in z.namelist():
@@ -954,7 +3131,7 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
             print("[WARN] xlrd 라이브러리가 없어 win32com으로 .xls 파일을 처리합니다. (Windows/MS Office 환경 필요)")
             try:
                 with tempfile.NamedTemporaryFile(delete=False, suffix=".xls") as tmp:
-                    tmp.write(File_Bytes); tmp_path = tmp.name
+                    tmp.write(_as_view(File_Bytes)); tmp_path = tmp.name
                 xlsx_path = tmp_path + "x"
                 excel = win32com.client.Dispatch("Excel.Application")
                 wb = excel.Workbooks.Open(tmp_path)
@@ -966,23 +3143,42 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
             except Exception as e:
                 raise ValueError(f"[ERROR] win32com을 이용한 XLS → XLSX 변환 실패: {e}")
         try:
-            workbook = xlrd.open_workbook(file_contents=File_Bytes)
-            text = ""
+            # xlrd 가 OLE2 컨테이너의 Workbook(BIFF) 스트림을 프로세스 내에서 직접 해석
+            if isinstance(File_Bytes, FileBuffer) and File_Bytes.path:
+                workbook = xlrd.open_workbook(File_Bytes.path, on_demand=True)
+            else:
+                workbook = xlrd.open_workbook(file_contents=getattr(File_Bytes, "data", File_Bytes), on_demand=True)
+            lines = []
             for sheet in workbook.sheets():
                 for row_idx in range(sheet.nrows):
                     row = sheet.row_values(row_idx)
-                    text += " ".join([str(cell) for cell in row if cell is not None]) + "\n"
-            return text.strip(), False
+                    lines.append(" ".join([str(cell) for cell in row if cell is not None and cell != ""]))
+            workbook.release_resources()
+            return "\n".join(lines).strip(), False
         except Exception as e:
             raise ValueError(f"[ERROR] XLS (xlrd) 파싱 실패: {e}")
 
     elif File_Ext in ["ppt","pptx"]:
         if File_Ext == "ppt":
+            # 1순위: olefile 로 PowerPoint Document 텍스트 레코드를 직접 읽음 (Office 불필요)
+            if olefile is not None:
+                try:
+                    with olefile.OleFileIO(_open_stream(File_Bytes)) as ole:
+                        text = extract_ppt_text(ole)
+                        pictures = [data for _, data in iter_ppt_pictures(ole)]
+                    ocr = "\n".join(t for t in run_ocr_on_images(pictures) if t)
+                    if ocr:
+                        text += "\n" + ocr
+                    return text.strip(), False
+                except Exception as e:
+                    if win32com is None:
+                        raise ValueError(f"[ERROR] PPT 파싱 실패: {e}")
+                    print(f"[WARN] PPT 직접 파싱 실패, win32com 변환으로 재시도: {e}")
             if win32com is None:
-                raise ValueError("[ERROR] PPT 파싱은 Windows/MS Office 환경 필요")
+                raise ValueError("[ERROR] PPT 파싱은 olefile 라이브러리 또는 Windows/MS Office 환경 필요")
             try:
                 with tempfile.NamedTemporaryFile(delete=False, suffix=".ppt") as tmp:
-                    tmp.write(File_Bytes); tmp_path = tmp.name
+                    tmp.write(_as_view(File_Bytes)); tmp_path = tmp.name
                 pptx_path = tmp_path + "x"
                 pp = win32com.client.Dispatch("PowerPoint.Application")
                 pres = pp.Presentations.Open(tmp_path, WithWindow=False)
@@ -992,15 +3188,10 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
                 os.remove(tmp_path); os.remove(pptx_path)
             except Exception as e:
                 raise ValueError(f"[ERROR] PPT → PPTX 변환 실패: {e}")
-        if Presentation is None:
-            raise ValueError("[ERROR] python-pptx 라이브러리 미설치")
         try:
-            prs = Presentation(io.BytesIO(File_Bytes))
-            text = ""
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, 'text'):
-                        text += shape.text + "\n"
+            with zipfile.ZipFile(_open_stream(File_Bytes)) as z:
+                slides = sorted((n for n in z.namelist() if re.match(r'ppt/slides/slide\d+\.xml$', n)), key=_xml_part_key)
+                text = extract_zip_xml_text(z, slides) + "\n"
             ocr = run_ocr_on_pptx_images(File_Bytes)
             if ocr:
                 text += "\n" + ocr
@@ -1012,22 +3203,18 @@ def parse_file(File_Bytes: bytes, File_Ext: str) -> tuple:
     elif File_Ext == "gif":
         if ImageSequence is None:
             raise ValueError("[ERROR] GIF 처리를 위해 Pillow(PIL) 라이브러리가 필요합니다.")
-        print("[INFO] GIF 파일 감지: 다중 프레임 OCR 시작")
+        print("[INFO] GIF 파일 감지: 키프레임 OCR 시작")
         try:
-            img = Image.open(io.BytesIO(File_Bytes))
-            ocr_text = ""
-            frame_count = 0
-            for i, frame in enumerate(ImageSequence.Iterator(img)):
-                frame_count += 1
-                if i % 3 != 0:  # 3프레임 마다 샘플링
-                    continue
-                frame_rgb = frame.convert("RGB")
-                result = reader.readtext(np.array(frame_rgb))
-                for box in result:
-                    ocr_text += box[1] + "\n"
-                if len(ocr_text) > 1000: # 텍스트가 일정 길이 이상이면 조기 종료
-                    break
-            print(f"[INFO] GIF OCR 완료: {frame_count}프레임 중 {len(ocr_text)}글자 추출")
+            if gif_keyframes is not None:
+                keyframes, frame_count = scheduler.result(gif_keyframes)
+            else:
+                keyframes, frame_count = extract_gif_keyframes(File_Bytes)
+            # 여러 프레임에 반복되는 같은 문구는 한 번만 남김 (순서 유지)
+            lines = []
+            for t in run_ocr_on_images(keyframes):
+                lines.extend(line.strip() for line in t.split("\n") if line.strip())
+            ocr_text = "\n".join(dict.fromkeys(lines))
+            print(f"[INFO] GIF OCR 완료: {frame_count}프레임 중 키프레임 {len(keyframes)}개, {len(ocr_text)}글자 추출")
             return ocr_text.strip(), True
         except Exception as e:
             print(f"[ERROR] GIF OCR 실패: {e}")
@@ -1047,7 +3234,9 @@ def detect_faces_in_image_bytes(image_bytes, confidence_threshold=0.98):
     if detector is None or Image is None:
         return []
     try:
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        # GIF 키프레임처럼 이미 디코딩된 이미지도 그대로 받음
+        img = image_bytes if isinstance(image_bytes, Image.Image) else Image.open(_open_stream(image_bytes))
+        img = img.convert("RGB")
         
         # 이미지 크기 체크 (너무 작으면 스킵)
         if img.width < 50 or img.height < 50:
@@ -1106,18 +3295,26 @@ def detect_faces_in_image_bytes(image_bytes, confidence_threshold=0.98):
 
 def _face_task(args):
     name, bytes_ = args
+    if not current_budget().ok("face"):
+        return None
     faces = detect_faces_in_image_bytes(bytes_)
     return {"image_name": name, "faces_found": len(faces), "faces": faces} if faces else None
 
 
-def scan_file_for_face_images(file_bytes, file_ext):
+def scan_file_for_face_images(file_bytes, file_ext, gif_keyframes: Future = None):
     file_ext = (file_ext or '').lower()
     tasks = []
     try:
-        if file_ext in ["png","jpg","jpeg","bmp","webp","gif","tiff"]:
+        if file_ext == "gif" and ImageSequence is not None:
+            if gif_keyframes is not None:
+                keyframes, _ = scheduler.result(gif_keyframes)
+            else:
+                keyframes, _ = extract_gif_keyframes(file_bytes)
+            tasks.extend((f"gif_frame{i+1}", frame) for i, frame in enumerate(keyframes))
+        elif file_ext in ["png","jpg","jpeg","bmp","webp","gif","tiff"]:
             tasks.append(("uploaded_image", file_bytes))
         elif file_ext in ["docx","pptx","hwpx"]:
-            with zipfile.ZipFile(io.BytesIO(file_bytes)) as z:
+            with zipfile.ZipFile(_open_stream(file_bytes)) as z:
                 if file_ext == 'docx':
                     prefix = 'word/media/'
                     imgs = [n for n in z.namelist() if n.startswith(prefix)]
@@ -1125,63 +3322,88 @@ def scan_file_for_face_images(file_bytes, file_ext):
                     prefix = 'ppt/media/'
                     imgs = [n for n in z.namelist() if n.startswith(prefix)]
                 else:  # hwpx
-                    imgs = [n for n in z.namelist() if n.startswith('Contents/') and n.lower().endswith((".png",".jpg",".jpeg",".bmp",".gif"))]
+                    imgs = [n for n in z.namelist() if n.startswith('Contents/') and n.lower().endswith(IMAGE_EXTS)]
                 tasks.extend((n, z.read(n)) for n in imgs)
         elif file_ext == 'pdf' and fitz:
-            doc = fitz.open(stream=file_bytes, filetype='pdf')
             seen = set()
-            for p, page in enumerate(doc):
-                for i, img in enumerate(page.get_images(full=True)):
-                    xref = img[0]
-                    if xref in seen:
-                        continue
-                    seen.add(xref)
-                    bi = doc.extract_image(xref)
-                    if not bi or 'image' not in bi or len(bi['image']) < 5000:
-                        continue
-                    tasks.append((f"pdf_p{p+1}_img{i+1}", bi['image']))
+            with _open_pdf(file_bytes) as doc:
+                for p, page in enumerate(doc):
+                    for i, img in enumerate(page.get_images(full=True)):
+                        xref = img[0]
+                        if xref in seen:
+                            continue
+                        seen.add(xref)
+                        bi = doc.extract_image(xref)
+                        if not bi or 'image' not in bi or len(bi['image']) < 5000:
+                            continue
+                        tasks.append((f"pdf_p{p+1}_img{i+1}", bi['image']))
         elif file_ext == 'hwp' and olefile:
-            ole = olefile.OleFileIO(io.BytesIO(file_bytes))
-            tasks.extend(("/".join(e), ole.openstream(e).read()) for e in ole.listdir() if e[0]=='BinData')
+            with olefile.OleFileIO(_open_stream(file_bytes)) as ole:
+                tasks.extend(iter_hwp_pictures(ole))
+        elif file_ext == 'ppt' and olefile:
+            with olefile.OleFileIO(_open_stream(file_bytes)) as ole:
+                tasks.extend(iter_ppt_pictures(ole))
     except Exception as e:
         print(f"[WARN] {file_ext.upper()} 이미지 추출 실패: {e}")
+    tasks = tasks[:current_budget().limit("images", len(tasks), "face")]
     if not tasks:
         return []
-    with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 4))) as ex:
-        return [r for r in ex.map(_face_task, tasks) if r]
+    return [r for r in scheduler.map(_face_task, tasks) if r]
 
 # ==========================
 # 메인 핸들러
 # ==========================
 
-def handle_input_raw(Input_Data: bytes, Original_Format: str = None, Original_Filename: str = None):
-    if not isinstance(Input_Data, bytes):
+def handle_input_raw(Input_Data, Original_Format: str = None, Original_Filename: str = None, File_Format: dict = None, Budget: ScanBudget = None):
+    """파일 하나를 처리 예산 안에서 분석합니다.
+
+    Budget 을 넘기면 호출자가 처리 후 Budget.report() 로 잘림 여부를 확인할 수 있습니다.
+    """
+    Budget = Budget or ScanBudget()
+    token = _current_budget.set(Budget)
+    try:
+        return _handle_input_raw(Input_Data, Original_Format, Original_Filename, File_Format)
+    finally:
+        _current_budget.reset(token)
+        if Budget.truncated:
+            logging.warning(f"처리 예산 초과로 부분 결과 반환: {Budget.report()}")
+
+
+def _handle_input_raw(Input_Data, Original_Format: str = None, Original_Filename: str = None, File_Format: dict = None):
+    if not isinstance(Input_Data, (bytes, FileBuffer)):
         raise ValueError("지원하지 않는 입력 형식입니다.")
     print(f"\n[INFO] ========== 파일 처리 시작 (확장자: {Original_Format}) ==========")
 
+    # 호출자가 이미 판별했으면 재사용, 아니면 내용 서명으로 실제 형식 판별
+    File_Format = File_Format or resolve_file_format(Input_Data, Original_Format)
+    Effective_Format = File_Format["format"]
+
     # 병렬 처리: 텍스트 추출과 얼굴 탐지를 동시에 실행
     Parsed_Text = ""
     is_image_only = False
     parse_error = None
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        text_future = executor.submit(parse_file, Input_Data, Original_Format or "")
-        face_future = executor.submit(scan_file_for_face_images, Input_Data, Original_Format or "")
-
-        # 얼굴 탐지 결과는 가능하면 항상 확보
-        try:
-            image_detections = face_future.result()
-        except Exception as e:
-            logging.warning(f"파일 이미지(얼굴) 추출 중 오류: {e}")
-            image_detections = []
+    # GIF 는 키프레임을 한 번만 디코딩해 OCR 과 얼굴 탐지가 공유 (먼저 필요한 쪽이 직접 실행)
+    gif_keyframes = None
+    if Effective_Format == "gif" and ImageSequence is not None:
+        gif_keyframes = scheduler.submit(extract_gif_keyframes, Input_Data)
+    text_future = scheduler.submit(parse_file, Input_Data, Effective_Format, sniff=False, gif_keyframes=gif_keyframes)
+    face_future = scheduler.submit(scan_file_for_face_images, Input_Data, Effective_Format, gif_keyframes)
+
+    # 얼굴 탐지 결과는 가능하면 항상 확보
+    try:
+        image_detections = scheduler.result(face_future)
+    except Exception as e:
+        logging.warning(f"파일 이미지(얼굴) 추출 중 오류: {e}")
+        image_detections = []
 
-        # 텍스트 파싱에서 오류가 발생하면 예외를 잡아 전달 가능한 형태로 기록
-        try:
-            Parsed_Text, is_image_only = text_future.result()
-        except Exception as e:
-            parse_error = e
-            Parsed_Text = ""
-            is_image_only = False
-            logging.warning(f"파일 파싱 실패: {e}")
+    # 텍스트 파싱에서 오류가 발생하면 예외를 잡아 전달 가능한 형태로 기록
+    try:
+        Parsed_Text, is_image_only = scheduler.result(text_future)
+    except Exception as e:
+        parse_error = e
+        Parsed_Text = ""
+        is_image_only = False
+        logging.warning(f"파일 파싱 실패: {e}")
     
     print(f"[INFO] 추출된 텍스트 길이: {len(Parsed_Text)} 글자")
     if Parsed_Text:
@@ -1192,17 +3414,29 @@ def handle_input_raw(Input_Data: bytes, Original_Format: str = None, Original_Fi
     Detected = []
     comb = None
 
+    # 파일명은 analyze_filename 결과(캐시)를 그대로 쓰고, 본문만 새로 검사
+    filename_analysis = analyze_filename(Original_Filename) if Original_Filename else None
     combined_text = Parsed_Text or ""
+    prefix_len = 0
     if Original_Filename:
         base = Original_Filename.rsplit('.', 1)[0]
-        combined_text = (base + " \n" + combined_text).strip()
-
-    if combined_text:
-        ner_results   = detect_by_ner(combined_text)
-        regex_results = detect_by_regex(combined_text)
-        quasi_results = detect_quasi_identifiers(combined_text)
-        
-        all_detected = regex_results + ner_results + quasi_results
+        if base:
+            prefix_len = len(base) + 2
+            combined_text = base + " \n" + combined_text
+
+    if combined_text.strip():
+        all_detected = list(filename_analysis["items"]) if filename_analysis else []
+        # 파일명과 본문을 한 텍스트로 검사한 것과 같도록, 파일명에서 이미 찾은 (유형, 값)은 본문 결과에서 제외
+        filename_keys = filename_analysis["dedupe_keys"] if filename_analysis else frozenset()
+        if Parsed_Text and Parsed_Text.strip():
+            # 같은 문서의 이전 버전과 겹치는 블록은 저장된 결과를 재사용하고 바뀐 블록만 검사
+            body_results = [it for it in block_scanner.scan(Parsed_Text)
+                            if (it.get('type'), it.get('value')) not in filename_keys]
+            for it in body_results:
+                if prefix_len and it.get('span'):
+                    s, e = it['span']
+                    it['span'] = (s + prefix_len, e + prefix_len)
+            all_detected += body_results
         
         face_items_for_risk = [{"type": "image_face", "value": "얼굴사진"}] * len(image_detections)
         final_all_detected = all_detected + face_items_for_risk
@@ -1226,8 +3460,8 @@ def handle_input_raw(Input_Data: bytes, Original_Format: str = None, Original_Fi
 
 
     masked_filename = None
-    if Original_Filename:
-        masked, types = mask_pii_in_filename(Original_Filename)
+    if filename_analysis:
+        masked = filename_analysis["masked"]
         masked_filename = masked if masked != Original_Filename else None
 
     # 파싱 에러가 발생했을 경우, 탐지 항목에 오류로 남기고 backend_status를 False로 설정
@@ -1236,10 +3470,301 @@ def handle_input_raw(Input_Data: bytes, Original_Format: str = None, Original_Fi
         Detected.append({
             "type": "file_parse_error",
             "value": err_msg,
-            "detail": {"filename": Original_Filename, "format": Original_Format}
+            "detail": {"filename": Original_Filename, "format": Original_Format,
+                       "detected_format": File_Format["detected"]}
         })
         backend_status = False
     else:
         backend_status = True
 
-    return Detected, (masked_filename or ""), backend_status, image_detections, comb
\ No newline at end of file
+    return Detected, (masked_filename or ""), backend_status, image_detections, comb
+
+# ==========================
+# 시작 시 자동 보정 (스레드 / 배치 크기)
+# ==========================
+# 내장 샘플(한국어 문단, 합성 텍스트 이미지, 합성 얼굴 탐지용 이미지)로 짧은 벤치마크를 돌려
+# torch intra-op 스레드 수와 스케줄러 워커 수(워커 × 스레드 ≈ 코어), NER / OCR 배치 크기를 고릅니다.
+# 환경변수로 직접 지정한 값(PII_TORCH_THREADS, PII_CPU_WORKERS, PII_NER_MAX_BATCH, PII_OCR_BATCH_SIZE)은 그대로 둡니다.
+# 결과는 호스트/모델 기준으로 사용자 전용 디렉토리의 파일에 저장해 다음 기동(워커 재활용 포함) 때 벤치마크 없이 재사용합니다.
+# 여러 워커 프로세스가 동시에 뜨면 잠금 파일로 한 프로세스만 측정하고, 나머지는 기다렸다가 그 결과를 읽습니다
+# (동시에 측정하면 서로의 부하 때문에 값이 왜곡된 채로 저장됨).
+# import 시에는 실행하지 않고, 서버 시작 훅(LocalServer_Final)과 추론 데몬 시작 시 calibrate_from_env() 로 실행합니다.
+
+CALIBRATE_MODE = os.getenv("PII_CALIBRATE", "true").lower()   # true(캐시 사용) / force(항상 측정) / false(끔)
+CALIBRATION_SECONDS = float(os.getenv("PII_CALIBRATION_SECONDS", "30"))
+CALIBRATION_FILE = os.getenv("PII_CALIBRATION_FILE") or os.path.join(model_store.user_state_dir(), "calibration.json")
+# 다른 프로세스가 측정 중일 때 잠금을 기다리는 최대 시간(초). 넘으면 저장된 값(없으면 기본값)으로 진행
+CALIBRATION_LOCK_TIMEOUT = CALIBRATION_SECONDS * 2 + 30
+
+CALIBRATION_NER_TEXT = (
+    "안녕하세요. 인사팀 홍길동 과장입니다. 신규 입사자 김민수 대리의 서류를 전달드립니다. "
+    "연락처는 010-1234-5678 이고 주소는 서울특별시 강남구 테헤란로 123 입니다. "
+    "삼성전자 본사 회의실에서 다음 주 월요일 오전 10시에 면담이 예정되어 있습니다. "
+)
+CALIBRATION_OCR_TEXT = "Hong Gildong 010-1234-5678 hong@example.com"
+
+# 선택된 값과 측정 결과 (calibration_stats() 로 조회)
+CALIBRATION = {"source": "defaults", "torch_threads": TORCH_THREADS, "cpu_workers": CPU_WORKERS,
+               "ner_max_batch": NER_MAX_BATCH, "ner_max_batch_chars": NER_MAX_BATCH_CHARS,
+               "ocr_batch_size": OCR_BATCH_SIZE, "measurements": {}}
+
+
+def _calibration_bounds() -> dict:
+    """저장된 보정 값의 허용 범위 (손상되거나 다른 사람이 바꾼 파일이 서버를 망가뜨리지 않도록)"""
+    return {"torch_threads": (1, CPU_CORES), "cpu_workers": (1, CPU_CORES * 4),
+            "ner_max_batch": (1, 64), "ner_max_batch_chars": (NER_CHUNK_CHARS, 64 * NER_CHUNK_CHARS),
+            "ocr_batch_size": (1, 32)}
+
+
+def _clamp_calibration(key: str, value):
+    lo, hi = _calibration_bounds()[key]
+    try:
+        return min(hi, max(lo, int(value)))
+    except (TypeError, ValueError):
+        return CALIBRATION[key]
+
+
+@contextlib.contextmanager
+def _calibration_lock(timeout: float = None):
+    """보정 측정/저장을 프로세스 사이에서 한 번에 하나만 (잠금 파일). timeout 초 안에 잡지 못하면 TimeoutError"""
+    deadline = time.monotonic() + (CALIBRATION_LOCK_TIMEOUT if timeout is None else timeout)
+    with open(CALIBRATION_FILE + ".lock", "a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt
+
+            def acquire():
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+            def release():
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            def acquire():
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+            def release():
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        # 비차단 잠금을 마감까지 재시도 (차단 잠금은 잡은 프로세스가 멈추면 영원히 기다림)
+        while True:
+            try:
+                acquire()
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"보정 잠금 대기 시간 초과: {CALIBRATION_FILE}.lock")
+                time.sleep(0.2)
+        try:
+            yield
+        finally:
+            release()
+
+
+def _calibration_key() -> str:
+    store_version = local_models.version if not INFERENCE_CLIENT and local_models else None
+    return "|".join(str(p) for p in (sys.platform, CPU_CORES, getattr(torch, "__version__", None),
+                                     store_version or getattr(model_store, "NER_MODEL_NAME", ""),
+                                     reader is not None, detector is not None))
+
+
+def _calibration_samples():
+    ner_chunk = (CALIBRATION_NER_TEXT * (NER_CHUNK_CHARS // len(CALIBRATION_NER_TEXT) + 1))[:NER_CHUNK_CHARS]
+    ocr_image = face_image = None
+    if Image is not None:
+        from PIL import ImageDraw
+        img = Image.new("RGB", (640, 96), "white")
+        ImageDraw.Draw(img).text((16, 36), CALIBRATION_OCR_TEXT, fill="black")
+        ocr_image = np.array(img)
+        # 얼굴 탐지는 이미지 크기에 따라 피라미드 연산량이 정해지므로 일반적인 문서 사진 크기의 합성 이미지 사용
+        rng = np.random.default_rng(0)
+        gradient = np.linspace(40, 220, 480, dtype=np.float32)[None, :, None]
+        face_image = np.clip(gradient + rng.normal(0, 25, (360, 480, 3)), 0, 255).astype(np.uint8)
+    return ner_chunk, ocr_image, face_image
+
+
+def _throughput(fn, items: int, concurrency: int = 1, repeat: int = 2) -> float:
+    """concurrency 개 스레드가 fn() 을 repeat 번씩 실행했을 때의 초당 처리 항목 수 (첫 실행은 예열로 제외)"""
+    fn()
+    errors = []
+
+    def _loop():
+        try:
+            for _ in range(repeat):
+                fn()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_loop) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return items * concurrency * repeat / max(time.perf_counter() - t0, 1e-9)
+
+
+def _pick(scores: dict, tolerance: float = 0.05):
+    """처리량이 최고치의 (1 - tolerance) 이내인 후보 중 가장 작은 값"""
+    best = max(scores.values())
+    return min(k for k, v in scores.items() if v >= best * (1 - tolerance))
+
+
+def _run_calibration() -> dict:
+    deadline = time.monotonic() + CALIBRATION_SECONDS
+    ner_chunk, ocr_image, face_image = _calibration_samples()
+    chosen = {"torch_threads": TORCH_THREADS, "cpu_workers": CPU_WORKERS, "ner_max_batch": NER_MAX_BATCH,
+              "ner_max_batch_chars": NER_MAX_BATCH_CHARS, "ocr_batch_size": OCR_BATCH_SIZE}
+    measured = {}
+
+    def ocr_once(batch):
+        for result in _readtext_many([ocr_image] * batch, batch_size=batch):
+            if isinstance(result, Exception):
+                raise result
+
+    # 1) torch 스레드 수: NER(배치 스레드)과 얼굴(스케줄러 워커)은 워커 수만큼 동시, OCR(단일 배치 스레드) 처리량 합으로 비교
+    if torch is not None and "PII_TORCH_THREADS" not in os.environ and "PII_CPU_WORKERS" not in os.environ:
+        candidates = sorted({t for t in (1, 2, 4, 8, 16, CPU_CORES) if t <= CPU_CORES})
+        per_component = {}
+        for threads in candidates:
+            if time.monotonic() >= deadline:
+                break
+            workers = max(2, CPU_CORES // threads)
+            torch.set_num_threads(threads)
+            row = {"ner": _throughput(lambda: _run_ner_batch([ner_chunk] * 4), 4, concurrency=workers, repeat=1)}
+            if ocr_image is not None and reader is not None:
+                row["ocr"] = _throughput(lambda: ocr_once(1), 1)
+            if face_image is not None and detector is not None:
+                row["face"] = _throughput(lambda: detector.detect_faces(face_image), 1, concurrency=workers, repeat=1)
+            per_component[threads] = row
+        if per_component:
+            best = {c: max(r.get(c, 0) for r in per_component.values()) or 1 for c in per_component[candidates[0]]}
+            scores = {t: sum(r.get(c, 0) / best[c] for c in best) for t, r in per_component.items()}
+            chosen["torch_threads"] = _pick(scores)
+            chosen["cpu_workers"] = max(2, CPU_CORES // chosen["torch_threads"])
+            measured["threads"] = {t: {c: round(v, 2) for c, v in r.items()} for t, r in per_component.items()}
+        torch.set_num_threads(chosen["torch_threads"])
+
+    # 2) NER 배치 크기: 청크/초가 더 이상 의미 있게 늘지 않는 가장 작은 배치
+    if "PII_NER_MAX_BATCH" not in os.environ:
+        scores = {}
+        for batch in (1, 4, 8, 16, 32):
+            if time.monotonic() >= deadline and scores:
+                break
+            scores[batch] = _throughput(lambda: _run_ner_batch([ner_chunk] * batch), batch, repeat=1)
+        chosen["ner_max_batch"] = _pick(scores)
+        if "PII_NER_MAX_BATCH_CHARS" not in os.environ:
+            chosen["ner_max_batch_chars"] = max(NER_MAX_BATCH_CHARS, chosen["ner_max_batch"] * NER_CHUNK_CHARS)
+        measured["ner_batch"] = {b: round(v, 2) for b, v in scores.items()}
+
+    # 3) OCR 배치 크기
+    if ocr_image is not None and reader is not None and "PII_OCR_BATCH_SIZE" not in os.environ:
+        scores = {}
+        for batch in (1, 2, 4, 8, 16):
+            if time.monotonic() >= deadline and scores:
+                break
+            scores[batch] = _throughput(lambda: ocr_once(batch), batch, repeat=1)
+        chosen["ocr_batch_size"] = _pick(scores)
+        measured["ocr_batch"] = {b: round(v, 2) for b, v in scores.items()}
+
+    chosen["measurements"] = measured
+    return chosen
+
+
+# 보정 값 → 직접 지정용 환경변수 (지정돼 있으면 저장된 보정 결과보다 우선)
+_CALIBRATION_ENV = {"torch_threads": "PII_TORCH_THREADS", "cpu_workers": "PII_CPU_WORKERS",
+                    "ner_max_batch": "PII_NER_MAX_BATCH", "ner_max_batch_chars": "PII_NER_MAX_BATCH_CHARS",
+                    "ocr_batch_size": "PII_OCR_BATCH_SIZE"}
+
+
+def _apply_calibration(values: dict, source: str):
+    global TORCH_THREADS, CPU_WORKERS, NER_MAX_BATCH, NER_MAX_BATCH_CHARS, OCR_BATCH_SIZE
+    measurements = values.get("measurements")
+    values = {k: (CALIBRATION[k] if env in os.environ else _clamp_calibration(k, values.get(k, CALIBRATION[k])))
+              for k, env in _CALIBRATION_ENV.items()}
+    values["measurements"] = measurements if isinstance(measurements, dict) else {}
+    TORCH_THREADS = values["torch_threads"]
+    CPU_WORKERS = values["cpu_workers"]
+    NER_MAX_BATCH = values["ner_max_batch"]
+    NER_MAX_BATCH_CHARS = values["ner_max_batch_chars"]
+    OCR_BATCH_SIZE = values["ocr_batch_size"]
+    if torch is not None:
+        torch.set_num_threads(TORCH_THREADS)
+    scheduler.resize(CPU_WORKERS)
+    if ner_batcher is not None:
+        ner_batcher.max_batch = NER_MAX_BATCH
+        ner_batcher.max_cost = NER_MAX_BATCH_CHARS
+        ner_batcher.resize(CPU_WORKERS)
+    if ocr_batcher is not None:
+        ocr_batcher.max_batch = OCR_BATCH_SIZE
+    CALIBRATION.update(values, source=source)
+    print(f"[INFO] [OK] 자동 보정({source}): 워커 {CPU_WORKERS}개 × torch 스레드 {TORCH_THREADS}개, "
+          f"NER 배치 {NER_MAX_BATCH}, OCR 배치 {OCR_BATCH_SIZE}")
+
+
+def calibrate(force: bool = False) -> dict:
+    """저장된 보정 결과가 있으면 적용하고, 없거나 force 이면 벤치마크를 돌려 적용/저장"""
+    if INFERENCE_CLIENT or ner_pipeline is None:
+        return CALIBRATION
+    key = _calibration_key()
+    try:
+        with _calibration_lock():
+            return _calibrate_locked(key, force)
+    except TimeoutError as e:
+        # 측정 중인 프로세스가 멈췄거나 너무 오래 걸림: 잠금 없이 저장된 값만 읽음 (파일은 항상 통째로 교체됨)
+        saved = _load_calibration_file().get(key)
+        logging.warning(f"{e} - {'저장된 보정 값' if isinstance(saved, dict) else '기본값'} 사용")
+        if isinstance(saved, dict):
+            _apply_calibration(saved, "cache")
+        return CALIBRATION
+    except OSError as e:
+        logging.warning(f"자동 보정 잠금 실패, 기본값 사용: {e}")
+        return CALIBRATION
+
+
+def calibrate_from_env() -> dict:
+    """PII_CALIBRATE 설정에 따라 보정 (서버/데몬 시작 시 호출)"""
+    if CALIBRATE_MODE not in ("true", "force"):
+        return CALIBRATION
+    return calibrate(force=CALIBRATE_MODE == "force")
+
+
+def _load_calibration_file() -> dict:
+    try:
+        with open(CALIBRATION_FILE, "r", encoding="utf-8") as f:
+            saved_all = json.load(f)
+        return saved_all if isinstance(saved_all, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _calibrate_locked(key: str, force: bool) -> dict:
+    saved_all = _load_calibration_file()
+    saved = saved_all.get(key)
+    if isinstance(saved, dict) and not force:
+        _apply_calibration(saved, "cache")
+        return CALIBRATION
+    print(f"[INFO] 자동 보정 벤치마크 실행 중 (최대 {CALIBRATION_SECONDS:.0f}초)...")
+    try:
+        values = _run_calibration()
+    except Exception as e:
+        logging.warning(f"자동 보정 실패, 기본값 사용: {e}")
+        return CALIBRATION
+    _apply_calibration(values, "benchmark")
+    saved_all[key] = values
+    # 프로세스별 임시 파일에 쓰고 교체 (다른 프로세스가 읽는 도중에도 항상 완전한 파일)
+    tmp_path = f"{CALIBRATION_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(saved_all, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, CALIBRATION_FILE)
+    except OSError as e:
+        logging.warning(f"자동 보정 결과 저장 실패: {e}")
+    return CALIBRATION
+
+
+def calibration_stats() -> dict:
+    return dict(CALIBRATION)
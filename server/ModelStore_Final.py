@@ -0,0 +1,186 @@
+# =============================
+# File: ModelStore_Final.py
+# Desc: 버전별 로컬 모델 저장소 (NER safetensors + EasyOCR + MTCNN 가중치)
+#
+#       models/
+#         CURRENT                 ← 사용할 버전 이름 (PII_MODEL_VERSION 으로 덮어쓰기 가능)
+#         <version>/
+#           manifest.json         ← 구성 요소 경로와 파일 크기 목록
+#           ner/                  ← tokenizer + model.safetensors (로드 시 mmap)
+#           easyocr/              ← EasyOCR 검출/인식 가중치
+#           mtcnn/                ← MTCNN 가중치
+#
+#       저장소 만들기 (인터넷 되는 PC에서 1회): python ModelStore_Final.py --version 2026.10
+#       만든 models/ 폴더를 폐쇄망 PC에 복사하고 PII_OFFLINE=true 로 서버를 실행합니다.
+# =============================
+
+import os
+import sys
+import json
+import glob
+import shutil
+import logging
+import argparse
+import datetime
+
+NER_MODEL_NAME = "soddokayo/klue-roberta-base-ner"
+OCR_LANGS = ['ko', 'en']
+
+MODEL_DIR = os.getenv("PII_MODEL_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"))
+MODEL_VERSION = os.getenv("PII_MODEL_VERSION", "")
+# 엄격한 오프라인 모드: 허깅페이스 허브/EasyOCR 다운로드를 모두 끄고 로컬 저장소만 사용
+OFFLINE = os.getenv("PII_OFFLINE", "false").lower() == "true"
+
+
+def user_state_dir() -> str:
+    """사용자 전용 상태 디렉토리 (추론 데몬 인증키, 자동 보정 결과 등).
+    Windows 는 %LOCALAPPDATA%\\ShadowAI (사용자 프로필 ACL), 그 외는 ~/.local/state/shadowai (0700)."""
+    if sys.platform == "win32":
+        path = os.path.join(os.getenv("LOCALAPPDATA") or os.path.expanduser("~"), "ShadowAI")
+    else:
+        base = os.getenv("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+        path = os.path.join(base, "shadowai")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def enable_offline():
+    """transformers / huggingface_hub 가 네트워크를 시도하지 않도록 설정 (transformers import 전에 호출)"""
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    os.environ["HF_HUB_DISABLE_TELEMETRY"] = "1"
+
+
+class ModelStore:
+    """한 버전의 로컬 모델 저장소"""
+
+    def __init__(self, root: str, version: str, manifest: dict):
+        self.root = root
+        self.version = version
+        self.manifest = manifest
+        self.base = os.path.join(root, version)
+
+    def path(self, component: str):
+        info = self.manifest.get("components", {}).get(component)
+        if not info:
+            return None
+        return os.path.join(self.base, info["path"])
+
+    def mtcnn_weights(self):
+        info = self.manifest.get("components", {}).get("mtcnn") or {}
+        weights = info.get("weights")
+        return os.path.join(self.base, weights) if weights else None
+
+    def verify(self):
+        """manifest 의 파일 크기와 비교 (전체 해시 대신 크기만 확인해 기동 시간을 늘리지 않음)"""
+        for rel, size in self.manifest.get("files", {}).items():
+            full = os.path.join(self.base, rel)
+            if not os.path.isfile(full):
+                raise ValueError(f"[ERROR] 모델 저장소 파일 누락: {full}")
+            if os.path.getsize(full) != size:
+                raise ValueError(f"[ERROR] 모델 저장소 파일 크기 불일치: {full}")
+
+    @classmethod
+    def open(cls, root: str = MODEL_DIR, version: str = MODEL_VERSION):
+        """저장소가 없으면 None, 있으면 검증된 ModelStore"""
+        if not version:
+            current = os.path.join(root, "CURRENT")
+            if not os.path.isfile(current):
+                return None
+            with open(current, "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        manifest_path = os.path.join(root, version, "manifest.json")
+        if not os.path.isfile(manifest_path):
+            raise ValueError(f"[ERROR] 모델 저장소 버전 '{version}' 의 manifest.json 이 없습니다: {manifest_path}")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            store = cls(root, version, json.load(f))
+        store.verify()
+        return store
+
+
+def _file_sizes(base: str) -> dict:
+    sizes = {}
+    for dirpath, _, files in os.walk(base):
+        for name in files:
+            if name == "manifest.json":
+                continue
+            full = os.path.join(dirpath, name)
+            sizes[os.path.relpath(full, base).replace(os.sep, "/")] = os.path.getsize(full)
+    return sizes
+
+
+def build(root: str, version: str, hf_token: str = None) -> str:
+    """허브/EasyOCR/mtcnn 패키지에서 가중치를 받아 root/version 에 저장소를 만들고 CURRENT 를 갱신"""
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
+
+    target = os.path.join(root, version)
+    if os.path.exists(target):
+        raise ValueError(f"[ERROR] 이미 존재하는 버전입니다: {target}")
+    partial = target + ".partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    components = {}
+
+    print(f"[INFO] NER 모델 저장 중: {NER_MODEL_NAME} → safetensors")
+    ner_dir = os.path.join(partial, "ner")
+    kwargs = {"token": hf_token} if hf_token else {}
+    AutoTokenizer.from_pretrained(NER_MODEL_NAME, **kwargs).save_pretrained(ner_dir)
+    AutoModelForTokenClassification.from_pretrained(NER_MODEL_NAME, **kwargs).save_pretrained(ner_dir, safe_serialization=True)
+    components["ner"] = {"path": "ner", "source": NER_MODEL_NAME, "format": "safetensors"}
+
+    try:
+        import easyocr
+        print(f"[INFO] EasyOCR 가중치 저장 중: {OCR_LANGS}")
+        ocr_dir = os.path.join(partial, "easyocr")
+        os.makedirs(ocr_dir)
+        easyocr.Reader(OCR_LANGS, gpu=False, model_storage_directory=ocr_dir, user_network_directory=ocr_dir, download_enabled=True)
+        components["easyocr"] = {"path": "easyocr", "langs": OCR_LANGS}
+    except ImportError:
+        print("[WARN] easyocr 미설치 - OCR 가중치 없이 저장소를 만듭니다.")
+
+    try:
+        import mtcnn
+        pkg_dir = os.path.dirname(mtcnn.__file__)
+        weights = [p for ext in ("*.npy", "*.lz4", "*.h5") for p in glob.glob(os.path.join(pkg_dir, "**", ext), recursive=True)]
+        if weights:
+            mtcnn_dir = os.path.join(partial, "mtcnn")
+            os.makedirs(mtcnn_dir)
+            for w in weights:
+                shutil.copy2(w, mtcnn_dir)
+            components["mtcnn"] = {"path": "mtcnn", "weights": "mtcnn/" + os.path.basename(weights[0])}
+            print(f"[INFO] MTCNN 가중치 저장: {', '.join(os.path.basename(w) for w in weights)}")
+    except ImportError:
+        print("[WARN] mtcnn 미설치 - 얼굴 탐지 가중치 없이 저장소를 만듭니다.")
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "components": components,
+        "files": _file_sizes(partial),
+    }
+    with open(os.path.join(partial, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(partial, target)
+
+    current_tmp = os.path.join(root, "CURRENT.tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(root, "CURRENT"))
+    print(f"[INFO] [OK] 모델 저장소 생성 완료: {target}")
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="버전별 로컬 모델 저장소 생성")
+    parser.add_argument("--version", required=True, help="저장소 버전 이름 (예: 2026.10)")
+    parser.add_argument("--output", default=MODEL_DIR, help=f"저장소 루트 (기본: {MODEL_DIR})")
+    args = parser.parse_args()
+    try:
+        build(args.output, args.version, os.getenv("HF_TOKEN"))
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# =============================
+# File: Supervisor_Final.py
+# Desc: 탐지 서버 워커 감시/재활용 슈퍼바이저.
+#       torch / EasyOCR / PIL 의 메모리 풀은 큰 문서를 처리할수록 커지기만 하므로, 워커별 상주 메모리(RSS)와
+#       처리 요청 수를 감시하다가 기준을 넘은 워커를 한 번에 하나씩 교체합니다.
+#       교체 순서: 새 워커 기동(모델 로드 + 워밍업) → 준비 완료 후 기존 워커에 종료 신호 →
+#                  기존 워커는 새 연결을 받지 않고 처리 중인 요청만 마친 뒤 종료.
+#
+#       실행: python Supervisor_Final.py   (LocalServer_Final.py 대신 실행, 포트/워커 수 설정은 같음)
+# =============================
+
+import os
+import sys
+import time
+import logging
+import threading
+import multiprocessing
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import win32api
+    import win32con
+    import win32process
+except ImportError:
+    win32process = None
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 9000
+SERVER_WORKERS = max(1, int(os.getenv("PII_SERVER_WORKERS", "1")))
+# 재활용 기준 (0 이면 해당 기준 사용 안 함)
+WORKER_MAX_RSS_MB = int(os.getenv("PII_WORKER_MAX_RSS_MB", "4096"))
+WORKER_MAX_REQUESTS = int(os.getenv("PII_WORKER_MAX_REQUESTS", "5000"))
+WORKER_CHECK_INTERVAL = float(os.getenv("PII_WORKER_CHECK_INTERVAL", "5"))
+# 기존 워커가 처리 중인 요청을 마칠 때까지 기다리는 시간, 새 워커가 모델을 올릴 때까지 기다리는 시간(초)
+WORKER_DRAIN_TIMEOUT = float(os.getenv("PII_WORKER_DRAIN_TIMEOUT", "60"))
+WORKER_READY_TIMEOUT = float(os.getenv("PII_WORKER_READY_TIMEOUT", "600"))
+
+WARMUP_TEXT = "홍길동 과장 010-1234-5678 서울 강남구 역삼동 123 hong@example.com"
+
+
+def process_rss(pid: int) -> int:
+    """프로세스 상주 메모리(바이트). 확인할 수 없으면 0"""
+    try:
+        if psutil is not None:
+            return psutil.Process(pid).memory_info().rss
+        if sys.platform == "win32":
+            if win32process is None:
+                return 0
+            handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, False, pid)
+            try:
+                return win32process.GetProcessMemoryInfo(handle)["WorkingSetSize"]
+            finally:
+                win32api.CloseHandle(handle)
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+# ==========================
+# 워커 프로세스
+# ==========================
+
+class _CountingApp:
+    """HTTP 요청 수를 슈퍼바이저와 공유하는 카운터에 더하는 ASGI 래퍼"""
+
+    def __init__(self, app, counter):
+        self.app = app
+        self.counter = counter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            with self.counter.get_lock():
+                self.counter.value += 1
+        await self.app(scope, receive, send)
+
+
+def _worker_main(sock, slot, counter, ready, stop):
+    import uvicorn
+    # LocalServer_Final import 시 Logic_Final 이 모델을 로드(또는 추론 데몬에 연결)
+    import LocalServer_Final as server_module
+    from Logic_Final import detection_pipeline
+
+    # 첫 추론의 지연(커널 초기화 등)을 트래픽 전에 치름
+    try:
+        detection_pipeline.run(WARMUP_TEXT)
+    except Exception as e:
+        logging.warning(f"워커 {slot} 워밍업 실패: {e}")
+
+    config = uvicorn.Config(_CountingApp(server_module.app, counter), host=SERVER_HOST, port=SERVER_PORT,
+                            timeout_graceful_shutdown=int(WORKER_DRAIN_TIMEOUT))
+    server = uvicorn.Server(config)
+
+    def _signal_ready():
+        while not server.started and not server.should_exit:
+            time.sleep(0.1)
+        ready.set()
+
+    def _watch_stop():
+        # 종료 신호: 새 연결 수락을 멈추고 처리 중인 요청이 끝나면 종료 (uvicorn graceful shutdown)
+        stop.wait()
+        server.should_exit = True
+
+    threading.Thread(target=_signal_ready, daemon=True).start()
+    threading.Thread(target=_watch_stop, daemon=True).start()
+    server.run(sockets=[sock])
+
+
+# ==========================
+# 슈퍼바이저
+# ==========================
+
+class _Worker:
+    def __init__(self, ctx, slot, target, sock):
+        self.slot = slot
+        self.counter = ctx.Value('Q', 0)
+        self.ready = ctx.Event()
+        self.stop = ctx.Event()
+        self.process = ctx.Process(target=target, args=(sock, slot, self.counter, self.ready, self.stop),
+                                   name=f"pii-worker-{slot}")
+        self.started_at = time.monotonic()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def requests(self) -> int:
+        return self.counter.value
+
+    def wait_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready.wait(0.5):
+                return True
+            if not self.process.is_alive():
+                return False
+        return False
+
+    def shutdown(self, timeout: float):
+        self.stop.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logging.warning(f"워커 {self.slot}(pid {self.pid}) 이 {timeout:.0f}초 안에 종료되지 않아 강제 종료합니다.")
+            self.process.terminate()
+            self.process.join(5)
+
+
+class WorkerSupervisor:
+    """공유 리스닝 소켓 하나에 워커 프로세스 여러 개를 붙여 두고, RSS/요청 수 기준으로 하나씩 교체하는 감시자"""
+
+    def __init__(self, workers: int = SERVER_WORKERS, max_rss_mb: int = WORKER_MAX_RSS_MB,
+                 max_requests: int = WORKER_MAX_REQUESTS, check_interval: float = WORKER_CHECK_INTERVAL,
+                 drain_timeout: float = WORKER_DRAIN_TIMEOUT, ready_timeout: float = WORKER_READY_TIMEOUT,
+                 target=_worker_main, sock=None):
+        self.size = max(1, workers)
+        self.max_rss = max_rss_mb * 1024 * 1024
+        if self.max_rss > 0 and process_rss(os.getpid()) == 0:
+            # 기준을 켜 두고 조용히 무시하면 메모리가 계속 늘어도 교체되지 않음
+            raise ValueError("[ERROR] 이 환경에서는 프로세스 메모리(RSS)를 읽을 수 없습니다. "
+                             "psutil 을 설치하거나 PII_WORKER_MAX_RSS_MB=0 으로 RSS 기준을 끄세요.")
+        self.max_requests = max_requests
+        self.check_interval = check_interval
+        self.drain_timeout = drain_timeout
+        self.ready_timeout = ready_timeout
+        self.target = target
+        self.sock = sock
+        self.recycled = 0
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers = {}
+        self._stopping = threading.Event()
+
+    def _spawn(self, slot: int) -> _Worker:
+        worker = _Worker(self._ctx, slot, self.target, self.sock)
+        worker.process.start()
+        return worker
+
+    def _recycle_reason(self, worker: _Worker):
+        if self.max_requests > 0 and worker.requests >= self.max_requests:
+            return f"요청 {worker.requests}건"
+        if self.max_rss > 0:
+            rss = process_rss(worker.pid)
+            if rss >= self.max_rss:
+                return f"RSS {rss // (1024 * 1024)}MB"
+        return None
+
+    def _replace(self, slot: int, reason: str) -> bool:
+        """새 워커가 준비된 뒤에만 기존 워커를 내림 (준비 실패 시 기존 워커 유지)"""
+        old = self._workers[slot]
+        print(f"[INFO] 워커 {slot}(pid {old.pid}) 교체 시작: {reason}")
+        new = self._spawn(slot)
+        if not new.wait_ready(self.ready_timeout):
+            logging.warning(f"워커 {slot} 교체용 프로세스가 준비되지 않아 기존 워커를 유지합니다.")
+            new.shutdown(5)
+            return False
+        self._workers[slot] = new
+        old.shutdown(self.drain_timeout)
+        self.recycled += 1
+        print(f"[INFO] [OK] 워커 {slot} 교체 완료: pid {old.pid} → {new.pid}")
+        return True
+
+    def _check(self):
+        candidates = []
+        for slot, worker in list(self._workers.items()):
+            if not worker.process.is_alive():
+                logging.warning(f"워커 {slot}(pid {worker.pid}) 가 종료됨 (exit {worker.process.exitcode}) - 재시작")
+                self._workers[slot] = self._spawn(slot)
+                continue
+            if not worker.ready.is_set():
+                continue
+            reason = self._recycle_reason(worker)
+            if reason:
+                candidates.append((worker.started_at, slot, reason))
+        # 한 번의 점검 주기에 가장 오래된 워커 하나만 교체 (나머지 워커가 계속 트래픽을 받음)
+        if candidates and not self._stopping.is_set():
+            _, slot, reason = min(candidates)
+            self._replace(slot, reason)
+
+    def stats(self) -> dict:
+        return {
+            "recycled": self.recycled,
+            "workers": {slot: {"pid": w.pid, "requests": w.requests, "rss": process_rss(w.pid),
+                               "uptime": round(time.monotonic() - w.started_at, 1)}
+                        for slot, w in self._workers.items()},
+        }
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        if self.sock is None:
+            import uvicorn
+            self.sock = uvicorn.Config("LocalServer_Final:app", host=SERVER_HOST, port=SERVER_PORT).bind_socket()
+        print(f"[INFO] 슈퍼바이저 시작: 워커 {self.size}개, 기준 RSS {self.max_rss // (1024 * 1024)}MB / 요청 {self.max_requests}건")
+        # 첫 워커가 준비(모델 로드 + 자동 보정)된 뒤 나머지를 띄움: 보정 벤치마크가 다른 워커의 기동 부하와 겹치지 않고,
+        # 나머지 워커는 저장된 보정 결과를 그대로 읽음
+        self._workers[0] = self._spawn(0)
+        if self.size > 1 and not self._workers[0].wait_ready(self.ready_timeout):
+            logging.warning("첫 워커가 준비되지 않았지만 나머지 워커를 기동합니다.")
+        for slot in range(1, self.size):
+            self._workers[slot] = self._spawn(slot)
+        try:
+            while not self._stopping.wait(self.check_interval):
+                self._check()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for worker in self._workers.values():
+                worker.stop.set()
+            for worker in self._workers.values():
+                worker.shutdown(self.drain_timeout)
+            self.sock.close()
+            print("[INFO] 슈퍼바이저 종료")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+    if SERVER_WORKERS > 1 and not os.getenv("PII_INFERENCE_ADDRESS"):
+        logging.warning("[WARN] PII_SERVER_WORKERS > 1 이지만 PII_INFERENCE_ADDRESS 가 없어 워커마다 모델을 로드합니다.")
+    WorkerSupervisor().run()
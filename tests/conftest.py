@@ -0,0 +1,16 @@
+# =============================
+# File: conftest.py
+# Desc: server/ 모듈을 import 할 수 있도록 경로와 테스트용 환경변수를 설정합니다.
+#       모델(NER/OCR/얼굴)은 로드하지 않고(PII_LOAD_MODELS=false) 시작 시 자동 보정도 끕니다.
+#       numpy 가 없는 환경에서는 Logic_Final 을 쓰는 테스트가 건너뛰어집니다.
+# =============================
+
+import os
+import sys
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server")
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+os.environ.setdefault("PII_LOAD_MODELS", "false")
+os.environ.setdefault("PII_CALIBRATE", "false")
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+# (문장, 탐지돼야 하는 주소) - 사전/정규식을 고치면 이 목록으로 회귀 확인
+ADDRESS_REGRESSION_CASES = [
+    ("다음 주에 부산으로 출장", []),
+    ("대전으로 이사했어요", []),
+    ("서울 출장으로 바쁩니다", []),
+    ("서울 본사로 오세요", []),
+    ("서구 문화센터로 가세요", []),
+    ("서울 본사로 3층 회의실", []),
+    ("강남구 이동 중입니다", []),
+    ("강남구 학동에서 만나요", ["강남구 학동"]),
+    ("서울 강남구 역삼동", ["서울 강남구 역삼동"]),
+    ("서울특별시 강남구 테헤란로 123", ["서울특별시 강남구 테헤란로 123"]),
+    ("서울 강남구 도산대로45길에 있어요", ["서울 강남구 도산대로45길"]),
+    ("경기 성남시 분당구 정자동 123-4 에 삽니다", ["경기 성남시 분당구 정자동 123-4"]),
+    ("경기 양평군 양평읍 양근리", ["경기 양평군 양평읍 양근리"]),
+]
+
+
+@pytest.mark.parametrize("sentence, expected", ADDRESS_REGRESSION_CASES)
+def test_address_detection(sentence, expected):
+    assert [d["value"] for d in logic.detect_addresses(sentence)] == expected
+
+
+def test_address_span_and_dedupe():
+    text = "주소: 서울 강남구 역삼동, 다시 서울 강남구 역삼동"
+    found = logic.detect_addresses(text)
+    assert len(found) == 1
+    start, end = found[0]["span"]
+    assert text[start:end] == "서울 강남구 역삼동"
+    assert found[0]["type"] == "LC"
+
+
+def test_address_not_started_inside_word():
+    # "한서울" 의 서울은 시/도로 보지 않고, 다음 단어부터 주소로 봄
+    assert [d["value"] for d in logic.detect_addresses("한서울 강남구 역삼동")] == ["강남구 역삼동"]
+
+
+def test_trie_longest_match():
+    trie = logic.ADDRESS_TRIE
+    level, end = trie.longest("서울특별시 강남구", 0)
+    assert (level, end) == (logic._ADDR_SIDO, len("서울특별시"))
+    assert trie.longest("강남구청", 0) == (logic._ADDR_SIGUNGU, 3)
+    assert trie.longest("없는말", 0) is None
+    # '시' 를 뗀 시 이름도 시/군/구로 등록됨
+    assert trie.longest("성남 분당구", 0) == (logic._ADDR_SIGUNGU, 2)
+    assert "서" in trie.first_chars and "강" in trie.first_chars
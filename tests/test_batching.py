@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from Batching_Final import BatchWorker
+
+
+class Recorder:
+    """배치 목록을 기록하고, gate 가 열릴 때까지 첫 배치를 붙잡아 두는 배치 함수"""
+
+    def __init__(self, hold_first=True):
+        self.batches = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        if not hold_first:
+            self.gate.set()
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        self.started.set()
+        assert self.gate.wait(5)
+        return [x * 10 for x in items]
+
+
+def test_single_request_runs_immediately():
+    worker = BatchWorker(Recorder(hold_first=False), max_wait=5)
+    assert worker(3) == 30  # 혼자 온 요청은 max_wait 를 기다리지 않음
+    assert worker.batches == 1 and worker.items == 1
+
+
+def test_requests_queued_while_busy_are_batched():
+    fn = Recorder()
+    worker = BatchWorker(fn, max_wait=0.05, max_batch=4)
+    first = worker.submit(0)
+    assert fn.started.wait(5)
+    rest = [worker.submit(i) for i in range(1, 7)]
+    fn.gate.set()
+    assert [f.result(5) for f in [first] + rest] == [0, 10, 20, 30, 40, 50, 60]
+    assert fn.batches == [[0], [1, 2, 3, 4], [5, 6]]
+
+
+def test_max_cost_limits_batch():
+    fn = Recorder()
+    worker = BatchWorker(fn, max_wait=0.05, max_batch=10, cost=lambda x: x, max_cost=5)
+    worker.submit(0)
+    assert fn.started.wait(5)
+    futures = [worker.submit(x) for x in (3, 3, 1, 4)]
+    fn.gate.set()
+    for f in futures:
+        f.result(5)
+    assert fn.batches[1:] == [[3, 3], [1, 4]]
+
+
+def test_submit_many_stays_together():
+    fn = Recorder()
+    worker = BatchWorker(fn, max_wait=0.05, max_batch=2)
+    worker.submit(0)
+    assert fn.started.wait(5)
+    futures = worker.submit_many([1, 2, 3]) + worker.submit_many([4])
+    assert worker.submit_many([]) == []
+    fn.gate.set()
+    assert [f.result(5) for f in futures] == [10, 20, 30, 40]
+    assert fn.batches[1:] == [[1, 2, 3], [4]]  # 묶음은 max_batch 보다 커도 쪼개지지 않음
+
+
+def test_errors_and_cancellation():
+    fn = Recorder()
+    worker = BatchWorker(lambda items: fn(items) if items != ["bad"] else 1 / 0, max_wait=0.05)
+    worker.submit(0)
+    assert fn.started.wait(5)
+    cancelled = worker.submit(1)
+    assert cancelled.cancel()
+    kept = worker.submit(2)
+    fn.gate.set()
+    assert kept.result(5) == 20
+    assert fn.batches[1] == [2]
+    with pytest.raises(ZeroDivisionError):
+        worker("bad")
+    assert worker("ok") == "ok" * 10  # 실패 뒤에도 계속 동작
+
+
+def test_parallel_workers_split_queued_requests():
+    barrier = threading.Barrier(2, timeout=5)
+    batches = []
+
+    def fn(items):
+        batches.append(list(items))
+        barrier.wait()  # 두 배치가 동시에 실행되어야 통과
+        return items
+
+    worker = BatchWorker(fn, max_wait=0.05, max_batch=8, workers=2)
+    futures = worker.submit_many([1]) + worker.submit_many([2])
+    assert sorted(f.result(5) for f in futures) == [1, 2]
+    assert sorted(batches) == [[1], [2]]
+
+
+def test_resize_down_stops_extra_threads():
+    worker = BatchWorker(lambda items: items, workers=3)
+    assert worker(1) == 1
+    worker.resize(1)
+    for i in range(10):
+        assert worker(i) == i
+    deadline = time.monotonic() + 5
+    while worker._alive > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert worker._alive == 1  # 남는 스레드는 배치를 마친 뒤 종료
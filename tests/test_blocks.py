@@ -0,0 +1,142 @@
+import random
+import re
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+_PHONE = re.compile(r"(?<!\d)010-\d{4}-\d{4}(?!\d)")
+_WORDS = ["회의", "자료", "정리", "보고", "일정", "예산", "검토", "결과", "요청", "확인", "담당", "내용"]
+
+
+def _document(seed, n_words=3000):
+    rng = random.Random(seed)
+    words = []
+    for i in range(n_words):
+        if rng.random() < 0.02:
+            words.append(f"010-{rng.randrange(10000):04d}-{rng.randrange(10000):04d}")
+        else:
+            words.append(rng.choice(_WORDS) + str(rng.randrange(100)))
+    return " ".join(words)
+
+
+def _phones_once(text):
+    """값 단위로 한 번만 보고하는 문맥 무관 탐지기"""
+    seen, out = set(), []
+    for m in _PHONE.finditer(text):
+        if m.group() not in seen:
+            seen.add(m.group())
+            out.append(logic.Detection("phone", m.group(), m.span()))
+    return out
+
+
+def _every_phone(text):
+    return [logic.Detection("phone_hit", m.group(), m.span()) for m in _PHONE.finditer(text)]
+
+
+class Pipeline(logic.DetectionPipeline):
+    def __init__(self):
+        super().__init__()
+        self.scanned = []
+        self.register("once", self._count(_phones_once))
+        self.register("every", self._count(_every_phone), dedupe=False)
+
+    def _count(self, fn):
+        def run(text):
+            self.scanned.append(len(text))
+            return fn(text)
+        return run
+
+
+def _key(items):
+    return sorted((it["type"], it["value"], it["span"]) for it in items)
+
+
+def test_blocks_cover_text_with_bounded_sizes():
+    text = _document(1)
+    blocks = logic.split_blocks(text, 256)
+    assert blocks[0][0] == 0 and blocks[-1][1] == len(text)
+    assert all(a[1] == b[0] for a, b in zip(blocks, blocks[1:]))
+    assert all(256 // 4 <= e - s <= 256 * 4 + 20 for s, e in blocks[:-1])
+    assert logic.split_blocks("", 256) == [] and logic.split_blocks("짧음", 256) == [(0, 2)]
+
+
+def test_boundaries_survive_an_edit_before_them():
+    text = _document(2)
+    edited = "머리말 추가 " * 5 + text
+    shift = len(edited) - len(text)
+    before = set(logic.split_blocks(text, 256))
+    after = {(s - shift, e - shift) for s, e in logic.split_blocks(edited, 256)}
+    assert len(before & after) >= len(before) - 2
+
+
+def test_cached_rescan_matches_full_scan_and_skips_unchanged_blocks():
+    pipeline = Pipeline()
+    cache = logic.BlockScanCache(pipeline, target=256, margin=20)
+    text = _document(3)
+    assert _key(cache.scan(text)) == _key(pipeline.run(text))
+    assert cache.misses == len(logic.split_blocks(text, 256))
+
+    mid = len(text) // 2
+    edited = text[:mid] + " 010-5555-6666 010-5555-6666 " + text[mid:]
+    pipeline.scanned.clear()
+    got = cache.scan(edited)
+    assert sum(pipeline.scanned) < len(edited) // 4  # 바뀐 블록 주변만 다시 검사
+    pipeline.scanned.clear()
+    assert _key(got) == _key(pipeline.run(edited))
+    assert [it["value"] for it in got if it["type"] == "phone"].count("010-5555-6666") == 1
+    assert cache.hits > 0
+
+
+def test_random_edits_match_full_scan():
+    rng = random.Random(4)
+    pipeline = Pipeline()
+    cache = logic.BlockScanCache(pipeline, target=128, margin=20)
+    text = _document(5, 1500)
+    for _ in range(15):
+        at = rng.randrange(len(text))
+        cut = rng.randrange(0, 40)
+        text = text[:at] + rng.choice(["", " 010-1234-5678 ", "보고서 ", "0"]) + text[at + cut:]
+        assert _key(cache.scan(text)) == _key(pipeline.run(text))
+
+
+def test_spanless_items_come_from_a_full_rerun():
+    calls = []
+
+    def digits_only(text):
+        calls.append(len(text))
+        return [logic.Detection("card", "4111111111111111", None)] if "4111 1111 1111 1111" in text else []
+
+    pipeline = logic.DetectionPipeline()
+    pipeline.register("card", digits_only)
+    cache = logic.BlockScanCache(pipeline, target=128, margin=20)
+    text = _document(6, 800) + " 4111 1111 1111 1111 끝"
+    cache.scan(text)
+    calls.clear()
+    edited = "앞 " + text
+    assert cache.scan(edited) == [{"type": "card", "value": "4111111111111111", "span": None}]
+    assert calls[-1] == len(edited)
+
+
+def test_truncated_results_are_not_stored(monkeypatch):
+    pipeline = Pipeline()
+    cache = logic.BlockScanCache(pipeline, target=256, margin=20)
+    budget = logic.ScanBudget(seconds=0, stage_seconds={})
+    budget.truncated["detect"] = "time"
+    token = logic._current_budget.set(budget)
+    try:
+        cache.scan(_document(7))
+    finally:
+        logic._current_budget.reset(token)
+    assert cache.stats()["blocks"] == 0
+
+
+def test_cache_is_bounded_and_can_be_disabled():
+    pipeline = Pipeline()
+    cache = logic.BlockScanCache(pipeline, target=256, margin=20, max_blocks=5)
+    cache.scan(_document(8))
+    assert cache.stats()["blocks"] == 5
+    off = logic.BlockScanCache(pipeline, target=256, max_blocks=0)
+    text = _document(9)
+    assert _key(off.scan(text)) == _key(pipeline.run(text)) and off.stats()["blocks"] == 0
@@ -0,0 +1,63 @@
+import contextvars
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _unlimited_work(budget):
+    for stage in ("parse", "ocr", "face", "detect"):
+        assert budget.ok(stage)
+        assert budget.limit("images", 10 ** 6, stage) == 10 ** 6
+        assert budget.take("ocr_chars", 10 ** 9, stage)
+
+
+def test_default_budget_is_shared_and_stateless():
+    budget = logic.current_budget()
+    assert budget is logic._UNLIMITED
+    _unlimited_work(budget)
+    _unlimited_work(contextvars.copy_context().run(logic.current_budget))
+    assert budget.report() is None
+    assert dict(budget.truncated) == {}
+    assert not hasattr(budget, "_used")
+    with pytest.raises(TypeError):
+        budget.truncated["detect"] = "time"
+
+
+def test_workload_limits_per_stage():
+    budget = logic.ScanBudget(seconds=0, pages=3, images=2, ocr_chars=10, stage_seconds={})
+    assert budget.limit("pages", 2, "parse") == 2
+    assert budget.limit("pages", 5, "parse") == 1
+    assert budget.limit("images", 2, "ocr") == 2
+    assert budget.limit("images", 2, "face") == 2  # 단계별로 따로 셈
+    assert budget.take("ocr_chars", 9, "ocr")
+    assert not budget.take("ocr_chars", 1, "ocr")
+    assert budget.truncated == {"parse": "pages", "ocr": "ocr_chars"}
+    assert budget.report()["stages"] == {"parse": "pages", "ocr": "ocr_chars"}
+
+
+def test_time_and_stage_deadlines():
+    budget = logic.ScanBudget(seconds=0, pages=0, images=0, ocr_chars=0, stage_seconds={"ocr": 0.05})
+    assert budget.ok("ocr") and budget.ok("parse")
+    time.sleep(0.06)
+    assert not budget.ok("ocr")
+    assert budget.ok("parse")
+    assert budget.truncated == {"ocr": "stage_time"}
+
+    expired = logic.ScanBudget(seconds=0.01, stage_seconds={})
+    time.sleep(0.02)
+    assert not expired.ok("detect")
+    assert expired.truncated == {"detect": "time"}
+
+
+def test_budget_is_per_context():
+    budget = logic.ScanBudget(seconds=0, pages=1, images=0, ocr_chars=0, stage_seconds={})
+
+    def scan():
+        logic._current_budget.set(budget)
+        return logic.current_budget()
+
+    assert contextvars.copy_context().run(scan) is budget
+    assert logic.current_budget() is logic._UNLIMITED
@@ -0,0 +1,93 @@
+import json
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+@pytest.fixture
+def calibration(monkeypatch, tmp_path):
+    """임시 보정 파일 + 보정이 바꾸는 모듈 전역값 복원"""
+    monkeypatch.setattr(logic, "CALIBRATION_FILE", str(tmp_path / "calibration.json"))
+    for name in ("TORCH_THREADS", "CPU_WORKERS", "NER_MAX_BATCH", "NER_MAX_BATCH_CHARS", "OCR_BATCH_SIZE"):
+        monkeypatch.setattr(logic, name, getattr(logic, name))
+    monkeypatch.setattr(logic, "CALIBRATION", dict(logic.CALIBRATION))
+    workers = logic.scheduler.workers
+    yield tmp_path
+    logic.scheduler.resize(workers)
+
+
+def test_clamp_rejects_out_of_range_and_garbage():
+    assert logic._clamp_calibration("ner_max_batch", 10 ** 6) == 64
+    assert logic._clamp_calibration("ner_max_batch", -3) == 1
+    assert logic._clamp_calibration("ocr_batch_size", "abc") == logic.CALIBRATION["ocr_batch_size"]
+
+
+def test_pick_prefers_smallest_within_tolerance():
+    assert logic._pick({1: 10.0, 4: 19.5, 8: 20.0, 16: 19.9}) == 4
+    assert logic._pick({1: 10.0, 4: 12.0}) == 4
+
+
+def test_calibrate_from_env_disabled(monkeypatch):
+    monkeypatch.setattr(logic, "CALIBRATE_MODE", "false")
+    monkeypatch.setattr(logic, "calibrate", lambda force=False: pytest.fail("보정이 실행됨"))
+    assert logic.calibrate_from_env() is logic.CALIBRATION
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock 기반 테스트")
+def test_lock_times_out_while_held(calibration):
+    with logic._calibration_lock(timeout=0):
+        with pytest.raises(TimeoutError):
+            with logic._calibration_lock(timeout=0.3):
+                pass
+    # 풀린 뒤에는 바로 잡힘
+    with logic._calibration_lock(timeout=0):
+        pass
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock 기반 테스트")
+def test_lock_timeout_falls_back_to_cached_values(calibration, monkeypatch):
+    monkeypatch.setattr(logic, "ner_pipeline", object())
+    monkeypatch.setattr(logic, "CALIBRATION_LOCK_TIMEOUT", 0.3)
+    monkeypatch.setattr(logic, "_run_calibration", lambda: pytest.fail("잠금 없이 측정함"))
+    for env in logic._CALIBRATION_ENV.values():
+        monkeypatch.delenv(env, raising=False)
+    key = logic._calibration_key()
+    with open(logic.CALIBRATION_FILE, "w", encoding="utf-8") as f:
+        json.dump({key: {"torch_threads": 1, "cpu_workers": 3, "ner_max_batch": 999, "ocr_batch_size": 2}}, f)
+
+    with logic._calibration_lock(timeout=0):
+        result = logic.calibrate()
+    assert result["source"] == "cache"
+    assert (logic.CPU_WORKERS, logic.NER_MAX_BATCH, logic.OCR_BATCH_SIZE) == (3, 64, 2)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock 기반 테스트")
+def test_lock_timeout_without_cache_keeps_defaults(calibration, monkeypatch):
+    monkeypatch.setattr(logic, "ner_pipeline", object())
+    monkeypatch.setattr(logic, "CALIBRATION_LOCK_TIMEOUT", 0.3)
+    monkeypatch.setattr(logic, "_run_calibration", lambda: pytest.fail("잠금 없이 측정함"))
+    with logic._calibration_lock(timeout=0):
+        assert logic.calibrate()["source"] == "defaults"
+
+
+def test_benchmark_result_is_saved_and_reused(calibration, monkeypatch):
+    monkeypatch.setattr(logic, "ner_pipeline", object())
+    for env in logic._CALIBRATION_ENV.values():
+        monkeypatch.delenv(env, raising=False)
+    runs = []
+
+    def fake_run():
+        runs.append(1)
+        return {"torch_threads": 1, "cpu_workers": 2, "ner_max_batch": 8, "ner_max_batch_chars": 4000,
+                "ocr_batch_size": 4, "measurements": {"ner_batch": {8: 1.0}}}
+
+    monkeypatch.setattr(logic, "_run_calibration", fake_run)
+    assert logic.calibrate()["source"] == "benchmark"
+    assert logic.calibrate()["source"] == "cache"
+    assert logic.calibrate(force=True)["source"] == "benchmark"
+    assert len(runs) == 2
+    with open(logic.CALIBRATION_FILE, encoding="utf-8") as f:
+        assert list(json.load(f)) == [logic._calibration_key()]
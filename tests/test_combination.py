@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _item(t, value, start):
+    return {"type": t, "value": value, "span": (start, start + len(value))}
+
+
+def _text_with(items, length):
+    chars = [" "] * length
+    for it in items:
+        s, e = it["span"]
+        chars[s:e] = it["value"]
+    return "".join(chars)
+
+
+def test_nearby_quasi_identifiers_form_a_cluster():
+    items = [_item("PS", "홍길동", 10), _item("position", "과장", 20), _item("phone", "010-1234-5678", 30)]
+    comb = logic.analyze_combination_risk(items, _text_with(items, 60))
+    assert comb["level"] == "high"
+    assert comb["counts"] == {"quasi": 2, "clustered": 2, "clusters": 1}
+    (cluster,) = comb["clusters"]
+    assert (cluster["start"], cluster["end"], cluster["line"]) == (10, 22, 1)
+    assert cluster["types"] == ["PS", "position"]
+
+
+def test_far_apart_or_single_type_is_not_a_combination(monkeypatch):
+    monkeypatch.setattr(logic, "COMB_WINDOW_CHARS", 50)
+    far = [_item("PS", "홍길동", 0), _item("position", "과장", 200)]
+    assert logic.analyze_combination_risk(far, _text_with(far, 220)) is None
+    same = [_item("PS", "홍길동", 0), _item("PS", "김철수", 10)]
+    assert logic.analyze_combination_risk(same, _text_with(same, 20)) is None
+    ids = [_item("phone", "010-1234-5678", 0), _item("email", "a@b.co", 20), _item("PS", "홍길동", 30)]
+    assert logic.analyze_combination_risk(ids, _text_with(ids, 40)) is None
+
+
+def test_separate_clusters_are_reported(monkeypatch):
+    monkeypatch.setattr(logic, "COMB_WINDOW_CHARS", 50)
+    items = [_item("PS", "홍길동", 0), _item("LC", "서울", 10),
+             _item("PS", "김철수", 500), _item("ORG", "총무팀", 520)]
+    comb = logic.analyze_combination_risk(items, _text_with(items, 600))
+    assert [(c["start"], c["end"]) for c in comb["clusters"]] == [(0, 12), (500, 523)]
+    assert comb["message"].endswith("(2개 구간)")
+
+
+def test_paragraph_window(monkeypatch):
+    monkeypatch.setattr(logic, "COMB_WINDOW_PARAGRAPHS", 1)
+    text = "홍길동\n" + "x" * 2000 + " 과장\n\n\n서울"
+    items = [_item("PS", "홍길동", 0), _item("position", "과장", text.index("과장")),
+             _item("LC", "서울", text.index("서울"))]
+    comb = logic.analyze_combination_risk(items, text)
+    (cluster,) = comb["clusters"]
+    assert cluster["types"] == ["PS", "position"]  # 과장은 2000자 떨어져도 바로 다음 문단, 서울은 3문단 뒤라 제외
+
+
+def test_spanless_items_are_located_by_value():
+    text = "담당 과장 홍길동"
+    items = [{"type": "PS", "value": "홍길동", "span": None}, {"type": "position", "value": "과장"}]
+    (cluster,) = logic.analyze_combination_risk(items, text)["clusters"]
+    assert (cluster["start"], cluster["end"]) == (3, 9)
+
+
+def _naive_clustered(located, window):
+    coords = [c for c, _, _, _ in located]
+    members = set()
+    for r in range(len(located)):
+        left = next(i for i in range(r + 1) if coords[r] - coords[i] <= window)
+        if len({located[i][3]["type"] for i in range(left, r + 1)}) >= 2:
+            members.update(range(left, r + 1))
+    return members
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sweep_matches_brute_force(monkeypatch, seed):
+    monkeypatch.setattr(logic, "COMB_WINDOW_CHARS", 40)
+    rng = random.Random(seed)
+    items = [_item(rng.choice(["PS", "LC", "position"]), "ab", rng.randrange(0, 400)) for _ in range(rng.randint(2, 25))]
+    text = _text_with(items, 410)
+    located = logic._locate_quasis(items, text, [0])
+    expected = {id(located[i][3]) for i in _naive_clustered(located, 40)}
+    clusters = logic.find_quasi_clusters(items, text)
+    got = [id(it) for c in clusters for it in c["items"]]
+    assert len(got) == len(set(got))
+    assert set(got) == expected
+
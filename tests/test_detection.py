@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def test_dict_style_access():
+    d = logic.Detection("phone", "010-1234-5678", (3, 16))
+    assert d["type"] == "phone" and d.get("span") == (3, 16)
+    assert "status" not in d and d.get("status") is None and d.get("status", "-") == "-"
+    with pytest.raises(KeyError):
+        d["status"]
+    with pytest.raises(KeyError):
+        d["other"]
+    d["status"] = "valid"
+    assert "status" in d and d["status"] == "valid"
+    assert d.keys() == ["type", "value", "span", "status"]
+    with pytest.raises(KeyError):
+        d["extra"] = 1
+
+
+def test_slots_and_interning():
+    a = logic.Detection("email", "".join(["hong", "@example.com"]))
+    b = logic.Detection("email", "".join(["hong@", "example.com"]))
+    assert a.value is b.value
+    assert not hasattr(a, "__dict__")
+
+
+def test_copy_equality_and_json():
+    d = logic.Detection("card", "4111", None, "valid")
+    c = d.copy()
+    c["status"] = "invalid (Luhn)"
+    assert d["status"] == "valid"
+    assert d == {"type": "card", "value": "4111", "span": None, "status": "valid"}
+    assert logic.Detection("card", "4111") == {"type": "card", "value": "4111", "span": None}
+    assert d != c
+    with pytest.raises(TypeError):
+        hash(d)
+    out = json.loads(json.dumps({"items": [d], "other": object()}, default=logic.detection_json_default))
+    assert out["items"] == [{"type": "card", "value": "4111", "span": None, "status": "valid"}]
+    assert isinstance(out["other"], str)
+
+
+def test_mixed_with_plain_dicts_in_sorting_and_filters():
+    items = [logic.Detection("PS", "김철수", (10, 13)), {"type": "PS", "value": "홍길동", "span": (0, 3)}]
+    items.sort(key=lambda it: (it.get("span") or (0, 0))[0])
+    assert [it["value"] for it in items] == ["홍길동", "김철수"]
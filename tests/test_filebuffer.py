@@ -0,0 +1,90 @@
+import base64
+import logging
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+PAYLOAD = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def spooled(monkeypatch):
+    monkeypatch.setattr(logic, "SPOOL_THRESHOLD", 16)
+    monkeypatch.setattr(logic, "_B64_CHUNK", 64)  # 여러 청크로 나눠 디코딩
+    buf = logic.FileBuffer.from_base64(base64.b64encode(PAYLOAD).decode())
+    yield buf
+    if buf.path:
+        buf.close()
+
+
+def test_small_upload_stays_in_memory():
+    b64 = base64.encodebytes(b"hello world").decode()  # 줄바꿈 포함
+    buf = logic.FileBuffer.from_base64(b64)
+    assert buf.path is None and buf.data == b"hello world"
+    assert bytes(buf[:5]) == b"hello"
+    buf.close()
+
+
+def test_large_upload_is_spooled_and_removed(spooled):
+    path = spooled.path
+    assert os.path.exists(path)
+    assert len(spooled) == len(PAYLOAD) and bytes(spooled.view) == PAYLOAD
+    spooled.close()
+    assert not os.path.exists(path)
+    with pytest.raises(ValueError):
+        spooled.view.tobytes()
+
+
+def test_readers_have_independent_positions(spooled):
+    a, b = spooled.open(), spooled.open()
+    assert a.read(3) == PAYLOAD[:3]
+    assert b.read(5) == PAYLOAD[:5]
+    a.seek(-2, os.SEEK_END)
+    assert a.read() == PAYLOAD[-2:]
+    out = bytearray(4)
+    assert b.readinto(out) == 4 and bytes(out) == PAYLOAD[5:9]
+
+
+def test_retain_defers_close(spooled):
+    path = spooled.path
+    spooled.retain()
+    spooled.close()
+    assert os.path.exists(path)
+    spooled.close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(not hasattr(sys, "getrefcount"), reason="참조 수 확인은 CPython 전용")
+def test_slices_are_not_retained(spooled):
+    for _ in range(1000):
+        bytes(spooled[:16])
+    part = spooled[16:32]
+    assert sys.getrefcount(part) == 2  # 지역 변수 + 인자 (버퍼가 따로 들고 있지 않음)
+    assert not hasattr(spooled, "_views")
+    mm = spooled._mmap
+    del part
+    spooled.close()
+    assert mm.closed
+
+
+def test_slice_released_with_context_manager(spooled):
+    mm = spooled._mmap
+    with spooled[:8] as head:
+        assert bytes(head) == PAYLOAD[:8]
+    spooled.close()
+    assert mm.closed
+
+
+def test_held_slice_keeps_mmap_open(spooled, caplog):
+    mm = spooled._mmap
+    held = spooled[:8]
+    with caplog.at_level(logging.WARNING):
+        spooled.close()
+    assert not mm.closed
+    assert "mmap" in caplog.text
+    held.release()
+    mm.close()
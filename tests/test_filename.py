@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(logic, "_filename_cache", type(logic._filename_cache)())
+
+
+def test_filename_masking():
+    masked, types = logic.mask_pii_in_filename("연락처_010-1234-5678.xlsx")
+    assert masked == "연락처_" + "*" * len("010-1234-5678") + ".xlsx"
+    assert types == "전화번호"
+    assert logic.mask_pii_in_filename("회의록.docx") == ("회의록.docx", None)
+
+
+def test_filename_analysis_is_cached_and_copied(monkeypatch):
+    calls = []
+    real = logic._analyze_filename
+    monkeypatch.setattr(logic, "_analyze_filename", lambda name: calls.append(name) or real(name))
+    first = logic.analyze_filename("hong@example.com_명단.txt")
+    first["items"][0]["value"] = "changed"
+    second = logic.analyze_filename("hong@example.com_명단.txt")
+    assert calls == ["hong@example.com_명단.txt"]
+    assert second["items"][0]["value"] == "hong@example.com"
+
+
+def test_filename_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(logic, "FILENAME_CACHE_SIZE", 2)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        logic.analyze_filename(name)
+    assert list(logic._filename_cache) == ["b.txt", "c.txt"]
+
+
+def test_filename_and_body_items_are_not_double_counted():
+    body = "담당 010-1234-5678, 대리 010-9876-5432 / 다시 010-1234-5678".encode("utf-8")
+    detected, masked, ok, _, _ = logic.handle_input_raw(body, "txt", "담당_010-1234-5678.txt")
+    assert ok
+    phones = sorted(d["value"] for d in detected if d["type"] == "phone")
+    assert phones == ["010-1234-5678", "010-9876-5432"]
+    # 파일명 쪽 항목(파일명 기준 위치)이 남음
+    first = next(d for d in detected if d["value"] == "010-1234-5678")
+    assert first["span"] == (3, 16)
+    assert masked.startswith("담당_*")
+    assert [d["value"] for d in detected if d["type"] == "position"] == ["대리"]
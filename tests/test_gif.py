@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+import Logic_Final as logic
+
+
+def _gif(colors):
+    """단색 프레임들로 이루어진 GIF bytes"""
+    frames = [Image.new("RGB", (64, 48), c) for c in colors]
+    out = io.BytesIO()
+    frames[0].save(out, format="GIF", save_all=True, append_images=frames[1:], duration=50, loop=0)
+    return out.getvalue()
+
+
+WHITE, BLACK, GRAY = (255, 255, 255), (0, 0, 0), (128, 128, 128)
+
+
+def test_only_scene_changes_are_kept():
+    keyframes, count = logic.extract_gif_keyframes(_gif([WHITE, (254, 254, 254), BLACK, (1, 1, 1), WHITE]))
+    assert count == 5
+    assert [im.getpixel((0, 0)) for im in keyframes] == [WHITE, BLACK, WHITE]
+    assert all(im.mode == "RGB" for im in keyframes)
+
+
+def test_keyframes_are_capped(monkeypatch):
+    monkeypatch.setattr(logic, "GIF_MAX_KEYFRAMES", 2)
+    keyframes, count = logic.extract_gif_keyframes(_gif([WHITE, BLACK, GRAY, WHITE]))
+    assert count == 4 and len(keyframes) == 2
+
+
+def test_threshold(monkeypatch):
+    data = _gif([WHITE, (240, 240, 240)])
+    assert len(logic.extract_gif_keyframes(data)[0]) == 2
+    monkeypatch.setattr(logic, "GIF_DIFF_THRESHOLD", 20.0)
+    assert len(logic.extract_gif_keyframes(data)[0]) == 1
+
+
+def test_single_frame_and_file_buffer():
+    buf = logic.FileBuffer(_gif([GRAY]))
+    keyframes, count = logic.extract_gif_keyframes(buf)
+    assert count == 1 and len(keyframes) == 1
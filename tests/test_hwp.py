@@ -0,0 +1,113 @@
+import io
+import zlib
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _record(tag_id: int, payload: bytes, level: int = 0) -> bytes:
+    if len(payload) < 0xFFF:
+        return (tag_id | (level << 10) | (len(payload) << 20)).to_bytes(4, "little") + payload
+    # 확장 크기: size 필드 0xFFF 뒤에 실제 크기 4바이트
+    return ((tag_id | (level << 10) | (0xFFF << 20)).to_bytes(4, "little")
+            + len(payload).to_bytes(4, "little") + payload)
+
+
+def _para(text: str) -> bytes:
+    return _record(logic.HWPTAG_PARA_TEXT, text.encode("utf-16-le"), level=1)
+
+
+def _deflate(data: bytes) -> bytes:
+    c = zlib.compressobj(wbits=-15)
+    return c.compress(data) + c.flush()
+
+
+class FakeOle:
+    def __init__(self, streams: dict):
+        self.streams = streams
+
+    def listdir(self):
+        return [name.split("/") for name in self.streams]
+
+    def exists(self, name):
+        return name in self.streams
+
+    def openstream(self, entry):
+        name = entry if isinstance(entry, str) else "/".join(entry)
+        return io.BytesIO(self.streams[name])
+
+
+def _header(flags: int) -> bytes:
+    return b"HWP Document File".ljust(36, b"\0") + flags.to_bytes(4, "little")
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_records_split_across_read_chunks(monkeypatch, compressed):
+    monkeypatch.setattr(logic, "_HWP_READ_CHUNK", 3)
+    big = b"x" * 5000
+    raw = _record(66, b"abc", level=2) + _record(logic.HWPTAG_PARA_TEXT, big) + _record(70, b"")
+    data = _deflate(raw) if compressed else raw
+    records = list(logic.iter_hwp_records(io.BytesIO(data), compressed))
+    assert records == [(66, 2, b"abc"), (logic.HWPTAG_PARA_TEXT, 0, big), (70, 0, b"")]
+
+
+def test_truncated_record_is_dropped():
+    raw = _record(66, b"abc") + _record(67, b"defgh")[:-2]
+    assert list(logic.iter_hwp_records(io.BytesIO(raw), False)) == [(66, 0, b"abc")]
+
+
+def test_para_text_strips_controls():
+    inline = (4).to_bytes(2, "little") + b"\0" * 14           # 인라인 컨트롤 = 8 글자
+    extended = (11).to_bytes(2, "little") + b"ABCDEFGHIJKLMN"  # 확장 컨트롤(표/그림) = 8 글자
+    payload = ("홍길동".encode("utf-16-le") + inline + "님".encode("utf-16-le") + extended
+               + (10).to_bytes(2, "little") + "010".encode("utf-16-le") + (13).to_bytes(2, "little"))
+    assert logic.decode_hwp_para_text(payload) == "홍길동님\n010\n"
+
+
+def test_para_text_tab_control():
+    tab = (9).to_bytes(2, "little") + b"\0" * 14
+    assert logic.decode_hwp_para_text("a".encode("utf-16-le") + tab + "b".encode("utf-16-le")) == "a\tb"
+
+
+def test_extract_hwp_text_orders_sections_numerically():
+    body = {
+        "FileHeader": _header(logic.HWP_FLAG_COMPRESSED),
+        "BodyText/Section10": _deflate(_para("셋째")),
+        "BodyText/Section2": _deflate(_para("둘째") + _record(70, b"\0\0")),
+        "BodyText/Section0": _deflate(_para("첫째")),
+    }
+    assert logic.extract_hwp_text(FakeOle(body)) == "첫째\n둘째\n셋째"
+
+
+def test_extract_hwp_text_rejects_password_and_skips_distributed():
+    with pytest.raises(ValueError):
+        logic.extract_hwp_text(FakeOle({"FileHeader": _header(logic.HWP_FLAG_PASSWORD)}))
+    assert logic.extract_hwp_text(FakeOle({"FileHeader": _header(logic.HWP_FLAG_DISTRIBUTED),
+                                           "BodyText/Section0": _para("숨김")})) == ""
+
+
+def test_hwp_signature_checked():
+    with pytest.raises(ValueError):
+        logic.hwp_file_flags(FakeOle({"FileHeader": b"not a hwp file".ljust(40, b"\0")}))
+
+
+def test_pictures_are_inflated_and_filtered():
+    ole = FakeOle({"FileHeader": _header(logic.HWP_FLAG_COMPRESSED),
+                   "BinData/BIN0001.png": _deflate(b"png-bytes"),
+                   "BinData/BIN0002.ole": _deflate(b"embedded")})
+    assert list(logic.iter_hwp_pictures(ole)) == [("BinData/BIN0001.png", b"png-bytes")]
+
+
+def test_ocr_skipped_without_pictures(monkeypatch):
+    calls = []
+    monkeypatch.setattr(logic, "reader", object())
+    monkeypatch.setattr(logic, "run_ocr_on_images", lambda images: calls.append(images) or ["텍스트"])
+    no_pictures = FakeOle({"FileHeader": _header(0), "BodyText/Section0": _para("본문")})
+    assert logic.run_ocr_on_hwp_images(no_pictures) == ""
+    assert calls == []
+
+    with_picture = FakeOle({"FileHeader": _header(0), "BinData/BIN0001.jpg": b"jpg"})
+    assert logic.run_ocr_on_hwp_images(with_picture) == "텍스트"
+    assert calls == [[b"jpg"]]
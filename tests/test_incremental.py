@@ -0,0 +1,109 @@
+import re
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _key(items):
+    return sorted((it["type"], it["value"], it.get("span") or (-1, -1)) for it in items)
+
+
+def _regex_scan(text):
+    return logic.detect_by_regex(text)
+
+
+# 문맥과 무관한 정규식 탐지기: 창 검사 결과가 전체 검사와 정확히 같아야 함
+_LOCAL_RE = re.compile(r"(?<!\d)(?:\d{4}[\s\-]?){3}\d{4}(?!\d)"
+                       r"|[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+                       r"|(?<!\d)010-\d{4}-\d{4}(?!\d)")
+
+
+def _local_scan(text):
+    return [logic.Detection("pii", m.group(), m.span()) for m in _LOCAL_RE.finditer(text)]
+
+
+FILLER = "회의록 정리 중입니다. " * 40
+CARD = "4111 1111 1111 1111"
+TYPED = CARD + " 로 결제했어요. 다른 카드 " + CARD.replace(" ", "-") + " 메일 hong.gildong@example.com 끝"
+
+
+@pytest.mark.parametrize("margin", [2, 4, 20, 200])
+def test_typing_one_char_at_a_time_matches_full_scan(margin):
+    scanner = logic.IncrementalTextScanner(_local_scan, margin=margin)
+    text = FILLER + "연락처 010-1234-5678 카드 "
+    scanner.scan("tab", text)
+    for ch in TYPED:
+        text += ch
+        assert _key(scanner.scan("tab", text)) == _key(_local_scan(text)), repr(text[-40:])
+
+
+def test_typing_card_number_with_regex_detector():
+    scanner = logic.IncrementalTextScanner(_regex_scan)
+    text = FILLER * 3 + "연락처 010-1234-5678 카드 "
+    scanner.scan("tab", text)
+    for ch in CARD + " 로 결제했어요":
+        text += ch
+        assert _key(scanner.scan("tab", text)) == _key(_regex_scan(text)), repr(text[-40:])
+    assert [it["value"] for it in scanner.scan("tab", text) if it["type"] == "card"] == [CARD]
+
+
+@pytest.mark.parametrize("margin", [4, 20])
+def test_editing_inside_and_around_a_match(margin):
+    scanner = logic.IncrementalTextScanner(_local_scan, margin=margin)
+    text = FILLER + "카드 " + CARD + " 와 전화 010-1234-5678 " + FILLER
+    scanner.scan("tab", text)
+    card_at = text.index(CARD)
+    edits = [
+        (card_at + 6, card_at + 7, "2"),        # 카드 번호 중간 숫자 변경 (Luhn 실패)
+        (card_at + 6, card_at + 7, "1"),        # 되돌림
+        (card_at + 4, card_at + 5, ""),         # 구분자 삭제
+        (card_at + 4, card_at + 4, " "),        # 다시 삽입
+        (card_at - 3, card_at - 3, "신용"),      # 바로 앞에 글자 삽입
+        (len(FILLER), len(FILLER), "x" * 50),  # 멀리 앞쪽 삽입 (뒤 결과 오프셋 이동)
+    ]
+    for start, end, repl in edits:
+        text = text[:start] + repl + text[end:]
+        assert _key(scanner.scan("tab", text)) == _key(_local_scan(text))
+
+
+def test_results_are_unique_after_merge():
+    scanner = logic.IncrementalTextScanner(_local_scan, margin=4)
+    text = FILLER + "010-1234-5678"
+    scanner.scan("tab", text)
+    text = text + " 010-1234-5678"
+    items = scanner.scan("tab", text)
+    keys = [(it["type"], it["value"], it.get("span")) for it in items]
+    assert len(keys) == len(set(keys))
+    assert _key(items) == _key(_local_scan(text))
+
+
+def test_sessions_expire_and_are_bounded():
+    calls = []
+
+    def scan(text):
+        calls.append(len(text))
+        return []
+
+    scanner = logic.IncrementalTextScanner(scan, margin=4, ttl=3600, max_sessions=2)
+    for key in ("a", "b", "c"):
+        scanner.scan(key, FILLER)
+    assert list(scanner._sessions) == ["b", "c"]
+    # 세션이 없으면 전체 검사, 있으면 바뀐 창만 검사
+    scanner.scan("a", FILLER + "x")
+    scanner.scan("a", FILLER + "xy")
+    assert calls[-2] == len(FILLER) + 1
+    assert calls[-1] < 20
+
+
+def test_spanless_items_kept_while_value_present():
+    def scan(text):
+        digits = re.sub(r"\D", "", text)
+        return [logic.Detection("card", "4111111111111111", None)] if "4111111111111111" in digits else []
+
+    scanner = logic.IncrementalTextScanner(scan, margin=4)
+    text = FILLER + "4111-1111-1111-1111"
+    assert len(scanner.scan("tab", text)) == 1
+    assert len(scanner.scan("tab", text + " 끝")) == 1
+    assert scanner.scan("tab", text.replace("4111-1111", "4111-0000") + " 끝") == []
@@ -0,0 +1,114 @@
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+if sys.platform == "win32":
+    pytest.skip("Unix 소켓 테스트", allow_module_level=True)
+
+import InferenceDaemon_Final as daemon
+from Batching_Final import BatchWorker
+
+
+def test_default_address_is_per_user(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    address = daemon.default_address()
+    assert address == str(tmp_path / "shadowai" / "pii_inference.sock")
+    assert os.stat(tmp_path / "shadowai").st_mode & 0o077 == 0
+
+
+def test_default_address_falls_back_to_state_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    assert daemon.default_address() == str(tmp_path / "shadowai" / "pii_inference.sock")
+
+
+def _bound_socket(path):
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.bind(str(path))
+    return s
+
+
+def test_stale_socket_removed(tmp_path):
+    path = tmp_path / "d.sock"
+    _bound_socket(path).close()  # 소켓 파일만 남음
+    daemon._remove_stale_socket(str(path))
+    assert not path.exists()
+    daemon._remove_stale_socket(str(path))  # 없으면 아무것도 안 함
+
+
+def test_live_socket_kept(tmp_path):
+    path = tmp_path / "d.sock"
+    s = _bound_socket(path)
+    s.listen(1)
+    try:
+        with pytest.raises(ValueError):
+            daemon._remove_stale_socket(str(path))
+        assert path.exists()
+    finally:
+        s.close()
+
+
+def test_regular_file_kept(tmp_path):
+    path = tmp_path / "d.sock"
+    path.write_text("x")
+    with pytest.raises(ValueError):
+        daemon._remove_stale_socket(str(path))
+    assert path.exists()
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid") or os.getuid() != 0, reason="다른 사용자 소유 파일을 만들려면 root 필요")
+def test_foreign_socket_kept(tmp_path):
+    path = tmp_path / "d.sock"
+    _bound_socket(path).close()
+    os.lchown(path, 12345, 12345)
+    with pytest.raises(ValueError):
+        daemon._remove_stale_socket(str(path))
+    assert path.exists()
+
+
+def test_round_trip_through_daemon(monkeypatch, tmp_path):
+    monkeypatch.setenv("PII_INFERENCE_AUTHKEY", "test-key-0123456789")
+    address = str(tmp_path / "d.sock")
+    _bound_socket(address).close()  # 이전 데몬이 남긴 소켓
+    ner = BatchWorker(lambda texts: [[{"word": t.upper()}] for t in texts], name="ner-test")
+    server = daemon.InferenceDaemon(address, {"ner": ner})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = daemon.InferenceClient(address, connect_timeout=5)
+    assert client.capabilities == {"ner": True}
+    assert os.stat(address).st_mode & 0o777 == 0o600
+    remote = client.ner_pipeline()
+    assert remote("ab") == [{"word": "AB"}]
+    assert remote.many(["x", "y"]) == [[{"word": "X"}], [{"word": "Y"}]]
+    assert client.ocr_reader() is None
+    with pytest.raises(RuntimeError):
+        client.call("ocr", [], {})
+
+
+def test_ocr_batch_groups_by_shape_and_options():
+    calls = []
+
+    class Reader:
+        def readtext(self, image, **kw):
+            calls.append(("single", image, kw))
+            return f"r{image}"
+
+        def readtext_batched(self, images, **kw):
+            calls.append(("batched", list(images), kw))
+            return [f"b{i}" for i in images]
+
+    class Img:
+        def __init__(self, n, shape):
+            self.n, self.shape = n, shape
+
+        def __repr__(self):
+            return str(self.n)
+
+    a, b, c = Img(1, (2, 2, 3)), Img(2, (2, 2, 3)), Img(3, (4, 4, 3))
+    run = daemon._ocr_batch(Reader())
+    out = run([([a], {"batch_size": 8}), ([b], {"batch_size": 8}), ([c], {"batch_size": 8})])
+    assert out == [["b1"], ["b2"], ["r3"]]
+    assert [k for k, _, _ in calls] == ["batched", "single"]
@@ -0,0 +1,96 @@
+import io
+import struct
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+class FakeOle:
+    def __init__(self, streams: dict):
+        self.streams = streams
+
+    def exists(self, name):
+        return name in self.streams
+
+    def openstream(self, name):
+        return io.BytesIO(self.streams[name])
+
+
+# ==========================
+# DOC 조각 테이블
+# ==========================
+
+def _doc(pieces, flags=logic._DOC_FLAG_WHICH_TABLE, prc=True):
+    """pieces: (텍스트, 압축 여부) 목록 → WordDocument / 표 스트림"""
+    word = bytearray(0x400)
+    struct.pack_into("<H", word, logic._DOC_FIB_FLAGS, flags)
+    cps, pcds = [0], []
+    for text, compressed in pieces:
+        fc = len(word)
+        if compressed:
+            word += text.encode("cp1252")
+            pcds.append(struct.pack("<HIH", 0, (fc * 2) | 0x40000000, 0))
+        else:
+            word += text.encode("utf-16-le")
+            pcds.append(struct.pack("<HIH", 0, fc, 0))
+        cps.append(cps[-1] + len(text))
+    plc = b"".join(struct.pack("<I", cp) for cp in cps) + b"".join(pcds)
+    clx = (b"\x01\x02\x00ab" if prc else b"") + b"\x02" + struct.pack("<I", len(plc)) + plc
+    table = b"\0" * 16 + clx
+    struct.pack_into("<II", word, logic._DOC_FIB_FCCLX, 16, len(clx))
+    table_name = "1Table" if flags & logic._DOC_FLAG_WHICH_TABLE else "0Table"
+    return FakeOle({"WordDocument": bytes(word), table_name: table})
+
+
+def test_doc_pieces_in_order_with_both_encodings():
+    ole = _doc([("Name: \x13 HYPERLINK x \x14link\x15\r", True), ("홍길동\x07010-1234-5678\x07", False)])
+    assert logic.extract_doc_text(ole) == "Name: link\n홍길동\t010-1234-5678\t"
+
+
+def test_doc_table_stream_choice_and_no_prc():
+    ole = _doc([("abc", True)], flags=0, prc=False)
+    assert logic.extract_doc_text(ole) == "abc"
+
+
+def test_doc_encrypted_and_missing_piece_table():
+    with pytest.raises(ValueError):
+        logic.extract_doc_text(_doc([("x", True)], flags=logic._DOC_FLAG_ENCRYPTED | logic._DOC_FLAG_WHICH_TABLE))
+    ole = _doc([("x", True)])
+    ole.streams["1Table"] = b"\0" * 16 + b"\x05\x00"
+    with pytest.raises(ValueError):
+        logic.extract_doc_text(ole)
+
+
+# ==========================
+# PPT 레코드
+# ==========================
+
+def _rec(rec_type, body=b"", container=False, instance=0):
+    ver_inst = (instance << 4) | (0x0F if container else 0)
+    return struct.pack("<HHI", ver_inst, rec_type, len(body)) + body
+
+
+def test_ppt_text_atoms_skip_master():
+    master = _rec(logic._PPT_MAIN_MASTER, _rec(logic._PPT_TEXT_BYTES_ATOM, b"master title"), container=True)
+    slide = _rec(0x03EE, _rec(logic._PPT_TEXT_CHARS_ATOM, "안녕\r하세요".encode("utf-16-le"))
+                 + _rec(logic._PPT_TEXT_BYTES_ATOM, b"hong@example.com") + _rec(0x0FA1, b"\0" * 6), container=True)
+    doc = _rec(0x03E8, master + slide, container=True)
+    text = logic.extract_ppt_text(FakeOle({"PowerPoint Document": doc}))
+    assert text == "안녕\n하세요\nhong@example.com"
+
+
+def test_ppt_records_stop_at_truncated_header():
+    data = _rec(0x0FA8, b"ab") + b"\x00\x00\xa8"
+    assert [r[1] for r in logic._iter_ppt_records(data)] == [0x0FA8]
+
+
+def test_ppt_pictures():
+    png = b"\x89PNG\r\n\x1a\n" + b"p" * 10
+    jpg = b"\xff\xd8\xff\xe0" + b"j" * 10
+    data = (_rec(0xF01E, b"\0" * 17 + png) + _rec(0xF01D, b"\0" * 33 + jpg)
+            + _rec(0xF01F, b"\0" * 17 + b"BM...") + _rec(0x1234, png))
+    pictures = list(logic.iter_ppt_pictures(FakeOle({"Pictures": data})))
+    assert pictures == [("Pictures/blip1", png), ("Pictures/blip2", jpg)]
+    assert list(logic.iter_ppt_pictures(FakeOle({}))) == []
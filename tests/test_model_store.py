@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+import ModelStore_Final as store_mod
+
+
+def _make_store(root, version="2026.10", current=True):
+    base = root / version
+    (base / "ner").mkdir(parents=True)
+    (base / "mtcnn").mkdir()
+    (base / "ner" / "model.safetensors").write_bytes(b"w" * 100)
+    (base / "mtcnn" / "weights.npy").write_bytes(b"m" * 10)
+    manifest = {
+        "version": version,
+        "components": {"ner": {"path": "ner"}, "mtcnn": {"path": "mtcnn", "weights": "mtcnn/weights.npy"}},
+        "files": store_mod._file_sizes(str(base)),
+    }
+    (base / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    if current:
+        (root / "CURRENT").write_text(version + "\n", encoding="utf-8")
+    return base
+
+
+def test_no_store_means_none(tmp_path):
+    assert store_mod.ModelStore.open(str(tmp_path), "") is None
+
+
+def test_open_current_version(tmp_path):
+    base = _make_store(tmp_path)
+    store = store_mod.ModelStore.open(str(tmp_path), "")
+    assert store.version == "2026.10"
+    assert store.manifest["files"] == {"ner/model.safetensors": 100, "mtcnn/weights.npy": 10}
+    assert store.path("ner") == os.path.join(str(base), "ner")
+    assert store.path("easyocr") is None
+    assert store.mtcnn_weights() == os.path.join(str(base), "mtcnn/weights.npy")
+
+
+def test_explicit_version_overrides_current(tmp_path):
+    _make_store(tmp_path, "old")
+    _make_store(tmp_path, "new", current=False)
+    assert store_mod.ModelStore.open(str(tmp_path), "new").version == "new"
+    with pytest.raises(ValueError):
+        store_mod.ModelStore.open(str(tmp_path), "missing")
+
+
+def test_verify_detects_missing_and_changed_files(tmp_path):
+    base = _make_store(tmp_path)
+    (base / "ner" / "model.safetensors").write_bytes(b"w" * 99)
+    with pytest.raises(ValueError, match="크기"):
+        store_mod.ModelStore.open(str(tmp_path), "")
+    os.remove(base / "ner" / "model.safetensors")
+    with pytest.raises(ValueError, match="누락"):
+        store_mod.ModelStore.open(str(tmp_path), "")
+
+
+def test_enable_offline(monkeypatch):
+    for name in ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE", "HF_HUB_DISABLE_TELEMETRY"):
+        monkeypatch.delenv(name, raising=False)
+    store_mod.enable_offline()
+    assert os.environ["HF_HUB_OFFLINE"] == os.environ["TRANSFORMERS_OFFLINE"] == "1"
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Unix 경로")
+def test_user_state_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    path = store_mod.user_state_dir()
+    assert path == str(tmp_path / "shadowai")
+    assert os.stat(path).st_mode & 0o077 == 0
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+import Logic_Final as logic
+from Batching_Final import BatchWorker
+
+
+class FakeReader:
+    """호출 기록을 남기고, 동시에 두 스레드가 들어오면 실패하는 reader"""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self._inside = threading.Lock()
+
+    def _enter(self, kind, images, batch_size):
+        assert self._inside.acquire(blocking=False), "reader 가 동시에 호출됨"
+        try:
+            self.calls.append((kind, [img.shape for img in images], batch_size))
+            time.sleep(self.delay)
+            return [[(None, f"{img.shape[0]}x{img.shape[1]}", 0.9)] for img in images]
+        finally:
+            self._inside.release()
+
+    def readtext(self, image, batch_size, workers):
+        return self._enter("single", [image], batch_size)[0]
+
+    def readtext_batched(self, images, batch_size, workers):
+        return self._enter("batched", images, batch_size)
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    fake = FakeReader()
+    monkeypatch.setattr(logic, "reader", fake)
+    monkeypatch.setattr(logic, "Image", object())
+    monkeypatch.setattr(logic, "OCR_BATCH_SIZE", 8)
+    monkeypatch.setattr(logic, "ocr_batcher", BatchWorker(logic._run_ocr_batch, max_batch=8, name="ocr-test"))
+    return fake
+
+
+def _img(h, w):
+    return np.zeros((h, w, 3), dtype=np.uint8)
+
+
+def test_letterbox_uses_shared_canvases(monkeypatch):
+    monkeypatch.setattr(logic, "OCR_CANVAS_SIZES", [320, 640, 1280])
+    assert logic._letterbox(_img(300, 500)).shape == (320, 640, 3)
+    assert logic._letterbox(_img(317, 601)).shape == (320, 640, 3)
+    assert logic._letterbox(_img(640, 320)).shape == (640, 320, 3)
+    # 가장 큰 캔버스를 넘는 변은 256px 단위로
+    assert logic._letterbox(_img(1300, 100)).shape == (1536, 320, 3)
+
+
+def test_letterbox_keeps_pixels_and_pads_white():
+    arr = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+    out = logic._letterbox(arr)
+    assert np.array_equal(out[:2, :3], arr)
+    assert out[2:].min() == 255 and out[:, 3:].min() == 255
+
+
+def test_mixed_sizes_batch_together_in_input_order(fake_ocr):
+    images = [_img(300, 500), _img(20, 20), _img(310, 490), _img(280, 620)]
+    texts = logic.run_ocr_on_images(images)
+    assert texts == ["320x640", "320x320", "320x640", "320x640"]
+    assert sorted(fake_ocr.calls) == [("batched", [(320, 640, 3)] * 3, 8), ("single", [(320, 320, 3)], 8)]
+
+
+def test_failed_group_leaves_empty_text(fake_ocr, monkeypatch):
+    def broken(images, batch_size, workers):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(fake_ocr, "readtext_batched", broken)
+    assert logic.run_ocr_on_images([_img(300, 500), _img(300, 500), _img(20, 20)]) == ["", "", "320x320"]
+
+
+def test_concurrent_scans_share_one_reader_thread(fake_ocr):
+    fake_ocr.delay = 0.01
+    results = {}
+
+    def scan(i):
+        results[i] = logic.run_ocr_on_images([_img(300, 500), _img(100, 100)])
+
+    threads = [threading.Thread(target=scan, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(r == ["320x640", "320x320"] for r in results.values())
+    # 같은 캔버스 이미지가 문서 사이에서 합쳐져 호출 수가 문서 수 × 캔버스 수보다 적음
+    assert sum(len(shapes) for _, shapes, _ in fake_ocr.calls) == 12
+    assert len(fake_ocr.calls) < 12
+
+
+def test_budget_limits_images(fake_ocr):
+    budget = logic.ScanBudget(seconds=0, pages=0, images=1, ocr_chars=0, stage_seconds={})
+    token = logic._current_budget.set(budget)
+    try:
+        texts = logic.run_ocr_on_images([_img(300, 500), _img(300, 500)])
+    finally:
+        logic._current_budget.reset(token)
+    assert texts == ["320x640", ""]
+    assert budget.truncated == {"ocr": "images"}
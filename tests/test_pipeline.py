@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _const(label):
+    return lambda text: [logic.Detection(label, text[:2], (0, 2))]
+
+
+def test_default_registration_order():
+    assert logic.detection_pipeline.names == ["regex", "address", "ner", "quasi"]
+    assert logic.detection_pipeline.dedupes("regex") and not logic.detection_pipeline.dedupes("quasi")
+
+
+def test_results_follow_registration_order():
+    p = logic.DetectionPipeline()
+    p.register("a", _const("A"), heavy=True)
+    p.register("b", _const("B"))
+    p.register("c", _const("C"), dedupe=False)
+    assert [d["type"] for d in p.run("hello")] == ["A", "B", "C"]
+    assert list(p.run_each("hello", skip=("b",))) == ["a", "c"]
+    assert p.run_each("  \n") == {"a": [], "b": [], "c": []}
+
+
+def test_reregister_and_unregister():
+    p = logic.DetectionPipeline()
+    p.register("a", _const("A"))
+    p.register("b", _const("B"))
+    p.register("a", _const("A2"), dedupe=False)  # 다시 등록하면 교체되고 맨 뒤로
+    assert p.names == ["b", "a"] and not p.dedupes("a")
+    assert [d["type"] for d in p.run("xy")] == ["B", "A2"]
+    p.unregister("b")
+    assert p.names == ["a"]
+
+
+def test_heavy_detector_overlaps_light_ones():
+    light_done = threading.Event()
+
+    def heavy(text):
+        # 가벼운 탐지기가 같은 스레드에서 먼저 끝나야 통과 (순차 실행이면 시간 초과)
+        assert light_done.wait(5)
+        return [logic.Detection("H", text, None)]
+
+    def light(text):
+        light_done.set()
+        return []
+
+    p = logic.DetectionPipeline()
+    p.register("heavy", heavy, heavy=True)
+    p.register("light", light)
+    assert p.run_each("x") == {"heavy": [{"type": "H", "value": "x", "span": None}], "light": []}
+
+
+def test_errors_propagate():
+    p = logic.DetectionPipeline()
+    p.register("bad", lambda text: 1 / 0, heavy=True)
+    with pytest.raises(ZeroDivisionError):
+        p.run("x")
+
+
+def test_stats():
+    p = logic.DetectionPipeline()
+    p.register("a", _const("A"))
+    p.register("none", lambda text: [])
+    p.run("one")
+    p.run("two")
+    p.run(" ")
+    stats = p.stats()
+    assert stats["a"]["calls"] == 2 and stats["a"]["items"] == 2
+    assert stats["none"] == {"calls": 2, "seconds": stats["none"]["seconds"], "items": 0}
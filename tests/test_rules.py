@@ -0,0 +1,110 @@
+import json
+import os
+import re
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _rule(name="code", pattern=r"\d{4}-\d{4}", **checks):
+    return {"name": name, "pattern": pattern, "checks": checks}
+
+
+def _accept(rule, text):
+    return [m.group() for m in rule.pattern.finditer(text) if rule.accept(text, m)]
+
+
+def test_shipped_rules_compile():
+    rule_set = logic.RuleSet.load(logic.RULES_FILE)
+    names = [r.name for r in rule_set.rules]
+    assert names[0] == "phone" and len(names) == len(set(names))
+    assert all(r.pattern is not None or r.normalized is not None for r in rule_set.rules)
+
+
+def test_digit_and_prefix_checks():
+    rule = logic.DetectionRule(_rule(pattern=r"[\d-]+", digits=[8, 9], prefixes=["12", "99"]))
+    assert _accept(rule, "1234-5678 9999-99999 1234-56 5555-5555") == ["1234-5678", "9999-99999"]
+
+
+def test_context_and_adjacent_alpha_checks():
+    rule = logic.DetectionRule(_rule(reject_context={"pattern": "20\\d{2}년", "window": 6},
+                                     reject_adjacent_alpha=True))
+    assert _accept(rule, "번호 1111-2222") == ["1111-2222"]
+    assert _accept(rule, "2024년 1111-2222") == []
+    assert _accept(rule, "2024년 쯤 1111-2222") == ["1111-2222"]  # 창 밖
+    assert _accept(rule, "A1111-2222") == []
+
+
+def test_sequential_and_keyword_checks():
+    rule = logic.DetectionRule(_rule(reject_sequential_digits=True,
+                                     require_keywords={"words": ["계좌"], "window": 5},
+                                     reject_keywords={"words": ["TEST"], "window": 5}))
+    assert _accept(rule, "계좌 2345-6789") == []          # 연속 숫자
+    assert _accept(rule, "계좌 1111-2222") == ["1111-2222"]
+    assert _accept(rule, "메모 1111-2222") == []          # 키워드 없음
+    assert _accept(rule, "계좌 1111-2222 test") == []     # 제외 키워드 (대소문자 무시)
+
+
+def test_normalized_checks():
+    rule = logic.DetectionRule({"name": "x", "normalized_pattern": r"\d+",
+                                "normalized_checks": {"prefixes": ["010"], "reject_value": "^0000"}})
+    assert rule.pattern is None
+    assert rule.accept_normalized("0101234") and not rule.accept_normalized("0201234")
+    assert rule.reject_value.search("0000-1")
+
+
+def test_empty_rule_set_is_rejected():
+    with pytest.raises(ValueError):
+        logic.RuleSet({"version": 1, "rules": []})
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+
+    def write(rules, version):
+        path.write_text(json.dumps({"version": version, "rules": rules}), encoding="utf-8")
+        mtime = os.path.getmtime(path) + version  # 같은 초 안의 저장도 바뀐 파일로 보이게
+        os.utime(path, (mtime, mtime))
+
+    write([_rule()], 1)
+    monkeypatch.setattr(logic, "RULES_FILE", str(path))
+    monkeypatch.setattr(logic, "_rule_set", logic.RuleSet.load(str(path)))
+    return write
+
+
+def test_reload_swaps_rules(rules_file):
+    assert [d["value"] for d in logic.detect_by_regex("코드 1234-5678")] == ["1234-5678"]
+    rules_file([_rule(name="word", pattern=r"비밀\w+")], 2)
+    rule_set = logic.reload_rules()
+    assert rule_set.version == 2 and logic.get_rule_set() is rule_set
+    assert [(d["type"], d["value"]) for d in logic.detect_by_regex("코드 1234-5678 비밀번호")] == [("word", "비밀번호")]
+
+
+def test_bad_file_keeps_previous_rules(rules_file, caplog):
+    before = logic._rule_set
+    for bad in ([{"name": "broken", "pattern": "("}], []):
+        rules_file(bad, 3)
+        assert logic.reload_rules() is before
+    assert "리로드 실패" in caplog.text
+
+
+def test_reload_checked_at_interval(rules_file, monkeypatch):
+    monkeypatch.setattr(logic, "RULES_CHECK_INTERVAL", 3600)
+    monkeypatch.setattr(logic, "_rule_check_at", logic.time.monotonic())
+    before = logic._rule_set
+    rules_file([_rule(name="other")], 4)
+    assert logic.get_rule_set() is before  # 점검 주기 전에는 파일을 보지 않음
+    monkeypatch.setattr(logic, "RULES_CHECK_INTERVAL", 0)
+    assert logic.get_rule_set().rules[0].name == "other"
+
+
+def test_rule_stats(rules_file):
+    logic.detect_by_regex("1234-5678 1234-5678 9999-0000")
+    stats = logic.rule_stats()
+    assert stats["version"] == 1
+    assert stats["rules"]["code"]["candidates"] == 3
+    assert stats["rules"]["code"]["hits"] == 2  # 같은 값은 한 번만
+    assert re.fullmatch(r"[\d.]+(e-\d+)?", str(stats["rules"]["code"]["seconds"]))
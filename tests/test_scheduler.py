@@ -0,0 +1,87 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+@pytest.fixture
+def sched():
+    s = logic.CpuScheduler(1)
+    yield s
+    s.resize(1)
+
+
+def _block(sched):
+    """워커 하나를 막아 두고 풀어 줄 이벤트를 돌려줌"""
+    started, gate = threading.Event(), threading.Event()
+    sched.submit(lambda: (started.set(), gate.wait(5)))
+    assert started.wait(5)
+    return gate
+
+
+def test_interactive_runs_before_queued_bulk(sched):
+    gate = _block(sched)
+    order = []
+    futures = [sched.submit(order.append, f"bulk{i}", priority=logic.PRIORITY_BULK) for i in range(3)]
+    futures.append(sched.submit(order.append, "chat", priority=logic.PRIORITY_INTERACTIVE))
+    gate.set()
+    for f in futures:
+        f.result(5)
+    assert order == ["chat", "bulk0", "bulk1", "bulk2"]
+
+
+def test_subtasks_inherit_priority(sched):
+    def parent():
+        child = sched.submit(lambda: logic._sched_local.priority)
+        return sched.result(child)
+
+    assert sched.result(sched.submit(parent, priority=logic.PRIORITY_INTERACTIVE)) == logic.PRIORITY_INTERACTIVE
+    assert sched.result(sched.submit(parent)) == logic.PRIORITY_BULK
+
+
+def test_nested_waits_do_not_deadlock_single_worker(sched):
+    # 워커가 하나뿐이어도 기다리는 쪽이 아직 시작 안 된 하위 작업을 직접 실행
+    def parent(n):
+        return sum(sched.map(lambda x: x * x, range(n)))
+
+    assert sched.submit(parent, 5).result(5) == 30
+    assert sched.map(parent, [2, 3]) == [1, 5]
+
+
+def test_context_and_errors_propagate(sched):
+    var = contextvars.ContextVar("v", default="unset")
+    var.set("caller")
+    assert sched.result(sched.submit(var.get)) == "caller"
+    with pytest.raises(ZeroDivisionError):
+        sched.result(sched.submit(lambda: 1 / 0))
+
+
+def test_cancelled_task_is_skipped(sched):
+    gate = _block(sched)
+    ran = []
+    future = sched.submit(ran.append, 1)
+    assert future.cancel()
+    gate.set()
+    sched.submit(lambda: None).result(5)
+    assert ran == []
+
+
+def test_resize(sched):
+    sched.resize(3)
+    assert sched.workers == 3 and sched._alive == 3
+    gates = []
+    barrier = threading.Barrier(3, timeout=5)
+    for _ in range(3):
+        gates.append(sched.submit(barrier.wait))  # 세 워커가 동시에 돌아야 통과
+    for f in gates:
+        f.result(5)
+    sched.resize(1)
+    deadline = time.monotonic() + 5
+    while sched._alive > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sched._alive == 1
+    assert sched.submit(lambda: "ok").result(5) == "ok"
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+class Gate:
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, value):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if value == "boom":
+            raise RuntimeError("boom")
+        return value.upper()
+
+
+class Resource:
+    def __init__(self):
+        self.refs = 1
+        self.events = []
+
+    def retain(self):
+        self.refs += 1
+        self.events.append("retain")
+        return self
+
+    def close(self):
+        self.refs -= 1
+        self.events.append("close")
+
+
+def test_identical_inflight_requests_share_one_run():
+    sf, fn = logic.SingleFlight(), Gate()
+    a = sf.submit("k", fn, "x")
+    assert fn.started.wait(5)
+    b = sf.submit("k", fn, "x")
+    other = sf.submit("k2", fn, "y")
+    fn.release.set()
+    assert (a.result(5), b.result(5), other.result(5)) == ("X", "X", "Y")
+    assert fn.calls == 2 and sf.coalesced == 1
+    # 끝난 결과는 보관하지 않음
+    assert sf._inflight == {}
+    assert sf.do("k", fn, "x") == "X" and fn.calls == 3
+
+
+def test_cancelling_one_waiter_keeps_the_shared_run():
+    sf, fn = logic.SingleFlight(), Gate()
+    a = sf.submit("k", fn, "x")
+    assert fn.started.wait(5)
+    b = sf.submit("k", fn, "x")
+    assert a.cancel()
+    fn.release.set()
+    assert b.result(5) == "X"
+    assert a.cancelled()
+
+
+def test_errors_reach_every_waiter():
+    sf, fn = logic.SingleFlight(), Gate()
+    a = sf.submit("k", fn, "boom")
+    assert fn.started.wait(5)
+    b = sf.submit("k", fn, "boom")
+    fn.release.set()
+    for f in (a, b):
+        with pytest.raises(RuntimeError):
+            f.result(5)
+
+
+def test_owned_resources_live_until_the_shared_run_ends():
+    sf, fn = logic.SingleFlight(), Gate()
+    res, dup = Resource(), Resource()
+    a = sf.submit("k", fn, "x", owns=(res,))
+    assert fn.started.wait(5)
+    b = sf.submit("k", fn, "x", owns=(dup,))  # 합류한 요청의 자원은 잡지 않음
+    res.close()  # 첫 호출자가 먼저 끊겨도 작업 중에는 살아 있음
+    assert res.refs == 1
+    fn.release.set()
+    assert a.result(5) == b.result(5) == "X"
+    assert res.refs == 0 and res.events == ["retain", "close", "close"]
+    assert dup.events == []
+
+
+def test_content_key():
+    data = "홍길동 010-1234-5678".encode("utf-8")
+    key = logic.content_key(data, "file", "txt")
+    assert key == logic.content_key(logic.FileBuffer(data), "file", "txt")
+    assert key != logic.content_key(data, "file", "hwp")
+    assert logic.content_key("홍길동", "text") == logic.content_key("홍길동".encode("utf-8"), "text")
+    # 부가 정보 경계가 섞이지 않음
+    assert logic.content_key(b"", "ab", "c") != logic.content_key(b"", "a", "bc")
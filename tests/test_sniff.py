@@ -0,0 +1,90 @@
+import io
+import types
+import zipfile
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _zip(**parts):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as z:
+        for name, data in parts.items():
+            z.writestr(name.replace("__", "/"), data)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("data, expected", [
+    (b"%PDF-1.7\n...", "pdf"),
+    (b"\r\n%PDF-1.4", "pdf"),  # 앞에 쓰레기 바이트가 있어도 1KB 안이면 PDF
+    (b"\x89PNG\r\n\x1a\n....", "png"),
+    (b"\xff\xd8\xff\xe0....", "jpg"),
+    (b"GIF89a....", "gif"),
+    (b"II*\x00....", "tiff"),
+    (b"BM....", "bmp"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "webp"),
+    (b"just text", None),
+])
+def test_signatures(data, expected):
+    assert logic.sniff_format(data) == expected
+
+
+@pytest.mark.parametrize("parts, expected", [
+    ({"mimetype": "application/hwp+zip", "Contents__section0.xml": "<a/>"}, "hwpx"),
+    ({"Contents__section0.xml": "<a/>"}, "hwpx"),
+    ({"word__document.xml": "<a/>"}, "docx"),
+    ({"ppt__presentation.xml": "<a/>"}, "pptx"),
+    ({"xl__workbook.xml": "<a/>"}, "xlsx"),
+    ({"other.txt": "x"}, None),
+])
+def test_zip_containers(parts, expected):
+    assert logic.sniff_format(_zip(**parts)) == expected
+
+
+def test_broken_zip_is_not_fatal():
+    assert logic.sniff_format(b"PK\x03\x04" + b"\0" * 40) is None
+
+
+class FakeOle:
+    def __init__(self, streams):
+        self.streams = streams
+        self.closed = False
+
+    def exists(self, name):
+        return name in self.streams
+
+    def openstream(self, name):
+        return io.BytesIO(self.streams[name])
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("streams, expected", [
+    ({"FileHeader": b"HWP Document File\0\0"}, "hwp"),
+    ({"WordDocument": b""}, "doc"),
+    ({"PowerPoint Document": b""}, "ppt"),
+    ({"Workbook": b""}, "xls"),
+    ({"Book": b""}, "xls"),
+    ({"FileHeader": b"something else"}, None),
+])
+def test_ole_containers(monkeypatch, streams, expected):
+    opened = []
+    monkeypatch.setattr(logic, "olefile", types.SimpleNamespace(
+        OleFileIO=lambda f: opened.append(FakeOle(streams)) or opened[-1]))
+    assert logic.sniff_format(logic.OLE2_MAGIC + b"\0" * 100) == expected
+    assert opened[0].closed
+
+
+def test_resolve_file_format():
+    png = b"\x89PNG\r\n\x1a\n...."
+    assert logic.resolve_file_format(png, "PNG") == {"declared": "png", "detected": "png", "format": "png"}
+    assert logic.resolve_file_format(png, "jpeg")["format"] == "png"  # 확장자가 틀리면 내용 기준
+    assert logic.resolve_file_format(b"\xff\xd8\xff\xe0", "jpeg")["format"] == "jpeg"  # 같은 형식의 다른 표기
+    assert logic.resolve_file_format(b"hello", "log") == {"declared": "log", "detected": "txt", "format": "txt"}
+    assert logic.resolve_file_format(b"he\x00llo", "bin")["format"] == "bin"
+    assert logic.resolve_file_format(b"hello", "docx")["format"] == "docx"  # 판별 불가면 선언 형식 유지
+    docx = _zip(**{"word__document.xml": "<a/>"})
+    assert logic.resolve_file_format(logic.FileBuffer(docx), "hwp")["format"] == "docx"
@@ -0,0 +1,77 @@
+import random
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _items(counts):
+    out, pos = [], 0
+    for t, n in counts.items():
+        for i in range(n):
+            out.append({"type": t, "value": f"{t}{i}", "span": (pos, pos + 1)})
+            pos += 2
+    random.Random(0).shuffle(out)
+    return out
+
+
+def test_counts_are_exact_and_samples_bounded_per_type():
+    items = _items({"phone": 5000, "email": 30, "file_parse_error": 1})
+    summary = logic.DetectionSummary(10, rng=random.Random(1)).extend(items)
+    assert summary.total == 5031
+    assert summary.to_dict() == {"summarized": True, "total": 5031, "sample_size": 10,
+                                 "counts": {"phone": 5000, "email": 30, "file_parse_error": 1}}
+    samples = summary.samples()
+    assert Counter(it["type"] for it in samples) == {"phone": 10, "email": 10, "file_parse_error": 1}
+    starts = [it["span"][0] for it in samples]
+    assert starts == sorted(starts)
+
+
+def test_spanless_samples_go_last():
+    summary = logic.DetectionSummary(5).extend([{"type": "card", "value": "x", "span": None},
+                                                {"type": "PS", "value": "y", "span": (4, 5)}])
+    assert [it["value"] for it in summary.samples()] == ["y", "x"]
+
+
+def test_reservoir_is_uniform():
+    # 100건 중 5건 표집을 반복하면 각 항목이 뽑힐 확률은 5/100
+    hits = Counter()
+    rng = random.Random(7)
+    items = [{"type": "t", "value": i, "span": (i, i + 1)} for i in range(100)]
+    for _ in range(4000):
+        hits.update(it["value"] for it in logic.DetectionSummary(5, rng=rng).extend(items).samples())
+    expected = 4000 * 5 / 100
+    assert min(hits[i] for i in range(100)) > expected * 0.6
+    assert max(hits.values()) < expected * 1.4
+
+
+def test_summarize_detections_threshold():
+    small = _items({"phone": 3})
+    assert logic.summarize_detections(small, threshold=3) == (small, None)
+    assert logic.summarize_detections(small, threshold=0) == (small, None)
+    samples, summary = logic.summarize_detections(_items({"phone": 50}), threshold=10, sample_size=4)
+    assert len(samples) == 4 and summary["total"] == 50
+
+
+def test_summarize_combination_risk():
+    items = [{"type": "PS", "value": f"이름{i}", "span": (i * 10, i * 10 + 3)} for i in range(30)]
+    items.append({"type": "LC", "value": "서울", "span": (5, 7)})
+    comb = logic.analyze_combination_risk(items, "x" * 400)
+    small = logic.summarize_combination_risk(comb, sample_size=5)
+    assert Counter(it["type"] for it in small["items"]) == {"PS": 5, "LC": 1}
+    assert small["counts"] == comb["counts"] and small["message"] == comb["message"]
+    assert all(len(c["items"]) <= 5 for c in small["clusters"])
+    assert len(comb["items"]) == 31  # 원본은 그대로
+    assert logic.summarize_combination_risk(comb, sample_size=100) is comb
+    assert logic.summarize_combination_risk(None) is None
+
+
+def test_log_detections_limit(caplog):
+    items = _items({"phone": 8})
+    with caplog.at_level("INFO"):
+        logic.log_detections(items, "파일 탐지", limit=3)
+    lines = caplog.text.strip().splitlines()
+    assert len(lines) == 4
+    assert "외 5건 (전체 8건" in lines[-1]
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+import Supervisor_Final as sup
+
+
+class FakeProcess:
+    def __init__(self, pid, alive=True):
+        self.pid, self.alive, self.exitcode = pid, alive, None if alive else 1
+
+    def is_alive(self):
+        return self.alive
+
+
+class FakeFlag:
+    def __init__(self, value=True):
+        self.value = value
+
+    def is_set(self):
+        return self.value
+
+
+class FakeWorker:
+    def __init__(self, slot, pid, started_at, requests=0, ready=True, alive=True, becomes_ready=True):
+        self.slot, self.started_at, self.requests = slot, started_at, requests
+        self.process = FakeProcess(pid, alive)
+        self.ready = FakeFlag(ready)
+        self.becomes_ready = becomes_ready
+        self.stopped = False
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def wait_ready(self, timeout):
+        return self.becomes_ready
+
+    def shutdown(self, timeout):
+        self.stopped = True
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    sizes = {}
+    monkeypatch.setattr(sup, "process_rss", lambda pid: sizes.get(pid, 1))
+    return sizes
+
+
+def _supervisor(spawned, **kw):
+    s = sup.WorkerSupervisor(workers=2, check_interval=0, **kw)
+    s._spawn = lambda slot: spawned.pop(0)
+    return s
+
+
+@pytest.mark.skipif(sup.psutil is None and not os.path.exists("/proc/self/statm"), reason="psutil 또는 /proc 필요")
+def test_rss_is_readable_here():
+    assert sup.process_rss(os.getpid()) > 0
+    assert sup.process_rss(2 ** 22 + 12345) == 0  # 없는 프로세스
+
+
+def test_refuses_rss_limit_it_cannot_measure(monkeypatch):
+    monkeypatch.setattr(sup, "process_rss", lambda pid: 0)
+    with pytest.raises(ValueError):
+        sup.WorkerSupervisor(max_rss_mb=100)
+    assert sup.WorkerSupervisor(max_rss_mb=0, max_requests=10).max_rss == 0
+
+
+def test_recycle_reason(rss):
+    s = sup.WorkerSupervisor(max_rss_mb=100, max_requests=10)
+    rss[1] = 50 * 1024 * 1024
+    assert s._recycle_reason(FakeWorker(0, 1, 0, requests=9)) is None
+    assert s._recycle_reason(FakeWorker(0, 1, 0, requests=10)) == "요청 10건"
+    rss[1] = 200 * 1024 * 1024
+    assert s._recycle_reason(FakeWorker(0, 1, 0)) == "RSS 200MB"
+
+
+def test_only_oldest_worker_replaced_per_check(rss):
+    new = FakeWorker(0, 30, 10)
+    s = _supervisor([new], max_rss_mb=0, max_requests=5)
+    old0, old1 = FakeWorker(0, 10, started_at=1, requests=9), FakeWorker(1, 20, started_at=2, requests=9)
+    s._workers = {0: old0, 1: old1}
+    s._check()
+    assert s._workers == {0: new, 1: old1}
+    assert old0.stopped and not old1.stopped and s.recycled == 1
+
+
+def test_old_worker_kept_when_replacement_not_ready(rss):
+    new = FakeWorker(0, 30, 10, becomes_ready=False)
+    s = _supervisor([new], max_rss_mb=0, max_requests=5)
+    old = FakeWorker(0, 10, 1, requests=9)
+    s._workers = {0: old}
+    s._check()
+    assert s._workers[0] is old and not old.stopped
+    assert new.stopped and s.recycled == 0
+
+
+def test_dead_and_starting_workers(rss):
+    restarted = FakeWorker(0, 40, 10)
+    s = _supervisor([restarted], max_rss_mb=0, max_requests=5)
+    dead = FakeWorker(0, 10, 1, alive=False)
+    starting = FakeWorker(1, 20, 2, requests=99, ready=False)  # 준비 전에는 교체 대상 아님
+    s._workers = {0: dead, 1: starting}
+    s._check()
+    assert s._workers == {0: restarted, 1: starting}
+    assert s.recycled == 0
@@ -0,0 +1,100 @@
+import datetime
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+
+def _ref_luhn(value):
+    digits = [int(c) for c in value if c.isdigit()]
+    if len(digits) < 13:
+        return False
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            d = d * 2 - 9 if d * 2 > 9 else d * 2
+        total += d
+    return total % 10 == 0
+
+
+def _ref_rrn(value, genders, base):
+    d = [int(c) for c in value if c.isdigit()]
+    if len(d) != 13 or d[6] not in genders:
+        return False
+    year = (1900 if d[6] in (1, 2, 5, 6) else 2000) + d[0] * 10 + d[1]
+    try:
+        datetime.date(year, d[2] * 10 + d[3], d[4] * 10 + d[5])
+    except ValueError:
+        return False
+    if year >= 2020:
+        return True
+    s = sum(x * w for x, w in zip(d[:12], [2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5]))
+    return (base - s % 11) % 10 == d[12]
+
+
+def _with_check(front12, base):
+    s = sum(int(x) * w for x, w in zip(front12, [2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5]))
+    return front12[:6] + "-" + front12[6:] + str((base - s % 11) % 10)
+
+
+def _random_values(seed, width, n=400):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        digits = "".join(rng.choice("0123456789") for _ in range(rng.choice((width - 1, width, width, width + 1))))
+        out.append(rng.choice((digits, digits[:6] + "-" + digits[6:], " " + digits + "번")))
+    return out
+
+
+def test_luhn_matches_reference():
+    values = _random_values(1, 16) + ["4111 1111 1111 1111", "4111-1111-1111-1112", "", "카드"]
+    got = logic.batch_validate_luhn(values).tolist()
+    assert got == [_ref_luhn(v) for v in values]
+    assert logic.validate_luhn("4111-1111-1111-1111") is True
+    assert logic.validate_luhn("4111-1111-1111-1112") is False
+    assert logic.validate_luhn("411111") is False
+
+
+def test_ssn_matches_reference():
+    valid = _with_check("900101123456", 11)
+    values = _random_values(2, 13) + [valid, "900230-1234567", "901301-1234567", "200101-3999999"]
+    got = logic.batch_validate_ssn(values).tolist()
+    assert got == [_ref_rrn(v, range(1, 9), 11) for v in values]
+    assert logic.validate_ssn(valid) is True
+    assert logic.validate_ssn("900230-1234567") is False  # 2월 30일
+    assert logic.validate_ssn("200101-3999999") is True   # 2020년 이후는 체크섬 생략
+
+
+def test_leap_day():
+    assert logic.validate_ssn(_with_check("000229312345", 11))       # 2000년은 윤년
+    assert not logic.validate_ssn(_with_check("010229312345", 11))   # 2001년은 평년
+
+
+def test_alien_registration():
+    valid = _with_check("900101512345", 13)
+    values = _random_values(3, 13) + [valid, _with_check("900101112345", 13)]
+    got = logic.batch_validate_alien_reg(values).tolist()
+    assert got == [_ref_rrn(v, (5, 6, 7, 8), 13) for v in values]
+    assert got[-2:] == [True, False]  # 성별 자리 1 은 내국인
+
+
+def test_driver_license():
+    got = logic.batch_validate_driver_license(
+        ["11-12-345678-90", "28-12-345678-90", "27-12-345678-90", "11-12-000000-90", "11-12-345678-9"]).tolist()
+    assert got == [True, True, False, False, False]
+
+
+def test_empty_input():
+    for validator, _ in logic.BATCH_VALIDATORS.values():
+        assert validator([]).tolist() == []
+
+
+def test_apply_batch_validation_sets_status():
+    items = [{"type": "card", "value": "4111 1111 1111 1111"},
+             {"type": "card", "value": "4111 1111 1111 1112"},
+             {"type": "ssn", "value": "900230-1234567"},
+             {"type": "email", "value": "a@b.co"}]
+    logic.apply_batch_validation(items)
+    assert [it.get("status") for it in items] == ["valid", "invalid (Luhn)", "invalid (SSN)", None]
@@ -0,0 +1,84 @@
+import io
+import zipfile
+
+import pytest
+
+pytest.importorskip("numpy")
+import Logic_Final as logic
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+HP = 'xmlns:hp="http://www.hancom.co.kr/hwpml/2011/paragraph"'
+
+DOCX_XML = f"""<w:document {W}><w:body>
+<w:p><w:r><w:t>홍길동</w:t></w:r><w:r><w:tab/><w:t>010-1234-5678</w:t></w:r></w:p>
+<w:p><w:r><w:t>첫 줄</w:t><w:br/><w:t>둘째 줄</w:t></w:r></w:p>
+<w:tbl><w:tr><w:tc><w:p><w:r><w:t>이름</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>김철수</w:t></w:r></w:p></w:tc></w:tr></w:tbl>
+</w:body></w:document>"""
+
+HWPX_XML = f"""<hs:sec xmlns:hs="http://www.hancom.co.kr/hwpml/2011/section" {HP}>
+<hp:p><hp:run><hp:t>가<hp:tab/>나<hp:lineBreak/>다</hp:t></hp:run></hp:p>
+<hp:p><hp:run><hp:t>서울 강남구</hp:t></hp:run></hp:p>
+</hs:sec>"""
+
+
+def _text(xml):
+    return "".join(logic.iter_xml_text(io.BytesIO(xml.encode("utf-8"))))
+
+
+def test_docx_paragraphs_tabs_breaks_and_cells():
+    text = _text(DOCX_XML)
+    assert "홍길동\t010-1234-5678\n" in text
+    assert "첫 줄\n둘째 줄\n" in text
+    assert "이름\n\t김철수\n\t" in text
+
+
+def test_hwpx_inline_controls_inside_text():
+    assert _text(HWPX_XML).split("\n")[:3] == ["가\t나", "다", "서울 강남구"]
+
+
+def test_processed_elements_are_detached(monkeypatch):
+    roots = []
+    real = logic.ET.iterparse
+
+    def capture(source, events):
+        for event, elem in real(source, events):
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(logic.ET, "iterparse", capture)
+    xml = "<root>" + "<p><t>x</t></p>" * 1000 + "</root>"
+    assert "".join(logic.iter_xml_text(io.BytesIO(xml.encode()))).count("x") == 1000
+    assert len(roots[0]) == 0  # 끝난 문단이 루트 아래 쌓이지 않음
+
+
+def _zip(parts):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as z:
+        for name, data in parts.items():
+            z.writestr(name, data)
+    out.seek(0)
+    return zipfile.ZipFile(out)
+
+
+def test_zip_parts_in_order_with_broken_part_fallback():
+    z = _zip({"a.xml": "<r><p><t>하나</t></p></r>", "b.xml": "<r><p><t>둘</t></p>", "c.xml": "<r><t>셋</t></r>"})
+    text = logic.extract_zip_xml_text(z, ["a.xml", "b.xml", "c.xml"])
+    assert text.index("하나") < text.index("둘") < text.index("셋")
+    assert "<" not in text
+
+
+def test_part_key_sorts_numerically():
+    names = ["ppt/slides/slide10.xml", "ppt/slides/slide2.xml", "ppt/slides/slide1.xml"]
+    assert sorted(names, key=logic._xml_part_key) == [
+        "ppt/slides/slide1.xml", "ppt/slides/slide2.xml", "ppt/slides/slide10.xml"]
+
+
+def test_parse_hwpx_sections_in_order():
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as z:
+        z.writestr("mimetype", "application/hwp+zip")
+        z.writestr("Contents/section10.xml", f"<hs:sec xmlns:hs='s' {HP}><hp:p><hp:t>끝</hp:t></hp:p></hs:sec>")
+        z.writestr("Contents/section0.xml", HWPX_XML)
+    text, _ = logic.parse_file(out.getvalue(), "hwpx", sniff=False)
+    assert text == "가 나 다 서울 강남구 끝"